@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark cpu_mem.parse_log (keyword-dispatched precompiled patterns over blocks)
+against the old per-line clean() + inline re.search parser on a synthetic
+multi-hundred-MB sysbench/stress-ng log.
+
+    python bench/bench_cpu_parser.py --size-mb 512
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cpu_mem  # noqa: E402
+
+
+def write_run(fh, rnd):
+    fh.write("\x1b[34m[12:00:00] Starting benchmark for: vms (distributed)\x1b[0m\n")
+    fh.write("\x1b[34m[12:00:00] Output will be saved to: ./results/x.log\x1b[0m\n")
+    fh.write("\x1b[34m[12:00:00] -> Sysbench (max prime = 30k)\x1b[0m\n")
+    fh.write("sysbench 1.0.20 (using system LuaJIT 2.1.0-beta3)\n\n")
+    fh.write("Running the test with following options:\nNumber of threads: 2\n\n")
+    fh.write(f"CPU speed:\n    events per second:  {2600 + rnd.random() * 100:.2f}\n\n")
+    fh.write("General statistics:\n    total time:                          10.0007s\n")
+    fh.write("    total number of events:              26268\n\n")
+    fh.write("Latency (ms):\n         min:                                    0.73\n")
+    fh.write(
+        "         avg:                                    "
+        f"{0.7 + rnd.random() * 0.1:.2f}\n"
+    )
+    fh.write("         max:                                    3.21\n")
+    fh.write("         95th percentile:                        0.81\n\n")
+    fh.write(f"500.00 MiB transferred ({36000 + rnd.random() * 1000:.2f} MiB/sec)\n")
+    fh.write("stress-ng: info:  [1234] dispatching hogs: 2 vm\n")
+    fh.write(
+        "stress-ng: info:  [1234] stressor       bogo ops real time  usr time"
+        "  sys time   bogo ops/s     bogo ops/s\n"
+    )
+    fh.write(
+        f"stress-ng: info:  [1234] vm               123456     60.00    100.00"
+        f"     20.00      {2000 + rnd.random() * 100:.2f}      1028.80\n"
+    )
+    fh.write("stress-ng: info:  [1234] successful run completed in 60.01s\n\n")
+
+
+def make_log(path, size_mb, seed=0):
+    rnd = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    with open(path, "w") as fh:
+        while fh.tell() < target:
+            write_run(fh, rnd)
+
+
+def legacy_scan(path):
+    """The original per-line loop, kept for comparison."""
+    metrics = {k: [] for k in cpu_mem.SAMPLE_METRICS}
+    with open(path, "r") as f:
+        for line in f:
+            clean_line = re.sub(r"\x1b\[[0-9;]*m", "", line).strip()
+            if "Starting benchmark for:" in clean_line:
+                match = re.search(
+                    r"Starting benchmark for: ([\w-]+)\s+\((\w+)\)", clean_line
+                )
+                if match:
+                    metrics["benchmark"] = match.group(1)
+                    metrics["environment"] = match.group(2)
+            if "events per second:" in clean_line:
+                match = re.search(r"events per second:\s*([\d.]+)", clean_line)
+                if match:
+                    metrics["events_per_sec"].append(float(match.group(1)))
+            if "total time:" in clean_line:
+                match = re.search(r"total time:\s*([\d.]+)s", clean_line)
+                if match:
+                    metrics["total_time_s"].append(float(match.group(1)))
+            if "avg:" in clean_line:
+                match = re.search(r"avg:\s*([\d.]+)", clean_line)
+                if match:
+                    metrics["lat_avg_ms"].append(float(match.group(1)))
+            if "MiB/sec" in clean_line:
+                match = re.search(r"(\d+\.\d+)\s+MiB/sec", clean_line)
+                if match:
+                    metrics["mem_mb_sec"].append(float(match.group(1)))
+            if "stress-ng:" in clean_line and "vm" in clean_line:
+                match = re.search(
+                    r"vm\s+(\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)"
+                    r"\s+(\d+\.\d+)\s+(\d+\.\d+)",
+                    clean_line,
+                )
+                if match:
+                    metrics["bogo_ops_per_sec"].append(float(match.group(5)))
+    return metrics
+
+
+def timed(fn, path):
+    t0 = time.perf_counter()
+    out = fn(path)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--size-mb", type=int, default=256)
+    ap.add_argument("--tmpdir", default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        path = os.path.join(tmp, "cpu.log")
+        make_log(path, args.size_mb)
+        size_mb = os.path.getsize(path) / 2**20
+        t_old, old = timed(legacy_scan, path)
+        t_new, new = timed(cpu_mem.scan_file, path)
+    assert old == new, "parsers disagree"
+
+    samples = sum(len(new[k]) for k in cpu_mem.SAMPLE_METRICS)
+    print(f"log: {size_mb:.0f} MB, {samples} samples")
+    print(f"per-line loop : {t_old:8.2f}s {size_mb / t_old:8.1f} MB/s")
+    print(f"keyword scan  : {t_new:8.2f}s {size_mb / t_new:8.1f} MB/s")
+    print(f"speedup       : {t_old / t_new:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark disk.parse_iozone (block reader) against the old per-line parser
+on a synthetic iozone -a log with local and shared tables.
+
+    python bench/bench_disk_parser.py --copies 50
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disk  # noqa: E402
+
+HEADER = (
+    "              kB  reclen    write  rewrite    read    reread    read     write"
+    "     read   rewrite      read   fwrite frewrite    fread  freread\n"
+)
+
+
+def make_log(copies, seed=0):
+    """copies x (local + shared) auto-mode tables, as disk-benchmark.sh writes them"""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(copies):
+        for marker in (
+            "[12:00:00] Starting benchmark for: local (standalone)\n",
+            "[12:00:00] --- IOZone shared filesystem test ---\n",
+        ):
+            out.append(marker)
+            out.append("\tIozone: Performance Test of File I/O\n\n" + HEADER)
+            kb = 64
+            while kb <= 2**19:
+                rl = 4
+                while rl <= min(kb, 16384):
+                    vals = " ".join(f"{v:8d}" for v in rng.integers(1e5, 1e7, 13))
+                    out.append(f"{kb:16d}{rl:8d} {vals}\n")
+                    rl *= 2
+                kb *= 2
+            out.append("\niozone test complete.\n")
+    return "".join(out)
+
+
+def legacy_parse(lines, metrics):
+    """The original per-line parser, kept for comparison."""
+    sections = {"local": [], "shared": []}
+    current = None
+    for ln in lines:
+        line = ln.strip()
+        if re.search(r"starting benchmark for:\s*local", line, re.IGNORECASE):
+            current = "local"
+            continue
+        if re.search(r"--- iozone shared filesystem test ---", line, re.IGNORECASE):
+            current = "shared"
+            continue
+        if current and re.match(r"^\d", line):
+            parts = line.split()
+            if len(parts) >= 15:
+                try:
+                    kb = int(parts[0])
+                    if kb <= 64:
+                        continue
+                    reclen = int(parts[1])
+                    values = list(map(float, parts[2 : 2 + len(metrics)]))
+                    entry = {"section": current, "kB": kb, "reclen": reclen}
+                    entry.update({metrics[i]: values[i] for i in range(len(metrics))})
+                    sections[current].append(entry)
+                except ValueError:
+                    pass
+    return pd.DataFrame(sections["local"]), pd.DataFrame(sections["shared"])
+
+
+def measure(fn, arg):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(arg, disk.METRICS)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--copies", type=int, default=50)
+    args = ap.parse_args()
+
+    text = make_log(args.copies)
+    lines = text.splitlines(keepends=True)
+    t_old, m_old, old = measure(legacy_parse, lines)
+    t_new, m_new, new = measure(disk.parse_iozone, text)
+    for a, b in zip(old, new):
+        pd.testing.assert_frame_equal(a, b)
+
+    rows = sum(len(df) for df in new)
+    print(f"log: {len(text) / 2**20:.1f} MB, {rows} table rows")
+    print(f"{'parser':>8} {'time (s)':>9} {'peak alloc (MB)':>16}")
+    print(f"{'legacy':>8} {t_old:>9.3f} {m_old:>16.1f}")
+    print(f"{'block':>8} {t_new:>9.3f} {m_new:>16.1f}")
+    print(f"speedup: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming HPCC parser against the old whole-file re.split parser.
+
+A synthetic hpccoutf.txt is written for every requested size (runs appended
+one after another, as in our sweeps) and each parser is run in a fresh
+interpreter so the peak RSS of the child is what gets reported.
+
+    python bench/bench_hpcc_parser.py --sizes-mb 256,1024,4096 --skip-legacy
+"""
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hpcc  # noqa: E402
+
+FILLER = "PTRANS/StarDGEMM filler line used to pad the section to a realistic size\n"
+
+
+def write_run(fh, run, filler_lines):
+    fh.write(f"Current time ({1700000000 + run}) is Mon Jan  1 00:00:00 2024\n")
+    fh.write("Begin of HPL section.\n")
+    fh.write(
+        "T/V                N    NB     P     Q               Time"
+        "                 Gflops\n"
+    )
+    for n in (1024, 2048, 4096, 8192):
+        for nb in (32, 64, 128, 256):
+            gflops = 20.0 + (n / 1024) * 2.5 + nb / 64
+            fh.write(
+                f"WR11C2R4  {n:>10} {nb:>5} {2:>5} {3:>5} {12.34:>18.2f} "
+                f"{gflops:>22.4e}\n"
+            )
+    fh.write("End of HPL section.\n")
+    fh.write(FILLER * filler_lines)
+    fh.write("Begin of Summary section.\n")
+    fh.write("VersionMajor=1\nVersionMinor=5\nCommWorldProcs=6\n")
+    fh.write(f"HPL_Tflops={0.04 + run * 1e-6:.6f}\nHPL_N=8192\nHPL_NB=256\n")
+    fh.write("StarSTREAM_Triad=5.12\nAvgPingPongLatency_usec=3.4\n")
+    fh.write("End of Summary section.\n")
+
+
+def make_file(path, size_mb, filler_lines=2000):
+    target = size_mb * 1024 * 1024
+    run = 0
+    with open(path, "w") as fh:
+        while fh.tell() < target:
+            write_run(fh, run, filler_lines)
+            run += 1
+    return run
+
+
+def legacy_parse(file_path, system_name):
+    """The pre-streaming implementation, kept verbatim for comparison."""
+    text = open(file_path).read()
+    entries = []
+    parts = re.split(r"Begin of Summary section\.", text)
+    for i, sec in enumerate(parts[1:]):
+        part, _ = sec.split("End of Summary section.", 1)
+        metrics = {}
+        for l in part.splitlines():
+            if "=" in l:
+                k, v = l.split("=", 1)
+                k, v = k.strip(), v.strip()
+                try:
+                    metrics[k] = float(v)
+                except ValueError:
+                    metrics[k] = v
+        metrics["Timestamp"] = hpcc.extract_timestamp(part.splitlines())
+        metrics["System"] = system_name
+        preceding_text = parts[i]
+        hpl_start = preceding_text.find("Begin of HPL section.")
+        hpl_end = preceding_text.find("End of HPL section.")
+        if hpl_start != -1 and hpl_end != -1:
+            for line in preceding_text[hpl_start:hpl_end].splitlines():
+                match = re.match(
+                    r"^WR\S+\s+(\d+)\s+(\d+)\s+\d+\s+\d+\s+[\d.]+\s+([\d.e+-]+)$",
+                    line.strip(),
+                )
+                if match:
+                    gflops = float(match.group(3))
+                    hpl_metrics = metrics.copy()
+                    hpl_metrics.update(
+                        {
+                            "HPL_N": int(match.group(1)),
+                            "HPL_NB": int(match.group(2)),
+                            "HPL_Gflops": gflops,
+                            "HPL_Tflops": gflops / 1000,
+                        }
+                    )
+                    entries.append(hpl_metrics)
+        entries.append(metrics)
+    return entries
+
+
+def worker(mode, path):
+    t0 = time.perf_counter()
+    if mode == "stream":
+        # Consume the generator without keeping the records around
+        count = sum(1 for _ in hpcc.iter_hpcc_records(path, "bench"))
+    else:
+        count = len(legacy_parse(path, "bench"))
+    elapsed = time.perf_counter() - t0
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{count} {elapsed:.3f} {rss_kb}")
+
+
+def run_child(mode, path):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", mode, path],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return int(out[0]), float(out[1]), int(out[2]) / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes-mb", default="256,1024,2048")
+    ap.add_argument("--skip-legacy", action="store_true")
+    ap.add_argument("--tmpdir", default=None)
+    ap.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    modes = ["stream"] if args.skip_legacy else ["stream", "legacy"]
+    print(
+        f"{'size':>8} {'parser':>8} {'records':>9} {'time (s)':>9} {'MB/s':>8} "
+        f"{'peak RSS (MB)':>14}"
+    )
+    for size_mb in (int(s) for s in args.sizes_mb.split(",")):
+        with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+            path = os.path.join(tmp, "hpccoutf.txt")
+            make_file(path, size_mb)
+            for mode in modes:
+                count, elapsed, rss = run_child(mode, path)
+                print(
+                    f"{size_mb:>6}MB {mode:>8} {count:>9} {elapsed:>9.2f} "
+                    f"{size_mb / elapsed:>8.1f} {rss:>14.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
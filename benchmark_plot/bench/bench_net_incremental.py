@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Check net.py --incremental against a full read on an iperf3 -P log split
+at every line: the summary row after the first part must match a full read
+of that part, and after the rest is appended a full read of the whole log,
+so both modes write the same columns and per-stream lines cut off from
+their [SUM] are never counted twice.
+
+    python bench/bench_net_incremental.py --streams 4 --seconds 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import net  # noqa: E402
+from make_dataset import write_net_log  # noqa: E402
+
+
+def full_row(lines):
+    """Summary row a full (non-incremental) read of lines reports"""
+    tables, hist = net.scan_lines(lines)
+    row, _ = net.link_summary("link", tables, hist)
+    return pd.Series(row).drop("Environment")
+
+
+def incremental_row(csv_path, log_path):
+    df, _ = net.update_network_summary(csv_path, {"link": log_path})
+    return df.loc["link"]
+
+
+def check_split(tmp, lines, k):
+    """Ingest lines[:k], then the rest, and compare both with a full read"""
+    work = tempfile.mkdtemp(dir=tmp)
+    log = os.path.join(work, "link.log")
+    csv = os.path.join(work, "summary.csv")
+    with open(log, "w") as fh:
+        fh.writelines(lines[:k])
+    first = incremental_row(csv, log)
+    with open(log, "a") as fh:
+        fh.writelines(lines[k:])
+    second = incremental_row(csv, log)
+    for got, want, part in (
+        (first, full_row(lines[:k]), "first part"),
+        (second, full_row(lines), "whole log"),
+    ):
+        where = f"split at line {k}, {part}"
+        assert list(got.index) == list(want.index), f"{where}: columns differ"
+        same = np.isclose(got.astype(float), want.astype(float), equal_nan=True)
+        assert same.all(), f"{where}:\n{pd.concat([got, want], axis=1)[~same]}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--streams", type=int, default=4)
+    ap.add_argument("--seconds", type=int, default=10)
+    ap.add_argument("--pings", type=int, default=20)
+    ap.add_argument("--tmpdir", default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        log = os.path.join(tmp, "link.log")
+        write_net_log(
+            log,
+            "vms",
+            "10.0.0.2",
+            args.seconds,
+            args.pings,
+            args.streams,
+            random.Random(0),
+            0.05,
+        )
+        with open(log) as fh:
+            lines = fh.readlines()
+        t0 = time.perf_counter()
+        for k in range(1, len(lines)):
+            check_split(tmp, lines, k)
+        print(
+            f"✅ {len(lines) - 1} split points of a -P {args.streams} log match "
+            f"a full read ({time.perf_counter() - t0:.1f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Time every parser and plotting stage on a synthetic results tree
+(make_dataset.py) of the requested size.
+
+The parsers run in this process on every generated file, one stage per log
+kind. The plotting scripts then run one by one in a scratch copy of
+benchmark_plot/ next to the generated ../results, so the repo's own plots
+and metric store are never touched. Timings go to stdout and, with --csv,
+to a CSV that can be kept per commit to track the pipeline's speed.
+
+    python bench/bench_pipeline.py --scale 10 --nodes 4 --csv /tmp/pipeline.csv
+"""
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cpu_mem  # noqa: E402
+import disk  # noqa: E402
+import hpcc  # noqa: E402
+import net  # noqa: E402
+from make_dataset import add_dataset_args, dataset_kwargs, make_dataset  # noqa: E402
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (stage, glob under results/, loader(path, env))
+PARSERS = [
+    ("cpu_mem.load_log", "*/cpu/cpu.log", lambda p, env: cpu_mem.load_log(p)),
+    ("cpu_mem.load_log (mem)", "*/mem/mem.log", lambda p, env: cpu_mem.load_log(p)),
+    ("disk.load_disk_log", "*/disk/*.log", lambda p, env: disk.load_disk_log(p)),
+    ("hpcc.parse_hpcc_output", "*/hpccoutf.txt", hpcc.parse_hpcc_output),
+    ("net.load_net_log", "*/net/*.log", lambda p, env: net.load_net_log(p)),
+]
+# (stage, argv) run from the scratch benchmark_plot/
+SCRIPTS = [
+    ("cpu_mem.py", ["cpu_mem.py"]),
+    ("net.py", ["net.py"]),
+    ("hpcc.py", ["hpcc.py"]),
+    ("hpl_analysis.py", ["hpl_analysis.py"]),
+    ("hpl_tune.py", ["hpl_tune.py", "--mem-gb", "16"]),
+    ("disk.py", ["disk.py"]),
+]
+
+
+def time_parsers(results):
+    """(stage, files, MB, seconds) of every parser over its generated files"""
+    rows = []
+    for stage, pattern, load in PARSERS:
+        paths = sorted(glob.glob(os.path.join(results, pattern)))
+        mb = sum(os.path.getsize(p) for p in paths) / 2**20
+        t0 = time.perf_counter()
+        for p in paths:
+            load(p, os.path.relpath(p, results).split(os.sep)[0])
+        rows.append((stage, len(paths), mb, time.perf_counter() - t0))
+    return rows
+
+
+def time_scripts(root, names):
+    """(stage, seconds, return code) of every plotting script in names"""
+    work = os.path.join(root, "benchmark_plot")
+    os.makedirs(work, exist_ok=True)
+    for path in glob.glob(os.path.join(SRC, "*.py")):
+        shutil.copy(path, work)
+    env = dict(os.environ, MPLBACKEND="Agg")
+    rows = []
+    for stage, argv in SCRIPTS:
+        if names and stage not in names:
+            continue
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable] + argv,
+            cwd=work,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        rows.append((stage, time.perf_counter() - t0, proc.returncode))
+        if proc.returncode:
+            print(f"❌ {stage} failed:\n{proc.stderr[-2000:]}")
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument(
+        "--scripts",
+        default=None,
+        help="comma-separated plotting scripts to time (default: all)",
+    )
+    ap.add_argument("--skip-scripts", action="store_true", help="parsers only")
+    ap.add_argument("--csv", default=None, help="also write the timings here")
+    ap.add_argument("--tmpdir", default=None)
+    args = add_dataset_args(ap).parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        results = os.path.join(tmp, "results")
+        t0 = time.perf_counter()
+        written = make_dataset(results, **dataset_kwargs(args))
+        mb = sum(os.path.getsize(p) for p in written) / 2**20
+        print(
+            f"🧪 {len(written)} files, {mb:.1f} MB generated in "
+            f"{time.perf_counter() - t0:.1f}s"
+        )
+
+        timings = []
+        print(f"\n{'parser':<24} {'files':>5} {'MB':>8} {'time (s)':>9} {'MB/s':>8}")
+        for stage, files, size, secs in time_parsers(results):
+            rate = size / secs if secs else float("nan")
+            print(f"{stage:<24} {files:>5} {size:>8.1f} {secs:>9.3f} {rate:>8.1f}")
+            timings.append(("parser", stage, size, secs, 0))
+
+        if not args.skip_scripts:
+            names = args.scripts.split(",") if args.scripts else None
+            print(f"\n{'script':<24} {'time (s)':>9}")
+            for stage, secs, code in time_scripts(tmp, names):
+                mark = "" if code == 0 else f"  (exit {code})"
+                print(f"{stage:<24} {secs:>9.2f}{mark}")
+                timings.append(("script", stage, mb, secs, code))
+
+    if args.csv:
+        with open(args.csv, "w") as fh:
+            fh.write("kind,stage,input_mb,seconds,exit_code\n")
+            for kind, stage, size, secs, code in timings:
+                fh.write(f"{kind},{stage},{size:.3f},{secs:.4f},{code}\n")
+        print(f"\n📄 Timings saved to: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
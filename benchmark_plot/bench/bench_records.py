@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading records files (records.py) against scraping the text
+logs they stand for: a ping soak with an iperf3 run for net.load_net_log,
+and a sysbench/stress-ng log for cpu_mem.load_log.
+
+    python bench/bench_records.py --pings 2000000 --cpu-mb 256
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cpu_mem  # noqa: E402
+import net  # noqa: E402
+import records  # noqa: E402
+from bench_cpu_parser import make_log as make_cpu_log  # noqa: E402
+
+
+def make_net_log(path, pings, seed=0):
+    rnd = random.Random(seed)
+    with open(path, "w") as fh:
+        fh.write("[ ID] Interval           Transfer     Bitrate         Retr  Cwnd\n")
+        for i in range(30):
+            rate = 9.2 + rnd.random() * 0.4
+            fh.write(
+                f"[  5]  {i:.2f}-{i + 1:.2f}  sec  1.09 GBytes  {rate:.2f} Gbits/sec"
+                f"    {rnd.randrange(3)}   3.01 MBytes\n"
+            )
+        fh.write("PING 10.0.0.1 (10.0.0.1) 56(84) bytes of data.\n")
+        for i in range(pings):
+            fh.write(
+                f"64 bytes from 10.0.0.1: icmp_seq={i + 1} ttl=64 "
+                f"time={0.05 + rnd.expovariate(10):.3f} ms\n"
+            )
+
+
+def write_net_records(log_path):
+    """The records runner.py would have written for the same output"""
+    with open(log_path) as fh:
+        tables, hist = net.scan_lines(fh)
+    iperf = {
+        key: list(tables[name].itertuples(index=False, name=None))
+        for key, name in (
+            ("intervals", "iperf"),
+            ("streams", "streams"),
+            ("totals", "totals"),
+        )
+    }
+    path = records.path_for(log_path)
+    records.append(
+        path,
+        [
+            {"tool": "iperf3", **iperf},
+            {"tool": "ping", "histogram": hist.to_state()},
+        ],
+    )
+    return path
+
+
+def write_cpu_records(log_path):
+    samples = cpu_mem.scan_file(log_path)
+    path = records.path_for(log_path)
+    keep = {m: samples[m] for m in cpu_mem.SAMPLE_METRICS if samples[m]}
+    records.append(path, [{"tool": "sysbench", "env": "vms", "samples": keep}])
+    return path
+
+
+def timed(fn, path):
+    t0 = time.perf_counter()
+    out = fn(path)
+    return time.perf_counter() - t0, out
+
+
+def report(name, log_path, rec_path, t_log, t_rec):
+    log_mb = os.path.getsize(log_path) / 2**20
+    rec_kb = os.path.getsize(rec_path) / 2**10
+    print(f"{name}: log {log_mb:.0f} MB, records {rec_kb:.0f} KB")
+    print(f"  scrape log   : {t_log:8.3f}s")
+    print(f"  load records : {t_rec:8.3f}s")
+    print(f"  speedup      : {t_log / t_rec:8.0f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pings", type=int, default=1_000_000)
+    ap.add_argument("--cpu-mb", type=int, default=128)
+    ap.add_argument("--tmpdir", default=None)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        log = os.path.join(tmp, "node_master.log")
+        make_net_log(log, args.pings)
+        rec = write_net_records(log)
+        t_log, a = timed(net.load_net_log, log)
+        t_rec, b = timed(net.load_net_log, rec)
+        assert a["ping_summary"].equals(b["ping_summary"]), "net results differ"
+        assert len(a["iperf"]) == len(b["iperf"]), "net results differ"
+        report("net", log, rec, t_log, t_rec)
+
+        log = os.path.join(tmp, "cpu.log")
+        make_cpu_log(log, args.cpu_mb)
+        rec = write_cpu_records(log)
+        t_log, a = timed(cpu_mem.load_log, log)
+        t_rec, b = timed(cpu_mem.load_log, rec)
+        means = cpu_mem.SAMPLE_METRICS
+        assert (a[means] - b[means]).abs().max().max() < 1e-6, "cpu results differ"
+        report("cpu_mem", log, rec, t_log, t_rec)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Write a synthetic results tree in the formats the plotting scripts parse:
+sysbench/stress-ng cpu.log and mem.log, iozone -a disk logs, iperf3/ping
+net logs for every ordered pair of nodes, and hpccoutf.txt with HPL sweeps,
+laid out like ../results:
+
+    OUT/{host,vms,containers}/cpu/cpu.log, mem/mem.log
+    OUT/{vms,containers}/disk/{master,node}_disk.log, hpccoutf.txt
+    OUT/{vms,containers}/net/<src>_<dst>.log
+
+Every number is an environment's level (PROFILES) shaped like the real tool
+output (slow start, cache effects, NB optimum) times Gaussian noise of
+relative sigma --noise; --scale multiplies every repeat count. The output
+is a stand-in for real clusters when timing the parsers and the plotting
+stages at scale (see bench_pipeline.py).
+
+    python bench/make_dataset.py /tmp/results --scale 10 --nodes 4 --noise 0.05
+"""
+import argparse
+import os
+import random
+
+# Level of every environment: sysbench events/s, sysbench MiB/s, stress-ng
+# vm bogo ops/s, iozone KB/s, link and loopback Gbits/s, ping ms, HPL
+# efficiency
+PROFILES = {
+    "host": {"cpu": 1350.0, "mem": 41000.0, "bogo": 2400.0},
+    "vms": {
+        "cpu": 1180.0,
+        "mem": 33000.0,
+        "bogo": 1900.0,
+        "disk": 1.6e6,
+        "link": 3.0,
+        "loopback": 24.0,
+        "rtt": 0.25,
+        "hpl": 0.62,
+    },
+    "containers": {
+        "cpu": 1320.0,
+        "mem": 39500.0,
+        "bogo": 2300.0,
+        "disk": 2.4e6,
+        "link": 9.4,
+        "loopback": 60.0,
+        "rtt": 0.08,
+        "hpl": 0.78,
+    },
+}
+ROLES = {"host": "standalone", "vms": "distributed", "containers": "distributed"}
+DISK_ROLES = ["master", "node"]  # the roles disk.py compares
+
+# iozone -a columns after kB and reclen, relative to the profile's level
+IOZONE_COLUMNS = [
+    ("write", 0.55),
+    ("rewrite", 0.70),
+    ("read", 1.00),
+    ("reread", 1.10),
+    ("random read", 0.90),
+    ("random write", 0.50),
+    ("bkwd read", 0.85),
+    ("record rewrite", 0.95),
+    ("stride read", 0.88),
+    ("fwrite", 0.52),
+    ("frewrite", 0.68),
+    ("fread", 0.98),
+    ("freread", 1.05),
+]
+
+HPL_SIZES = [4096, 8192, 16384, 24576, 32768, 40960]
+HPL_BLOCKS = [64, 128, 192, 256, 384]
+CORE_GFLOPS = 2.5 * 16  # 2.5 GHz x 16 double-precision FLOPs/cycle
+
+
+class Clock:
+    """[HH:MM:SS] stamps of common.sh's log_info lines, one run after another"""
+
+    def __init__(self):
+        self.t = 12 * 3600
+
+    def info(self, msg, seconds=1, color=34):
+        """A log line `seconds` after the previous one (32: log_success)"""
+        self.t += seconds
+        h, m, s = self.t // 3600 % 24, self.t // 60 % 60, self.t % 60
+        return f"\x1b[{color}m[{h:02d}:{m:02d}:{s:02d}] {msg}\x1b[0m\n"
+
+
+def jitter(rnd, noise):
+    """One multiplicative noise factor, never below 5% of the level"""
+    return max(0.05, rnd.gauss(1.0, noise))
+
+
+def common_header(clock, target, role):
+    """The lines common.sh logs before every benchmark"""
+    return (
+        clock.info(f"Starting benchmark for: {target} ({role})")
+        + clock.info(f"Output will be saved to: ./results/results-{target}.log", 0)
+        + clock.info("===============================", 0)
+        + clock.info("System Info:", 0)
+        + clock.info("OS:  Ubuntu 22.04.4 LTS", 0)
+        + clock.info("CPU: AMD EPYC 7B13", 0)
+        + clock.info("RAM: 7.8Gi", 0)
+        + clock.info("===============================", 0)
+    )
+
+
+def stress_ng(stressor, bogo_s, seconds=60.0):
+    pid = 1234
+    bogo = int(bogo_s * seconds)
+    return (
+        f"stress-ng: info:  [{pid}] setting to a {seconds:.0f} second run"
+        " per stressor\n"
+        f"stress-ng: info:  [{pid}] dispatching hogs: 2 {stressor}\n"
+        f"stress-ng: info:  [{pid}] stressor       bogo ops real time  usr time"
+        "  sys time   bogo ops/s     bogo ops/s\n"
+        f"stress-ng: info:  [{pid}]                           (secs)    (secs)"
+        "    (secs)   (real time) (usr+sys time)\n"
+        f"stress-ng: info:  [{pid}] {stressor:<10} {bogo:>10} {seconds:>9.2f}"
+        f" {2 * seconds * 0.98:>9.2f} {2 * seconds * 0.02:>9.2f}"
+        f" {bogo_s:>12.2f} {bogo_s / 2:>14.2f}\n"
+        f"stress-ng: info:  [{pid}] successful run completed in {seconds:.2f}s\n"
+    )
+
+
+def sysbench_latency(avg_ms, total_time, events):
+    return (
+        "General statistics:\n"
+        f"    total time:                          {total_time:.4f}s\n"
+        f"    total number of events:              {events}\n\n"
+        "Latency (ms):\n"
+        f"         min:                                    {avg_ms * 0.92:.2f}\n"
+        f"         avg:                                    {avg_ms:.2f}\n"
+        f"         max:                                    {avg_ms * 4.1:.2f}\n"
+        f"         95th percentile:                        {avg_ms * 1.08:.2f}\n"
+        f"         sum:                                {avg_ms * events:.2f}\n\n"
+        "Threads fairness:\n"
+        f"    events (avg/stddev):           {events / 2:.4f}/2.00\n"
+        f"    execution time (avg/stddev):   {total_time:.4f}/0.00\n\n"
+    )
+
+
+def write_cpu_log(path, env, runs, rnd, noise):
+    """cpu-benchmark.sh output: sysbench cpu then stress-ng --cpu, runs times"""
+    prof = PROFILES[env]
+    clock = Clock()
+    with open(path, "w") as fh:
+        for _ in range(runs):
+            eps = prof["cpu"] * jitter(rnd, noise)
+            fh.write(common_header(clock, env, ROLES[env]))
+            fh.write(clock.info("⚙️ Running CPU benchmarks", 0))
+            fh.write(clock.info("-> Sysbench (max prime = 30k)", 0))
+            fh.write(
+                "sysbench 1.0.20 (using system LuaJIT 2.1.0-beta3)\n\n"
+                "Running the test with following options:\n"
+                "Number of threads: 2\n"
+                "Initializing random number generator from current time\n\n\n"
+                "Prime numbers limit: 30000\n\n"
+                "Initializing worker threads...\n\n"
+                "Threads started!\n\n"
+                "CPU speed:\n"
+                f"    events per second: {eps:8.2f}\n\n"
+            )
+            total = 10.0 + rnd.random() * 0.01
+            fh.write(sysbench_latency(2000.0 / eps, total, int(eps * total)))
+            fh.write(clock.info("-> Stress-ng: basic", 10))
+            fh.write(stress_ng("cpu", prof["cpu"] * 0.7 * jitter(rnd, noise)))
+            fh.write(clock.info("✅ CPU benchmark complete", 60, 32))
+
+
+def write_mem_log(path, env, runs, rnd, noise):
+    """mem-benchmark.sh output: sysbench memory then stress-ng --vm, runs times"""
+    prof = PROFILES[env]
+    clock = Clock()
+    with open(path, "w") as fh:
+        for _ in range(runs):
+            mib_s = prof["mem"] * jitter(rnd, noise)
+            total = 500.0 / mib_s
+            fh.write(common_header(clock, env, ROLES[env]))
+            fh.write(clock.info("-> Running sysbench memory test (500M)...", 0))
+            fh.write(
+                "sysbench 1.0.20 (using system LuaJIT 2.1.0-beta3)\n\n"
+                "Running the test with following options:\n"
+                "Number of threads: 2\n"
+                "Initializing random number generator from current time\n\n\n"
+                "Running memory speed test with the following options:\n"
+                "  block size: 1024KiB\n  total size: 500MiB\n"
+                "  operation: write\n  scope: global\n\n"
+                "Initializing worker threads...\n\n"
+                "Threads started!\n\n"
+                f"Total operations: 500 ({mib_s:.2f} per second)\n\n"
+                f"500.00 MiB transferred ({mib_s:.2f} MiB/sec)\n\n\n"
+            )
+            fh.write(sysbench_latency(total * 2000.0 / 500, total, 500))
+            msg = "-> Running stress-ng memory test (2 workers, 1 min)..."
+            fh.write(clock.info(msg, 1))
+            fh.write(stress_ng("vm", prof["bogo"] * jitter(rnd, noise)))
+
+
+def iozone_table(level, max_kb, rnd, noise):
+    """One iozone -a auto-mode run, from 64 KB files up to max_kb"""
+    out = [
+        "\tIozone: Performance Test of File I/O\n"
+        "\t        Version $Revision: 3.489 $\n\n"
+        "\tRun began: Mon Jan  1 12:00:00 2024\n\n"
+        "\tAuto Mode\n"
+        "\tCommand line used: iozone -a -f /tmp/iozone_local.tmp\n"
+        "\tOutput is in kBytes/sec\n\n"
+        "                                                              random"
+        "    random     bkwd    record    stride                                    \n"
+        "              kB  reclen    write  rewrite    read    reread    read"
+        "     write     read   rewrite      read   fwrite frewrite    fread  freread\n"
+    ]
+    kb = 64
+    while kb <= max_kb:
+        # Files past 32 MB start at 64 KB records, as iozone -a does; small
+        # files are served from the page cache, large ones from the disk
+        rl = 64 if kb > 32768 else 4
+        cache = 2.0 if kb <= 16384 else 1.0
+        while rl <= min(kb, 16384):
+            rec = 0.6 + 0.4 * min(1.0, rl / 256)
+            vals = [
+                int(level * rel * cache * rec * jitter(rnd, noise))
+                for _, rel in IOZONE_COLUMNS
+            ]
+            out.append(f"{kb:16d}{rl:8d} " + " ".join(f"{v:8d}" for v in vals) + "\n")
+            rl *= 2
+        out.append("\n")
+        kb *= 2
+    out.append("\niozone test complete.\n")
+    return "".join(out)
+
+
+def write_disk_log(path, env, copies, max_kb, rnd, noise):
+    """disk-benchmark.sh output: local then shared iozone -a, copies times"""
+    level = PROFILES[env]["disk"]
+    clock = Clock()
+    with open(path, "w") as fh:
+        for _ in range(copies):
+            fh.write(common_header(clock, "local", "standalone"))
+            fh.write(iozone_table(level, max_kb, rnd, noise))
+            fh.write(clock.info("--- IOZone shared filesystem test ---", 300))
+            fh.write(iozone_table(level * 0.35, max_kb, rnd, noise))
+
+
+def iperf_rate(gbits):
+    """iperf3's bitrate column, e.g. 9.41 Gbits/sec or 941 Mbits/sec"""
+    if gbits >= 1:
+        return f"{gbits:.2f} Gbits/sec"
+    if gbits >= 1e-3:
+        return f"{gbits * 1e3:.0f} Mbits/sec"
+    return f"{gbits * 1e6:.0f} Kbits/sec"
+
+
+def iperf_transfer(gbits, seconds):
+    mbytes = gbits * seconds * 1e3 / 8
+    if mbytes >= 1024:
+        return f"{mbytes / 1024:.2f} GBytes"
+    return f"{mbytes:.0f} MBytes"
+
+
+def iperf_text(target, level, seconds, streams, rnd, noise):
+    """iperf3 -c output: slow start, per-stream and [SUM] lines, totals"""
+    ids = [5 + 2 * i for i in range(streams)]
+    out = [
+        f"Connecting to host {target}, port 5201\n",
+        *(
+            f"[{i:3d}] local 10.0.0.1 port {50000 + i} connected to {target}"
+            " port 5201\n"
+            for i in ids
+        ),
+        "[ ID] Interval           Transfer     Bitrate         Retr  Cwnd\n",
+    ]
+    totals = [[0.0, 0] for _ in ids]
+    for t in range(seconds):
+        ramp = min(1.0, 0.35 + 0.3 * t)
+        sum_rate, sum_retr = 0.0, 0
+        for k, i in enumerate(ids):
+            rate = level / streams * ramp * jitter(rnd, noise)
+            retr = int(rnd.expovariate(1.0) * 3) if rnd.random() < 0.3 else 0
+            cwnd = 0.3 + 2.7 * ramp * jitter(rnd, noise)
+            totals[k][0] += rate
+            totals[k][1] += retr
+            sum_rate += rate
+            sum_retr += retr
+            out.append(
+                f"[{i:3d}]  {t:5.2f}-{t + 1:5.2f}  sec  {iperf_transfer(rate, 1)}"
+                f"  {iperf_rate(rate)}  {retr:4d}   {cwnd:.2f} MBytes       \n"
+            )
+        if streams > 1:
+            out.append(
+                f"[SUM]  {t:5.2f}-{t + 1:5.2f}  sec  {iperf_transfer(sum_rate, 1)}"
+                f"  {iperf_rate(sum_rate)}  {sum_retr:4d}             \n"
+                "- - - - - - - - - - - - - - - - - - - - - - - - -\n"
+            )
+    out.append("- - - - - - - - - - - - - - - - - - - - - - - - -\n")
+    out.append("[ ID] Interval           Transfer     Bitrate         Retr\n")
+    span = f"{0:5.2f}-{seconds:5.2f}"
+    for (rate_sum, retr), i in zip(totals, ids):
+        rate = rate_sum / seconds
+        tx = iperf_transfer(rate, seconds)
+        out.append(
+            f"[{i:3d}]  {span}  sec  {tx}  {iperf_rate(rate)}  {retr:4d}"
+            "             sender\n"
+            f"[{i:3d}]  {span}  sec  {tx}  {iperf_rate(rate * 0.998)}"
+            "                  receiver\n"
+        )
+    if streams > 1:
+        rate = sum(r for r, _ in totals) / seconds
+        tx = iperf_transfer(rate, seconds)
+        retr = sum(r for _, r in totals)
+        out.append(
+            f"[SUM]  {span}  sec  {tx}  {iperf_rate(rate)}  {retr:4d}"
+            "             sender\n"
+            f"[SUM]  {span}  sec  {tx}  {iperf_rate(rate * 0.998)}"
+            "                  receiver\n"
+        )
+    out.append("\niperf Done.\n")
+    return "".join(out)
+
+
+def ping_text(target, rtt, pings, rnd, noise):
+    """ping -c output, replies with an exponential tail over the base RTT"""
+    out = [f"PING {target} ({target}) 56(84) bytes of data.\n"]
+    times = []
+    for i in range(pings):
+        ms = rtt * jitter(rnd, noise) + rnd.expovariate(20.0 / rtt)
+        times.append(ms)
+        out.append(
+            f"64 bytes from {target}: icmp_seq={i + 1} ttl=64 time={ms:.3f} ms\n"
+        )
+    mean = sum(times) / len(times)
+    mdev = (sum((t - mean) ** 2 for t in times) / len(times)) ** 0.5
+    out.append(
+        f"\n--- {target} ping statistics ---\n"
+        f"{pings} packets transmitted, {pings} received, 0% packet loss, "
+        f"time {int(pings * 200)}ms\n"
+        f"rtt min/avg/max/mdev = {min(times):.3f}/{mean:.3f}/{max(times):.3f}"
+        f"/{mdev:.3f} ms\n"
+    )
+    return "".join(out)
+
+
+def write_net_log(path, env, target, seconds, pings, streams, rnd, noise):
+    """net-benchmark.sh output against target (loopback for 127.0.0.1)"""
+    prof = PROFILES[env]
+    loop = target == "127.0.0.1"
+    level = prof["loopback" if loop else "link"]
+    rtt = prof["rtt"] * (0.2 if loop else 1.0)
+    clock = Clock()
+    with open(path, "w") as fh:
+        fh.write(common_header(clock, env, ROLES[env]))
+        fh.write(clock.info(f"Starting network benchmark against target: {target}", 0))
+        fh.write(clock.info(f"--- iperf3 bandwidth test ({streams} streams) ---", 0))
+        fh.write(iperf_text(target, level, seconds, streams, rnd, noise))
+        fh.write(clock.info("--- ping latency test ---", seconds))
+        fh.write(ping_text(target, rtt, pings, rnd, noise))
+        fh.write(clock.info("✅ Network benchmark complete", 10, 32))
+
+
+def process_grid(procs):
+    """The most square P x Q with P <= Q"""
+    p = int(procs**0.5)
+    while procs % p:
+        p -= 1
+    return p, procs // p
+
+
+def hpcc_run(run, env, procs, sizes, blocks, rnd, noise):
+    """One hpcc run: an HPL section sweeping sizes x blocks, then its summary"""
+    eff = PROFILES[env]["hpl"]
+    peak = procs * CORE_GFLOPS
+    p, q = process_grid(procs)
+    stamp = 1700000000 + 3600 * run
+    out = [
+        "########################################################################\n"
+        "This is the DARPA/DOE HPC Challenge Benchmark version 1.5.0 October 2012\n"
+        "########################################################################\n"
+        "Begin of HPL section.\n"
+        "T/V                N    NB     P     Q               Time"
+        "                 Gflops\n"
+        + "-" * 80
+        + "\n"
+    ]
+    best = None
+    for n in sizes:
+        for nb in blocks:
+            # Efficiency grows with N (less communication per flop) and
+            # peaks around NB = 192
+            shape = n * n / (n * n + 1.2e8) * (1 - 0.15 * abs(nb - 192) / 192)
+            gflops = peak * eff * shape * jitter(rnd, noise)
+            secs = 2 / 3 * n**3 / (gflops * 1e9)
+            if best is None or gflops > best[2]:
+                best = (n, nb, gflops, secs)
+            status = "FAILED" if rnd.random() < 0.01 else "PASSED"
+            out.append(
+                f"WR11C2R4  {n:>10} {nb:>5} {p:>5} {q:>5}"
+                f" {secs:>18.2f} {gflops:>22.4e}\n"
+                "||Ax-b||_oo/(eps*(||A||_oo*||x||_oo+||b||_oo)*N)="
+                f"   {rnd.random() * 5e-3:.7e} ...... {status}\n"
+            )
+    out.append("End of HPL section.\n")
+    n, nb, gflops, secs = best
+    triad = 5.0 * PROFILES[env]["mem"] / 39500 * jitter(rnd, noise)
+    summary = {
+        "VersionMajor": "1",
+        "VersionMinor": "5",
+        "CommWorldProcs": procs,
+        "MPI_Wtick": "1.000000e-09",
+        "HPL_Tflops": f"{gflops / 1000:.6g}",
+        "HPL_time": f"{secs:.4f}",
+        "HPL_eps": "1.11022e-16",
+        "HPL_RnormI": "1.1e-09",
+        "HPL_N": n,
+        "HPL_NB": nb,
+        "HPL_nprow": p,
+        "HPL_npcol": q,
+        "StarDGEMM_Gflops": f"{CORE_GFLOPS * eff * 1.1 * jitter(rnd, noise):.5g}",
+        "SingleDGEMM_Gflops": f"{CORE_GFLOPS * eff * 1.15 * jitter(rnd, noise):.5g}",
+        "PTRANS_GBs": f"{0.8 * eff * jitter(rnd, noise):.5g}",
+        "PTRANS_time": f"{0.5 / eff * jitter(rnd, noise):.5g}",
+        "PTRANS_n": n // 2,
+        "StarRandomAccess_GUPs": f"{0.02 * eff * jitter(rnd, noise):.5g}",
+        "SingleRandomAccess_GUPs": f"{0.03 * eff * jitter(rnd, noise):.5g}",
+        "STREAM_VectorSize": 20000000,
+        "StarSTREAM_Triad": f"{triad:.5g}",
+        "SingleSTREAM_Triad": f"{triad * 1.6:.5g}",
+        "StarFFT_Gflops": f"{1.2 * eff * jitter(rnd, noise):.5g}",
+        "SingleFFT_Gflops": f"{1.5 * eff * jitter(rnd, noise):.5g}",
+        "FFT_N": 2**22,
+        "AvgPingPongLatency_usec": f"{1.0 / eff * jitter(rnd, noise):.5g}",
+        "AvgPingPongBandwidth_GBytes": f"{6.0 * eff * jitter(rnd, noise):.5g}",
+    }
+    out.append("Begin of Summary section.\n")
+    out.append(f"Current time ({stamp}) is Mon Jan  1 {run % 24:02d}:00:00 2024\n")
+    out.extend(f"{k}={v}\n" for k, v in summary.items())
+    out.append("End of Summary section.\n")
+    out.append(
+        "########################################################################\n"
+        "End of HPC Challenge tests.\n"
+        f"Current time ({stamp + 1800}) is Mon Jan  1 {run % 24:02d}:30:00 2024\n"
+        "########################################################################\n"
+    )
+    return "".join(out)
+
+
+def write_hpcc(path, env, runs, procs, sizes, blocks, rnd, noise):
+    """runs hpcc runs appended to one hpccoutf.txt, as in our sweeps"""
+    with open(path, "w") as fh:
+        for run in range(runs):
+            fh.write(hpcc_run(run, env, procs, sizes, blocks, rnd, noise))
+
+
+def node_names(n):
+    """master plus n - 1 nodes ("node" alone for the usual two-node setup)"""
+    if n <= 2:
+        return ["master", "node"][:n]
+    return ["master"] + [f"node{i:02d}" for i in range(1, n)]
+
+
+def make_dataset(
+    out,
+    scale=1,
+    noise=0.05,
+    nodes=2,
+    runs=20,
+    hpcc_runs=4,
+    hpl_sizes=HPL_SIZES,
+    hpl_blocks=HPL_BLOCKS,
+    procs=4,
+    disk_copies=1,
+    disk_max_kb=524288,
+    iperf_seconds=30,
+    pings=50,
+    streams=1,
+    seed=0,
+):
+    """Write the results tree under out; returns the paths written"""
+    rnd = random.Random(seed)
+    hosts = node_names(nodes)
+    written = []
+
+    def path(*parts):
+        p = os.path.join(out, *parts)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        written.append(p)
+        return p
+
+    for env in PROFILES:
+        write_cpu_log(path(env, "cpu", "cpu.log"), env, runs * scale, rnd, noise)
+        write_mem_log(path(env, "mem", "mem.log"), env, runs * scale, rnd, noise)
+        if env == "host":
+            continue  # only cpu/mem are run on the bare host
+        for role in DISK_ROLES:
+            write_disk_log(
+                path(env, "disk", f"{role}_disk.log"),
+                env,
+                disk_copies * scale,
+                disk_max_kb,
+                rnd,
+                noise,
+            )
+        for src in hosts:
+            for i, dst in enumerate(hosts):
+                write_net_log(
+                    path(env, "net", f"{src}_{dst}.log"),
+                    env,
+                    "127.0.0.1" if src == dst else f"10.0.0.{i + 2}",
+                    iperf_seconds,
+                    pings * scale,
+                    streams,
+                    rnd,
+                    noise,
+                )
+        write_hpcc(
+            path(env, "hpccoutf.txt"),
+            env,
+            hpcc_runs * scale,
+            procs,
+            hpl_sizes,
+            hpl_blocks,
+            rnd,
+            noise,
+        )
+    return written
+
+
+def add_dataset_args(ap):
+    ap.add_argument(
+        "--scale", type=int, default=1, help="multiplies every repeat count"
+    )
+    ap.add_argument(
+        "--noise", type=float, default=0.05, help="relative sigma of the values"
+    )
+    ap.add_argument("--nodes", type=int, default=2, help="nodes (net is N x N links)")
+    ap.add_argument("--runs", type=int, default=20, help="cpu/mem runs per log")
+    ap.add_argument("--hpcc-runs", type=int, default=4, help="hpcc runs per file")
+    ap.add_argument("--procs", type=int, default=4, help="MPI ranks of the hpcc runs")
+    ap.add_argument("--disk-copies", type=int, default=1, help="iozone runs per log")
+    ap.add_argument(
+        "--disk-max-kb", type=int, default=524288, help="largest iozone file (KB)"
+    )
+    ap.add_argument("--iperf-seconds", type=int, default=30, help="iperf3 -t")
+    ap.add_argument("--pings", type=int, default=50, help="ping -c")
+    ap.add_argument("--streams", type=int, default=1, help="iperf3 -P")
+    ap.add_argument("--seed", type=int, default=0)
+    return ap
+
+
+def dataset_kwargs(args):
+    keys = (
+        "scale noise nodes runs hpcc_runs procs disk_copies disk_max_kb "
+        "iperf_seconds pings streams seed"
+    )
+    return {k: getattr(args, k) for k in keys.split()}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("out", help="results directory to write (e.g. /tmp/results)")
+    args = add_dataset_args(ap).parse_args()
+    written = make_dataset(args.out, **dataset_kwargs(args))
+    mb = sum(os.path.getsize(p) for p in written) / 2**20
+    print(f"🧪 Wrote {len(written)} files ({mb:.1f} MB) under {args.out}")
+
+
+if __name__ == "__main__":
+    main()
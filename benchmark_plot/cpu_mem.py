@@ -1,19 +1,156 @@
 #!/usr/bin/env python3
 
+import argparse
 import os
 import re
 
 import matplotlib.pyplot as plt
 import pandas as pd
 
+import cache
+import incremental
+import ingest
+import records
+import stats
+import store
+import warehouse
+from stats import RunningStats, summary_columns
+
 BASE = "../results"
 ENVS = ["host", "vms", "containers"]
 PLOT_DIR = "plots"
 
+# Bump when the parser output changes to invalidate cached results
+PARSER_VERSION = 5
+
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
 
 def clean(line):
     """Remove ANSI escape codes and clean up lines"""
-    return re.sub(r"\x1b\[[0-9;]*m", "", line).strip()
+    return ANSI_RE.sub("", line).strip()
+
+
+SAMPLE_METRICS = [
+    "events_per_sec",
+    "total_time_s",
+    "lat_avg_ms",
+    "mem_mb_sec",
+    "bogo_ops_per_sec",
+]
+
+# Mean of every metric followed by its spread (std, min, max, p50/p95/p99)
+SUMMARY_COLUMNS = summary_columns(SAMPLE_METRICS) + ["environment"]
+UNITS = {
+    "events_per_sec": "events/s",
+    "total_time_s": "s",
+    "lat_avg_ms": "ms",
+    "mem_mb_sec": "MiB/s",
+    "bogo_ops_per_sec": "bogo ops/s",
+}
+LOWER_IS_BETTER = {"total_time_s", "lat_avg_ms"}
+
+# Keyword dispatch table: every pattern starts with its literal keyword, so
+# the regex engine jumps straight to candidate lines with a C-level search
+# and lines without any keyword never reach Python code. [ \t] keeps each
+# match within one line.
+SAMPLE_RES = {
+    "events_per_sec": re.compile(r"events per second:[ \t]*([\d.]+)"),
+    "total_time_s": re.compile(r"total time:[ \t]*([\d.]+)s"),
+    "lat_avg_ms": re.compile(r"avg:[ \t]*([\d.]+)"),
+}
+HEADER = "Starting benchmark for: "
+HEADER_RE = re.compile(r"Starting benchmark for: ([\w-]+)[ \t]+\((\w+)\)")
+# MiB/sec and stress-ng rows are anchored on the literal after the number
+MIB = "MiB/sec"
+MIB_RE = re.compile(r"(\d+\.\d+)[ \t]+$")
+VM_RE = re.compile(
+    r"vm[ \t]+\d+[ \t]+\d+\.\d+[ \t]+\d+\.\d+[ \t]+\d+\.\d+"
+    r"[ \t]+(\d+\.\d+)[ \t]+\d+\.\d+"
+)
+
+
+def scan_text(text, metrics=None):
+    """Collect every metric sample (and the header environment) in text"""
+    if metrics is None:
+        metrics = {k: [] for k in SAMPLE_METRICS}
+    for key, pattern in SAMPLE_RES.items():
+        metrics[key].extend(map(float, pattern.findall(text)))
+
+    # First "<number> MiB/sec" of each line
+    find, rfind = text.find, text.rfind
+    pos = find(MIB)
+    while pos != -1:
+        m = MIB_RE.search(text, rfind("\n", 0, pos) + 1, pos)
+        if m:
+            metrics["mem_mb_sec"].append(float(m.group(1)))
+            pos = find("\n", pos)
+            if pos == -1:
+                break
+        pos = find(MIB, pos + 1)
+
+    # stress-ng rows: the "vm" stressor line of a "stress-ng:" prefixed line
+    for m in VM_RE.finditer(text):
+        start = m.start()
+        if rfind("stress-ng:", 0, start) > rfind("\n", 0, start):
+            metrics["bogo_ops_per_sec"].append(float(m.group(1)))
+
+    # Only the last header counts; escapes only wrap our own log_info lines,
+    # so that one line is the only one cleaned
+    pos = rfind(HEADER)
+    if pos != -1:
+        end = find("\n", pos)
+        m = HEADER_RE.match(clean(text[pos : end if end != -1 else None]))
+        if m:
+            metrics["benchmark"] = m.group(1)
+            metrics["environment"] = m.group(2)
+    return metrics
+
+
+def scan_lines(lines):
+    """scan_text over an iterable of lines"""
+    return scan_text("".join(lines))
+
+
+def iter_blocks(path, block_size=1 << 23):
+    """Text of path in blocks of about block_size, cut at line boundaries"""
+    rest = ""
+    with cache.open_source(path) as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            block = rest + block
+            cut = block.rfind("\n") + 1
+            rest = block[cut:]
+            yield block[:cut]
+    if rest:
+        yield rest
+
+
+def scan_file(path, block_size=1 << 23):
+    """scan_text over a file, read in blocks cut at line boundaries"""
+    metrics = {k: [] for k in SAMPLE_METRICS}
+    for block in iter_blocks(path, block_size):
+        scan_text(block, metrics)
+    return metrics
+
+
+def accumulate(text, acc):
+    """Fold the samples of text into acc (metric -> RunningStats)"""
+    samples = scan_text(text)
+    for m in SAMPLE_METRICS:
+        acc[m].extend(samples[m])
+    return samples.get("environment")
+
+
+def summary_row(acc, environment):
+    row = {}
+    for m in SAMPLE_METRICS:
+        row.update(acc[m].summary(m))
+    row["environment"] = environment
+    return row
 
 
 def parse_log(path):
@@ -21,105 +158,104 @@ def parse_log(path):
     if not os.path.exists(path):
         return None
 
-    metrics = {
-        "events_per_sec": [],
-        "total_time_s": [],
-        "lat_avg_ms": [],
-        "mem_mb_sec": [],
-        "bogo_ops_per_sec": [],
-    }
-
-    with open(path, "r") as f:
-        for line in f:
-            clean_line = clean(line)
-
-            # Capture benchmark type and environment from header
-            if "Starting benchmark for:" in clean_line:
-                match = re.search(
-                    r"Starting benchmark for: ([\w-]+)\s+\((\w+)\)", clean_line
-                )
-                if match:
-                    metrics["benchmark"] = match.group(1)
-                    metrics["environment"] = match.group(2)
-
-            # CPU metrics
-            if "events per second:" in clean_line:
-                match = re.search(r"events per second:\s*([\d.]+)", clean_line)
-                if match:
-                    metrics["events_per_sec"].append(float(match.group(1)))
-
-            if "total time:" in clean_line:
-                match = re.search(r"total time:\s*([\d.]+)s", clean_line)
-                if match:
-                    metrics["total_time_s"].append(float(match.group(1)))
-
-            if "avg:" in clean_line:
-                match = re.search(r"avg:\s*([\d.]+)", clean_line)
-                if match:
-                    metrics["lat_avg_ms"].append(float(match.group(1)))
-
-            # Memory metrics
-            if "MiB/sec" in clean_line:
-                match = re.search(r"(\d+\.\d+)\s+MiB/sec", clean_line)
-                if match:
-                    metrics["mem_mb_sec"].append(float(match.group(1)))
-
-            # Unified stress-ng pattern
-            if "stress-ng:" in clean_line and "vm" in clean_line:
-                match = re.search(
-                    r"vm\s+(\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+)",
-                    clean_line,
-                )
-                if match:
-                    metrics["bogo_ops_per_sec"].append(float(match.group(5)))
-
-    # Calculate averages for multi-value metrics
-    return {
-        "events_per_sec": (
-            sum(metrics["events_per_sec"]) / len(metrics["events_per_sec"])
-            if metrics["events_per_sec"]
-            else None
-        ),
-        "total_time_s": (
-            sum(metrics["total_time_s"]) / len(metrics["total_time_s"])
-            if metrics["total_time_s"]
-            else None
-        ),
-        "lat_avg_ms": (
-            sum(metrics["lat_avg_ms"]) / len(metrics["lat_avg_ms"])
-            if metrics["lat_avg_ms"]
-            else None
-        ),
-        "mem_mb_sec": (
-            sum(metrics["mem_mb_sec"]) / len(metrics["mem_mb_sec"])
-            if metrics["mem_mb_sec"]
-            else None
-        ),
-        "bogo_ops_per_sec": (
-            sum(metrics["bogo_ops_per_sec"]) / len(metrics["bogo_ops_per_sec"])
-            if metrics["bogo_ops_per_sec"]
-            else None
-        ),
-        "environment": metrics.get("environment", "unknown"),
-    }
+    # Samples are folded into running statistics block by block and never
+    # kept, so memory stays flat whatever the size of the log
+    acc = {m: RunningStats() for m in SAMPLE_METRICS}
+    environment = "unknown"
+    for block in iter_blocks(path):
+        environment = accumulate(block, acc) or environment
+    return summary_row(acc, environment)
+
+
+def load_records(path):
+    """Summary row of a records file written by runner.py"""
+    acc = {m: RunningStats() for m in SAMPLE_METRICS}
+    environment = "unknown"
+    for rec in records.read(path):
+        for m, values in rec.get("samples", {}).items():
+            if m in acc:
+                acc[m].extend(values)
+        environment = rec.get("env", environment)
+    return summary_row(acc, environment)
+
+
+def load_log(path):
+    """
+    parse_log (or load_records for a records file) as a one-row DataFrame,
+    the unit stored in the cache
+    """
+    data = load_records(path) if records.is_records(path) else parse_log(path)
+    if not data:
+        return pd.DataFrame()
+    return pd.DataFrame([data], columns=SUMMARY_COLUMNS)
+
+
+def update_summary(csv_path, logs):
+    """
+    Fold only the new tail of every log into its running statistics per
+    metric, kept in the incremental state, and rewrite the small summary.
+    """
+    state = incremental.begin(csv_path)
+    rows = []
+    for label, path in logs.items():
+        key = os.path.abspath(path)
+        entry = state.get(key)
+        if entry and "stats" not in entry:
+            entry = None  # state from before the running statistics: start over
+        chunk, entry, reset = incremental.read_tail(path, entry)
+        if reset:
+            print(f"⚠️ {path} was truncated or rotated, reading it from the start")
+        saved = entry.get("stats", {})
+        acc = {m: RunningStats.from_state(saved.get(m)) for m in SAMPLE_METRICS}
+        environment = accumulate(chunk.decode(errors="replace"), acc)
+        entry["stats"] = {m: acc[m].to_state() for m in SAMPLE_METRICS}
+        entry["environment"] = environment or entry.get("environment", "unknown")
+        state[key] = entry
+
+        row = summary_row(acc, entry["environment"])
+        row["label"] = label
+        rows.append(row)
+    incremental.save_state(csv_path, state)
+
+    df = pd.DataFrame(rows, columns=["label"] + SUMMARY_COLUMNS)
+    df = df.set_index("label")
+    df.to_csv(csv_path)
+    return df
+
+
+def store_rows(df):
+    """Summary table (indexed by host_cpu, vms_mem, ...) as metric store rows"""
+    wide = df.reset_index()
+    wide["env"] = wide["label"].str.rsplit("_", n=1).str[0]
+    wide["role"] = wide["label"].str.rsplit("_", n=1).str[-1]
+    metrics = [c for c in SUMMARY_COLUMNS if c != "environment"]
+    units, lower = {}, set()
+    for m in SAMPLE_METRICS:
+        for col in summary_columns([m]):
+            units[col] = "count" if col == f"{m}_n" else UNITS[m]
+            if m in LOWER_IS_BETTER and col != f"{m}_n":
+                lower.add(col)
+    return store.from_wide(
+        wide,
+        "cpu_mem",
+        metrics,
+        run_id="label",
+        env="env",
+        role="role",
+        units=units,
+        lower_is_better=lower,
+    )
 
 
 def discover_logs(base_dir):
     """Find all log files in the results directory structure"""
     logs = {}
     for env in ENVS:
-        env_dir = os.path.join(base_dir, env)
-        if not os.path.exists(env_dir):
-            continue
-
         # Look for both CPU and memory logs
-        cpu_log = os.path.join(env_dir, "cpu", "cpu.log")
-        mem_log = os.path.join(env_dir, "mem", "mem.log")
-
-        if os.path.exists(cpu_log):
-            logs[f"{env}_cpu"] = cpu_log
-        if os.path.exists(mem_log):
-            logs[f"{env}_mem"] = mem_log
+        for kind in ("cpu", "mem"):
+            for _, name, path in ingest.find_logs(base_dir, [env], kind, warn=False):
+                if name == f"{kind}.log":
+                    logs[f"{env}_{kind}"] = path
 
     return logs
 
@@ -186,22 +322,42 @@ def visualize_metrics(df, plot_dir=PLOT_DIR):
         # Draw grid behind bars
         plt.grid(axis="y", linestyle="--", linewidth=0.5, zorder=0)
 
-        # Identify winners/losers
-        if metric == "lat_avg_ms":
-            winner = data[metric].idxmin()
-            loser = data[metric].idxmax()
-        else:
-            winner = data[metric].idxmax()
-            loser = data[metric].idxmin()
+        # Identify winners/losers: only differences that survive a bootstrap
+        # of each mean (from its n and std) are coloured
+        rng = np.random.default_rng(0)
+        draws = {
+            idx: stats.summary_means(
+                row[metric],
+                row.get(f"{metric}_std", np.nan),
+                row.get(f"{metric}_n", 0),
+                rng=rng,
+            )
+            for idx, row in data.iterrows()
+        }
+        winner, loser, test, _ = stats.rank(
+            draws, data[metric].to_dict(), lower_is_better=metric in LOWER_IS_BETTER
+        )
 
         colors = [
             NORD_GREEN if idx == winner else NORD_RED if idx == loser else NORD_GREY
             for idx in data.index
         ]
+        cis = [stats.confidence_interval(draws[idx]) for idx in data.index]
+        yerr = np.nan_to_num(
+            [
+                [v - lo for v, (lo, _) in zip(data[metric], cis)],
+                [hi - v for v, (_, hi) in zip(data[metric], cis)],
+            ]
+        )
 
         # Plot bars above grid
-        bars = plt.bar(data.index, data[metric], color=colors, zorder=3)
-        plt.title(f"{title} Comparison", pad=16)
+        bars = plt.bar(
+            data.index, data[metric], yerr=yerr, capsize=4, color=colors, zorder=3
+        )
+        subtitle = (
+            f" (p = {test['p_value']:.3f})" if np.isfinite(test["p_value"]) else ""
+        )
+        plt.title(f"{title} Comparison{subtitle}", pad=16)
         plt.ylabel(ylabel)
         plt.yscale(scale)
 
@@ -241,38 +397,66 @@ def visualize_metrics(df, plot_dir=PLOT_DIR):
 
 
 def main():
+    ap = argparse.ArgumentParser(description="CPU and memory benchmark plots")
+    args = warehouse.add_warehouse_arg(
+        incremental.add_incremental_arg(ingest.add_ingest_args(ap))
+    ).parse_args()
+
     # Create plot directory if not exists
     os.makedirs(PLOT_DIR, exist_ok=True)
 
     # Discover and parse all log files
     log_files = discover_logs(BASE)
-    results = []
-
-    for label, path in log_files.items():
-        data = parse_log(path)
-        if data:
-            data["label"] = label
-            results.append(data)
-
-    # Create DataFrame and save results
-    df = pd.DataFrame(results).set_index("label")
-
-    # Split and save CPU results
-    cpu_df = df[df.index.str.endswith("_cpu")]
     cpu_dir = os.path.join(PLOT_DIR, "cpu")
-    os.makedirs(cpu_dir, exist_ok=True)
-    cpu_csv_path = os.path.join(cpu_dir, "cpu_summary.csv")
-    cpu_df.to_csv(cpu_csv_path)
-
-    # Split and save Memory results
-    mem_df = df[df.index.str.endswith("_mem")]
     mem_dir = os.path.join(PLOT_DIR, "memory")
+    os.makedirs(cpu_dir, exist_ok=True)
     os.makedirs(mem_dir, exist_ok=True)
+    cpu_csv_path = os.path.join(cpu_dir, "cpu_summary.csv")
     mem_csv_path = os.path.join(mem_dir, "mem_summary.csv")
-    mem_df.to_csv(mem_csv_path)
+
+    if args.incremental:
+        # Only the bytes appended since the last run are parsed
+        cpu_df = update_summary(
+            cpu_csv_path, {k: v for k, v in log_files.items() if k.endswith("_cpu")}
+        )
+        mem_df = update_summary(
+            mem_csv_path, {k: v for k, v in log_files.items() if k.endswith("_mem")}
+        )
+        df = pd.concat([cpu_df, mem_df])
+    else:
+        df = ingest.ingest(
+            (
+                (label, records.prefer(path), load_log, "cpu_mem", PARSER_VERSION)
+                for label, path in log_files.items()
+            ),
+            jobs=args.jobs,
+            processes=args.processes,
+        )
+
+        # Create DataFrame and save results
+        df = df.set_index("label")
+
+        # Split and save CPU results
+        cpu_df = df[df.index.str.endswith("_cpu")]
+        cpu_df.to_csv(cpu_csv_path)
+
+        # Split and save Memory results
+        mem_df = df[df.index.str.endswith("_mem")]
+        mem_df.to_csv(mem_csv_path)
+
+        incremental.clear_state(cpu_csv_path)
+        incremental.clear_state(mem_csv_path)
+
+    store.save_family(
+        store_rows(df),
+        "cpu_mem",
+        warehouse_path=args.warehouse,
+        sources=log_files.values(),
+    )
 
     print("\nBenchmark Results:")
-    print(df.to_string())  # Using pandas' built-in string formatting
+    shown = [c for m in SAMPLE_METRICS for c in (m, f"{m}_std")] + ["environment"]
+    print(df[shown].to_string())  # Using pandas' built-in string formatting
 
     # Generate visualizations
     visualize_metrics(df)
@@ -1,19 +1,50 @@
 #!/usr/bin/env python3
+import argparse
+import io
 import os
 import re
 import string
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 for 3D projection
 
+import cache
+import incremental
+import ingest
+import records
+import store
+import warehouse
+
+# Bump when the parser output changes to invalidate cached results
+PARSER_VERSION = 1
+
 # Nord palette accents for bar charts
 NORD_LOCAL = "#88C0D0"  # Nord 9
 NORD_SHARED = "#81A1C1"  # Nord 10
 NORD_CONTAINER = "#5E81AC"  # Nord 11
 NORD_VM = "#B48EAD"  # Nord 15
 
+METRICS = [
+    "Write (kB/s)",
+    "Rewrite (kB/s)",
+    "Read (kB/s)",
+    "Reread (kB/s)",
+    "Random Read (kB/s)",
+    "Random Write (kB/s)",
+    "Bkwd Read (kB/s)",
+    "Record Rewrite (kB/s)",
+    "Stride Read (kB/s)",
+    "Fwrite (kB/s)",
+    "Frewrite (kB/s)",
+    "Fread (kB/s)",
+    "Freread (kB/s)",
+]
+
 
 def sanitize_filename(s):
     valid = f"{string.ascii_letters}{string.digits}"
@@ -22,114 +53,306 @@ def sanitize_filename(s):
     return cleaned.strip("_")
 
 
+def label_columns(df, label):
+    """Add role/environment columns from a label like "master (vm)" """
+    role, env = label.split()
+    df["role"] = role
+    df["environment"] = env.strip("()").lower()
+    return df
+
+
+def long_form(full_df, metrics=METRICS):
+    """Drop node-local rows and melt to one row per (cell, metric)"""
+    # 🚫 Exclude 'node local' everywhere
+    full_df = full_df[~((full_df["role"] == "node") & (full_df["section"] == "local"))]
+
+    # Melt for long form
+    return full_df.melt(
+        id_vars=["environment", "role", "section", "kB", "reclen"],
+        value_vars=metrics,
+        var_name="metric",
+        value_name="value",
+    )
+
+
+def store_rows(long_df):
+    """Long-form IOzone cells as metric store rows (kB/s, higher is better)"""
+    rows = pd.DataFrame(
+        {
+            "run_id": "disk-" + long_df["environment"] + "-" + long_df["role"],
+            "family": "disk",
+            "env": long_df["environment"],
+            "role": long_df["role"],
+            "section": (
+                long_df["section"]
+                + " kB="
+                + long_df["kB"].astype(str)
+                + " reclen="
+                + long_df["reclen"].astype(str)
+            ),
+            "metric": long_df["metric"],
+            "value": long_df["value"],
+            "unit": "kB/s",
+            "direction": "higher",
+        }
+    )
+    return store.typed(rows.dropna(subset=["value"]))
+
+
+def update_disk_summary(csv_path, logs, metrics=METRICS):
+    """
+    Parse only what was appended to each log since the last run and append
+    the new long-form rows to csv_path. The section in effect at the end of
+    the consumed bytes is kept in the state, so a tail that starts inside a
+    table is attributed correctly.
+    """
+    state = incremental.begin(csv_path)
+    frames = []
+    for label, path in logs.items():
+        key = os.path.abspath(path)
+        chunk, entry, reset = incremental.read_tail(path, state.get(key))
+        if reset:
+            print(f"⚠️ {path} was truncated or rotated, reading it from the start")
+        text = chunk.decode(errors="replace")
+        for df in parse_iozone(text, metrics, section=entry.get("section")):
+            if not df.empty:
+                frames.append(label_columns(df, label))
+        entry["section"] = last_section(text, entry.get("section"))
+        state[key] = entry
+    if frames:
+        new_rows = long_form(pd.concat(frames, ignore_index=True), metrics)
+        incremental.append_rows(csv_path, new_rows)
+        print(f"➕ {len(new_rows)} new rows")
+    incremental.save_state(csv_path, state)
+    if not os.path.exists(csv_path):
+        raise SystemExit("❌ No disk data found")
+    return pd.read_csv(csv_path)
+
+
 def discover_disk_logs(root):
     logs = {}
-    for system in ("containers", "vms"):
-        d = os.path.join(root, system, "disk")
-        if not os.path.isdir(d):
-            print(f"[WARN] Directory not found: {d}")
-            continue
-        for fname in os.listdir(d):
-            if not fname.endswith(".log"):
-                continue
-            base = os.path.splitext(fname)[0]
-            role = base.split("_")[0]
-            env = "container" if system == "containers" else "vm"
-            logs[f"{role} ({env})"] = os.path.join(d, fname)
+    for system, fname, path in ingest.find_logs(root, ("containers", "vms"), "disk"):
+        base = os.path.splitext(fname)[0]
+        role = base.split("_")[0]
+        env = "container" if system == "containers" else "vm"
+        logs[f"{role} ({env})"] = path
     return logs
 
 
-def parse_iozone(lines, metrics):
-    sections = {"local": [], "shared": []}
-    current = None
-    for ln in lines:
-        line = ln.strip()
-        if re.search(r"starting benchmark for:\s*local", line, re.IGNORECASE):
-            current = "local"
+# Section markers and numeric table rows of an iozone -a log
+SECTION_RE = re.compile(
+    r"(starting benchmark for:[ \t]*local)|(--- iozone shared filesystem test ---)",
+    re.IGNORECASE,
+)
+TABLE_ROW_RE = re.compile(r"^[ \t]*\d[^\n]*", re.MULTILINE)
+MIN_KB = 64  # rows with kB <= MIN_KB are skipped
+
+
+def read_iozone_block(rows, metrics):
+    """
+    Numeric block of an auto-mode table (list of row strings) as typed
+    columns, read by the pandas C parser in one call.
+    """
+    ncols = 2 + len(metrics)
+    block = pd.read_csv(
+        io.StringIO("\n".join(rows)),
+        sep=r"\s+",
+        header=None,
+        names=range(ncols),
+        usecols=range(ncols),
+        on_bad_lines="skip",
+        engine="c",
+    ).apply(pd.to_numeric, errors="coerce")
+    # Rows with too few or non-numeric fields are dropped, like before
+    kb = block[0].to_numpy(dtype=np.float64)
+    reclen = block[1].to_numpy(dtype=np.float64)
+    valid = (
+        block.notna().all(axis=1).to_numpy()
+        & (kb == np.floor(kb))
+        & (reclen == np.floor(reclen))
+        & (kb > MIN_KB)
+    )
+    df = pd.DataFrame(
+        {"kB": kb[valid].astype(np.int64), "reclen": reclen[valid].astype(np.int64)}
+    )
+    for i, m in enumerate(metrics):
+        df[m] = block[2 + i].to_numpy(dtype=np.float64)[valid]
+    return df
+
+
+def parse_iozone(lines, metrics, section=None):
+    """
+    Split an iozone log into its local and shared auto-mode tables.
+
+    Section markers are located with one regex over the whole text; the
+    numeric rows of each section are then handed as a block to
+    read_iozone_block instead of being split and converted row by row.
+    """
+    text = lines if isinstance(lines, str) else "".join(lines)
+    segments = {"local": [], "shared": []}
+    marks = list(SECTION_RE.finditer(text))
+    # Rows before the first marker belong to section (a log tail that
+    # starts in the middle of a table)
+    if section in segments:
+        stop = marks[0].start() if marks else len(text)
+        segments[section].extend(TABLE_ROW_RE.findall(text, 0, stop))
+    for i, m in enumerate(marks):
+        current = "local" if m.group(1) else "shared"
+        stop = marks[i + 1].start() if i + 1 < len(marks) else len(text)
+        # Skip the rest of the marker line itself
+        start = text.find("\n", m.end())
+        if start == -1 or start >= stop:
             continue
-        if re.search(r"--- iozone shared filesystem test ---", line, re.IGNORECASE):
-            current = "shared"
+        segments[current].extend(TABLE_ROW_RE.findall(text, start, stop))
+
+    out = []
+    for section, rows in segments.items():
+        if not rows:
+            out.append(pd.DataFrame())
             continue
-        if current and re.match(r"^\d", line):
-            parts = line.split()
-            if len(parts) >= 15:
-                try:
-                    kb = int(parts[0])
-                    if kb <= 64:
-                        continue  # skip small sizes
-                    reclen = int(parts[1])
-                    values = list(map(float, parts[2 : 2 + len(metrics)]))
-                    entry = {"section": current, "kB": kb, "reclen": reclen}
-                    entry.update({metrics[i]: values[i] for i in range(len(metrics))})
-                    sections[current].append(entry)
-                except ValueError:
-                    pass
-    return pd.DataFrame(sections["local"]), pd.DataFrame(sections["shared"])
+        df = read_iozone_block(rows, metrics)
+        df.insert(0, "section", section)
+        out.append(df if not df.empty else pd.DataFrame())
+    return out[0], out[1]
 
 
-if __name__ == "__main__":
-    root = os.path.dirname(__file__)
-    results_root = os.path.join(root, "../results")
-    out_dir = os.path.join(root, "plots/disk")
-    os.makedirs(out_dir, exist_ok=True)
+def last_section(text, default=None):
+    """Section ("local"/"shared") in effect at the end of text"""
+    current = default
+    for m in SECTION_RE.finditer(text):
+        current = "local" if m.group(1) else "shared"
+    return current
 
-    metrics = [
-        "Write (kB/s)",
-        "Rewrite (kB/s)",
-        "Read (kB/s)",
-        "Reread (kB/s)",
-        "Random Read (kB/s)",
-        "Random Write (kB/s)",
-        "Bkwd Read (kB/s)",
-        "Record Rewrite (kB/s)",
-        "Stride Read (kB/s)",
-        "Fwrite (kB/s)",
-        "Frewrite (kB/s)",
-        "Fread (kB/s)",
-        "Freread (kB/s)",
-    ]
 
-    # --- Load & parse all logs ---
-    records = []
-    logs = discover_disk_logs(results_root)
-    if not logs:
-        raise SystemExit("❌ No disk logs found")
+def read_records(path, metrics=METRICS):
+    """The iozone tables of a records file, one frame per record"""
+    frames = []
+    for rec in records.read(path):
+        if rec["tool"] != "iozone" or not rec["rows"]:
+            continue
+        df = pd.DataFrame(rec["rows"], columns=rec["columns"])
+        df = df.astype({"kB": np.int64, "reclen": np.int64})
+        df.insert(0, "section", rec["section"])
+        frames.append(df[["section", "kB", "reclen"] + list(metrics)])
+    return frames
+
+
+def load_disk_log(path, metrics=METRICS):
+    """
+    Both iozone sections of one log (or records file) as a single frame,
+    the cached unit
+    """
+    if records.is_records(path):
+        frames = read_records(path, metrics)
+    else:
+        with cache.open_source(path) as fh:
+            df_local, df_shared = parse_iozone(fh.read(), metrics)
+        frames = [df for df in (df_local, df_shared) if not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+ENVS = ("vm", "container")
+SECTIONS = ("local", "shared")
+PANELS = [(e, s) for e in ENVS for s in SECTIONS]
+
+
+def surface_grids(grp):
+    """
+    Z matrices (reclen x kB) of all four environment/section panels at once.
+
+    Row/column indices come from np.searchsorted on the sorted unique kB and
+    reclen values and the panel index from categorical codes, so the whole
+    group is scattered into one (panel, reclen, kB) array in a single step.
+    """
+    kb_vals = np.sort(grp["kB"].unique())
+    rl_vals = np.sort(grp["reclen"].unique())
+    env_ix = pd.Categorical(grp["environment"], categories=ENVS).codes
+    sec_ix = pd.Categorical(grp["section"], categories=SECTIONS).codes
+    keep = (env_ix >= 0) & (sec_ix >= 0)
+    panel = env_ix * len(SECTIONS) + sec_ix
+    cube = np.full((len(PANELS), len(rl_vals), len(kb_vals)), np.nan)
+    cube[
+        panel[keep],
+        np.searchsorted(rl_vals, grp["reclen"].to_numpy()[keep]),
+        np.searchsorted(kb_vals, grp["kB"].to_numpy()[keep]),
+    ] = grp["value"].to_numpy()[keep]
+    return list(kb_vals), list(rl_vals), dict(zip(PANELS, cube))
+
+
+def plot_surface_4way(role, metric, grp, out_dir):
+    """Render the VM/container x local/shared 3D surfaces of one metric"""
+    # Prepare mesh
+    kb_vals, rl_vals, Z = surface_grids(grp)
+    x = np.arange(len(kb_vals))
+    y = np.arange(len(rl_vals))
+
+    zmin = min(np.nanmin(m) for m in Z.values())
+    zmax = max(np.nanmax(m) for m in Z.values())
+
+    fig = plt.figure(figsize=(20, 18))
+    fig.suptitle(
+        f"Role: {role}   Metric: {metric}", fontsize=18, y=0.95, weight="semibold"
+    )
+    elev, azim = 25, -60
+    pos_map = {
+        ("vm", "local"): 1,
+        ("vm", "shared"): 2,
+        ("container", "local"): 3,
+        ("container", "shared"): 4,
+    }
+
+    for (env, sec), idx in pos_map.items():
+        ax = fig.add_subplot(2, 2, idx, projection="3d")
+        surf = ax.plot_surface(
+            *np.meshgrid(x, y),
+            Z[(env, sec)],
+            cmap="viridis",
+            edgecolor="none",
+            alpha=0.8,
+        )
+        ax.set_title(f"{env.upper()} - {sec.capitalize()}", fontsize=14, pad=12)
+        step_x = max(1, len(kb_vals) // 6)
+        ax.set_xticks(x[::step_x])
+        ax.set_xticklabels(kb_vals[::step_x], rotation=35, ha="right", fontsize=10)
+        step_y = max(1, len(rl_vals) // 6)
+        ax.set_yticks(y[::step_y])
+        ax.set_yticklabels(rl_vals[::step_y], ha="center", va="center", fontsize=10)
+        ax.set_xlabel("File Size (kB)", labelpad=10, fontsize=12)
+        ax.set_ylabel("Record Size (bytes)", labelpad=10, fontsize=12)
+        ax.set_zlabel(metric, labelpad=10, fontsize=12)
+        ax.set_zlim(zmin, zmax)
+        ax.view_init(elev=elev, azim=azim)
+        ax.grid(True, linestyle=":", alpha=0.5)
+
+    plt.subplots_adjust(
+        left=0.08, right=0.88, top=0.88, bottom=0.08, wspace=0.25, hspace=0.25
+    )
+    cbar = fig.colorbar(
+        surf, ax=fig.get_axes(), shrink=0.6, aspect=25, pad=0.05, location="right"
+    )
+    cbar.ax.tick_params(labelsize=10)
+    cbar.ax.set_ylabel(metric, fontsize=12, rotation=-90, va="bottom")
 
-    for label, path in logs.items():
-        role, env = label.split()
-        env = env.strip("()").lower()
-        lines = open(path).readlines()
-        df_local, df_shared = parse_iozone(lines, metrics)
-        for df in (df_local, df_shared):
-            if df.empty:
-                continue
-            df["role"] = role
-            df["environment"] = env
-            records.append(df)
-
-    full_df = pd.concat(records, ignore_index=True)
+    fname_3d = sanitize_filename(f"{role}_{metric}_4way") + ".png"
+    save_path_3d = os.path.join(out_dir, fname_3d)
+    fig.savefig(save_path_3d, dpi=300, bbox_inches="tight", pad_inches=0.2)
+    plt.close(fig)
+    return save_path_3d
 
-    # 🚫 Exclude 'node local' everywhere
-    full_df = full_df[~((full_df["role"] == "node") & (full_df["section"] == "local"))]
 
-    # Melt for long form
-    long_df = full_df.melt(
-        id_vars=["environment", "role", "section", "kB", "reclen"],
-        value_vars=metrics,
-        var_name="metric",
-        value_name="value",
-    )
+def _init_render_worker():
+    matplotlib.use("Agg")
 
-    # Determine the single, largest file size
-    max_kb = long_df["kB"].max()
-    long_df_big = long_df[long_df["kB"] == max_kb]
 
-    # Save summary CSV
-    csv_path = os.path.join(out_dir, "disk_summary.csv")
-    long_df.to_csv(csv_path, index=False)
-    print(f"📄 Saved summary CSV: {csv_path}")
+def _timed_render(job):
+    t0 = time.perf_counter()
+    path = plot_surface_4way(*job)
+    return path, time.perf_counter() - t0
 
-    # --- 3D Plots (unchanged, still using full data) ---
+
+def surface_jobs(long_df, out_dir):
+    """(role, metric, group, out_dir) for every group with all four panels"""
+    jobs = []
     for (role, metric), grp in long_df.groupby(["role", "metric"]):
         envs = set(grp["environment"])
         secs = set(grp["section"])
@@ -137,77 +360,105 @@ if __name__ == "__main__":
             {"local", "shared"}
         ):
             continue
+        jobs.append((role, metric, grp, out_dir))
+    return jobs
+
+
+def render_surfaces(long_df, out_dir, workers=None):
+    """
+    Render every 3D surface figure, in parallel across processes.
+
+    Jobs are submitted in (role, metric) order and results are reported in
+    that same order whatever the completion order, so the log and the files
+    written are deterministic. workers=1 renders in-process.
+    """
+    jobs = surface_jobs(long_df, out_dir)
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    t0 = time.perf_counter()
+    if workers == 1:
+        timings = [_timed_render(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_render_worker
+        ) as pool:
+            timings = list(pool.map(_timed_render, jobs))
+    wall = time.perf_counter() - t0
+
+    for path, elapsed in timings:
+        print(f"📈 Saved: {path} ({elapsed:.2f}s)")
+    total = sum(elapsed for _, elapsed in timings)
+    print(
+        f"⏱️ Rendered {len(timings)} surface figures with {workers} worker(s): "
+        f"{wall:.2f}s wall, {total:.2f}s render time"
+    )
+    return timings
 
-        # Prepare mesh
-        kb_vals = sorted(grp["kB"].unique())
-        rl_vals = sorted(grp["reclen"].unique())
-        x = np.arange(len(kb_vals))
-        y = np.arange(len(rl_vals))
-        kb_ix = {k: i for i, k in enumerate(kb_vals)}
-        rl_ix = {r: i for i, r in enumerate(rl_vals)}
-
-        Z = {
-            (e, s): np.full((len(rl_vals), len(kb_vals)), np.nan)
-            for e in ("vm", "container")
-            for s in ("local", "shared")
-        }
-        for _, r in grp.iterrows():
-            Z[(r["environment"], r["section"])][rl_ix[r["reclen"]], kb_ix[r["kB"]]] = r[
-                "value"
-            ]
 
-        zmin = min(np.nanmin(m) for m in Z.values())
-        zmax = max(np.nanmax(m) for m in Z.values())
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="IOzone disk benchmark plots")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="processes used to render the 3D surfaces (default: all CPUs)",
+    )
+    args = warehouse.add_warehouse_arg(
+        incremental.add_incremental_arg(ingest.add_ingest_args(ap))
+    ).parse_args()
 
-        fig = plt.figure(figsize=(20, 18))
-        fig.suptitle(
-            f"Role: {role}   Metric: {metric}", fontsize=18, y=0.95, weight="semibold"
-        )
-        elev, azim = 25, -60
-        pos_map = {
-            ("vm", "local"): 1,
-            ("vm", "shared"): 2,
-            ("container", "local"): 3,
-            ("container", "shared"): 4,
-        }
+    root = os.path.dirname(__file__)
+    results_root = os.path.join(root, "../results")
+    out_dir = os.path.join(root, "plots/disk")
+    os.makedirs(out_dir, exist_ok=True)
 
-        for (env, sec), idx in pos_map.items():
-            ax = fig.add_subplot(2, 2, idx, projection="3d")
-            surf = ax.plot_surface(
-                *np.meshgrid(x, y),
-                Z[(env, sec)],
-                cmap="viridis",
-                edgecolor="none",
-                alpha=0.8,
-            )
-            ax.set_title(f"{env.upper()} - {sec.capitalize()}", fontsize=14, pad=12)
-            step_x = max(1, len(kb_vals) // 6)
-            ax.set_xticks(x[::step_x])
-            ax.set_xticklabels(kb_vals[::step_x], rotation=35, ha="right", fontsize=10)
-            step_y = max(1, len(rl_vals) // 6)
-            ax.set_yticks(y[::step_y])
-            ax.set_yticklabels(rl_vals[::step_y], ha="center", va="center", fontsize=10)
-            ax.set_xlabel("File Size (kB)", labelpad=10, fontsize=12)
-            ax.set_ylabel("Record Size (bytes)", labelpad=10, fontsize=12)
-            ax.set_zlabel(metric, labelpad=10, fontsize=12)
-            ax.set_zlim(zmin, zmax)
-            ax.view_init(elev=elev, azim=azim)
-            ax.grid(True, linestyle=":", alpha=0.5)
-
-        plt.subplots_adjust(
-            left=0.08, right=0.88, top=0.88, bottom=0.08, wspace=0.25, hspace=0.25
-        )
-        cbar = fig.colorbar(
-            surf, ax=fig.get_axes(), shrink=0.6, aspect=25, pad=0.05, location="right"
+    metrics = METRICS
+
+    # --- Load & parse all logs ---
+    logs = discover_disk_logs(results_root)
+    if not logs:
+        raise SystemExit("❌ No disk logs found")
+
+    csv_path = os.path.join(out_dir, "disk_summary.csv")
+    if args.incremental:
+        long_df = update_disk_summary(csv_path, logs, metrics)
+        print(f"📄 Updated summary CSV: {csv_path}")
+    else:
+        full_df = ingest.ingest(
+            (
+                (label, records.prefer(path), load_disk_log, "disk", PARSER_VERSION)
+                for label, path in logs.items()
+            ),
+            jobs=args.jobs,
+            processes=args.processes,
         )
-        cbar.ax.tick_params(labelsize=10)
-        cbar.ax.set_ylabel(metric, fontsize=12, rotation=-90, va="bottom")
-
-        fname_3d = sanitize_filename(f"{role}_{metric}_4way") + ".png"
-        save_path_3d = os.path.join(out_dir, fname_3d)
-        fig.savefig(save_path_3d, dpi=300, bbox_inches="tight", pad_inches=0.2)
-        plt.close(fig)
-        print(f"📈 Saved: {save_path_3d}")
+        # Labels look like "master (vm)"
+        label_parts = full_df.pop("label").str.split(n=1, expand=True)
+        full_df["role"] = label_parts[0]
+        full_df["environment"] = label_parts[1].str.strip("()").str.lower()
+
+        long_df = long_form(full_df, metrics)
+
+        # Save summary CSV
+        long_df.to_csv(csv_path, index=False)
+        incremental.clear_state(csv_path)
+        print(f"📄 Saved summary CSV: {csv_path}")
+
+    store.save_family(
+        store_rows(long_df),
+        "disk",
+        warehouse_path=args.warehouse,
+        sources=logs.values(),
+    )
+
+    # Determine the single, largest file size
+    max_kb = long_df["kB"].max()
+    long_df_big = long_df[long_df["kB"] == max_kb]
+
+    # --- 3D Plots (unchanged, still using full data) ---
+    render_surfaces(long_df, out_dir, workers=args.workers)
 
     # --- Bar: Local vs Shared (largest kB only) ---
     summary_ls = long_df_big.groupby(["metric", "section"])["value"].mean().unstack()
@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
+import argparse
+import functools
+import hashlib
 import os
 import re
 
 import matplotlib.pyplot as plt
 import numpy as _np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+import cache
+import incremental
+import ingest
+import stats
+import store
+import warehouse
+
+# Bump when the parser output changes to invalidate cached results
+PARSER_VERSION = 2
 
 # Nord palette
 NORD_FG = "#2E3440"
@@ -12,9 +26,8 @@ NORD_GREEN = "#A3BE8C"
 NORD_RED = "#BF616A"
 NORD_GRAY = "#808080"
 
-# Output directory
+# Output directory, created by main()
 OUT_DIR = "plots/hpcc"
-os.makedirs(OUT_DIR, exist_ok=True)
 
 HPCC_FILES = {
     "vms": "../results/vms/hpccoutf.txt",
@@ -35,6 +48,9 @@ IMPORTANT_METRICS = [
     "PTRANS_GBs",
 ]
 
+# Metrics where a smaller value wins
+LOWER_IS_BETTER = {"AvgPingPongLatency_usec", "PTRANS_time", "HPL_Time"}
+
 CONFIG_METRICS = [
     "HPL_N",
     "HPL_NB",
@@ -47,65 +63,206 @@ CONFIG_METRICS = [
 ]
 
 
+# Precompiled patterns for the streaming parser
+TIMESTAMP_RE = re.compile(r"Current time \(\d+\) is (.+)")
+WR_RE = re.compile(
+    r"^WR\S+\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+([\d.]+)\s+([\d.e+-]+)$"
+)
+RESIDUAL_PREFIX = "||Ax-b||"
+
+# Section markers written by hpcc
+HPL_BEGIN = "Begin of HPL section."
+HPL_END = "End of HPL section."
+SUMMARY_BEGIN = "Begin of Summary section."
+SUMMARY_END = "End of Summary section."
+
+TRIAL_COLUMNS = [
+    "RunID",
+    "System",
+    "HPL_N",
+    "HPL_NB",
+    "HPL_P",
+    "HPL_Q",
+    "HPL_Time",
+    "HPL_Gflops",
+    "HPL_Status",
+]
+
+
+class HplTrial:
+    """One WR line of an HPL section and its residual check"""
+
+    __slots__ = ("run_id", "n", "nb", "p", "q", "time", "gflops", "status")
+
+    def __init__(self, n, nb, p, q, time, gflops):
+        self.run_id = None  # set once the run's summary has been read
+        self.n = n
+        self.nb = nb
+        self.p = p
+        self.q = q
+        self.time = time
+        self.gflops = gflops
+        self.status = "UNCHECKED"  # PASSED / FAILED once the residual is seen
+
+    def row(self, system_name):
+        return (
+            self.run_id,
+            system_name,
+            self.n,
+            self.nb,
+            self.p,
+            self.q,
+            self.time,
+            self.gflops,
+            self.status,
+        )
+
+
+def run_id(system_name, summary_lines):
+    """Stable ID of a run, the same whether parsed in full or from a tail"""
+    digest = hashlib.sha1("\n".join(summary_lines).encode()).hexdigest()[:12]
+    return f"{system_name}-{digest}"
+
+
 def extract_timestamp(lines):
     for line in lines:
         if "Current time" in line:
-            m = re.search(r"Current time \(\d+\) is (.+)", line)
+            m = TIMESTAMP_RE.search(line)
             if m:
                 return m.group(1).strip()
     return "Unknown"
 
 
-def parse_hpcc_output(file_path, system_name):
-    text = open(file_path).read()
-    entries = []
-    parts = re.split(r"Begin of Summary section\.", text)
-    secs = parts[1:]
-
-    for i, sec in enumerate(secs):
-        part, _ = sec.split("End of Summary section.", 1)
-        metrics = {}
-        for l in part.splitlines():
-            if "=" in l:
-                k, v = l.split("=", 1)
-                k, v = k.strip(), v.strip()
-                try:
-                    metrics[k] = float(v)
-                except ValueError:
-                    metrics[k] = v
-        metrics["Timestamp"] = extract_timestamp(part.splitlines())
-        metrics["System"] = system_name
-
-        preceding_text = parts[i]
-        hpl_start = preceding_text.find("Begin of HPL section.")
-        hpl_end = preceding_text.find("End of HPL section.")
-        if hpl_start != -1 and hpl_end != -1:
-            hpl_section = preceding_text[hpl_start:hpl_end]
-            for line in hpl_section.splitlines():
-                line = line.strip()
-                match = re.match(
-                    r"^WR\S+\s+(\d+)\s+(\d+)\s+\d+\s+\d+\s+[\d.]+\s+([\d.e+-]+)$", line
-                )
-                if match:
-                    n = int(match.group(1))
-                    nb = int(match.group(2))
-                    gflops = float(match.group(3))
-                    hpl_metrics = metrics.copy()
-                    hpl_metrics.update(
-                        {
-                            "HPL_N": n,
-                            "HPL_NB": nb,
-                            "HPL_Gflops": gflops,
-                            "HPL_Tflops": gflops / 1000,
-                        }
+def iter_hpcc_records(file_path, system_name):
+    """Stream records out of an hpccoutf.txt one line at a time."""
+    with cache.open_source(file_path) as fh:
+        yield from iter_hpcc_lines(fh, system_name)
+
+
+def iter_hpcc_lines(lines, system_name):
+    """
+    Records of an iterable of hpccoutf.txt lines (a file or a tail chunk).
+
+    Small state machine: HPL section -> WR rows -> Summary section. Only the
+    trials of the pending HPL section and the current summary are held in
+    memory, so files with many appended runs are parsed in constant space.
+    For every run ("trial", HplTrial) records are yielded first, then
+    ("summary", metrics); both carry the same RunID.
+    """
+    state = None  # None, "hpl" or "summary"
+    trials = []
+    summary_lines = []
+    for raw in lines:
+        # Cheap prefix tests first: most lines of a run are noise
+        if state is None:
+            if not raw.startswith("Begin of "):
+                continue
+            if raw.startswith(HPL_BEGIN):
+                state = "hpl"
+                trials = []
+            elif raw.startswith(SUMMARY_BEGIN):
+                state = "summary"
+                summary_lines = []
+            continue
+        if state == "hpl":
+            if raw.startswith("WR"):
+                m = WR_RE.match(raw.strip())
+                if m:
+                    n, nb, p, q = (int(m.group(i)) for i in range(1, 5))
+                    trials.append(
+                        HplTrial(n, nb, p, q, float(m.group(5)), float(m.group(6)))
                     )
-                    entries.append(hpl_metrics)
-        entries.append(metrics)
-    return entries
+            elif raw.startswith(RESIDUAL_PREFIX):
+                # The residual check(s) follow the WR line they belong to;
+                # older HPL prints three and any failure fails the trial
+                if trials and "FAILED" in raw:
+                    trials[-1].status = "FAILED"
+                elif trials and "PASSED" in raw and trials[-1].status != "FAILED":
+                    trials[-1].status = "PASSED"
+            elif raw.startswith(HPL_END):
+                state = None
+            continue
+        line = raw.strip()
+        if line.startswith(SUMMARY_END):
+            metrics = {}
+            for l in summary_lines:
+                if "=" in l:
+                    k, v = l.split("=", 1)
+                    k, v = k.strip(), v.strip()
+                    try:
+                        metrics[k] = float(v)
+                    except ValueError:
+                        metrics[k] = v
+            rid = run_id(system_name, summary_lines)
+            metrics["RunID"] = rid
+            metrics["Timestamp"] = extract_timestamp(summary_lines)
+            metrics["System"] = system_name
+            for trial in trials:
+                trial.run_id = rid
+                yield "trial", trial
+            yield "summary", metrics
+            state = None
+            trials = []
+            summary_lines = []
+        else:
+            summary_lines.append(line)
+
+
+def records_to_frames(records, system_name):
+    """{"summary": one row per run, "trials": one row per WR line}"""
+    summaries = []
+    trials = []
+    for kind, rec in records:
+        if kind == "trial":
+            trials.append(rec.row(system_name))
+        else:
+            summaries.append(rec)
+    trial_df = pd.DataFrame(trials, columns=TRIAL_COLUMNS)
+    trial_df["HPL_Status"] = trial_df["HPL_Status"].astype("category")
+    return {"summary": pd.DataFrame(summaries), "trials": trial_df}
+
+
+def parse_hpcc_output(file_path, system_name):
+    return records_to_frames(iter_hpcc_records(file_path, system_name), system_name)
+
+
+def passed_trials(trials):
+    """Trials whose residual check did not fail"""
+    if trials.empty:
+        return trials
+    return trials[trials["HPL_Status"] != "FAILED"]
+
+
+def run_values(df, metric):
+    """Per-run values of metric for every System, from the summary rows"""
+    return {
+        s: grp[metric].dropna().to_numpy(dtype=float)
+        for s, grp in df.groupby("System", sort=False)
+    }
+
+
+def compare_systems(df, metric, lower_is_better=False):
+    """
+    Mean over runs, bootstrap CI of the mean and significant winner/loser of
+    metric across systems (see stats.rank)
+    """
+    rng = _np.random.default_rng(0)
+    values = run_values(df, metric)
+    means = {s: (v.mean() if v.size else _np.nan) for s, v in values.items()}
+    draws = {s: stats.bootstrap_means(v, rng=rng) for s, v in values.items()}
+    winner, loser, win, _ = stats.rank(draws, means, lower_is_better)
+    return {
+        "means": means,
+        "cis": {s: stats.confidence_interval(d) for s, d in draws.items()},
+        "winner": winner,
+        "loser": loser,
+        "test": win,
+    }
 
 
 def generate_metric_plots(df, metric_groups, out_dir, dpi=200):
-    lower_is_better = ["AvgPingPongLatency_usec", "PTRANS_time"]
+    lower_is_better = LOWER_IS_BETTER
+    comparisons = []
     for group, metrics in metric_groups.items():
         available = [m for m in metrics if m in df]
         if not available:
@@ -121,16 +278,29 @@ def generate_metric_plots(df, metric_groups, out_dir, dpi=200):
             # Ensure grid is drawn behind bars
             ax.set_axisbelow(True)
             ax.grid(axis="y", linestyle="--", alpha=0.5, zorder=0)
-            # Gather values
-            vals = [df[df.System == s][metric].iloc[-1] for s in systems]
-            if metric in lower_is_better:
-                wi, li = _np.argmin(vals), _np.argmax(vals)
-            else:
-                wi, li = _np.argmax(vals), _np.argmin(vals)
-            colors = [NORD_GRAY] * len(systems)
-            colors[wi], colors[li] = NORD_GREEN, NORD_RED
+            # Mean over runs; only significant differences are coloured
+            cmp = compare_systems(df, metric, metric in lower_is_better)
+            vals = [cmp["means"].get(s, _np.nan) for s in systems]
+            colors = [
+                (
+                    NORD_GREEN
+                    if s == cmp["winner"]
+                    else NORD_RED if s == cmp["loser"] else NORD_GRAY
+                )
+                for s in systems
+            ]
+            cis = [cmp["cis"].get(s, (_np.nan, _np.nan)) for s in systems]
+            yerr = _np.nan_to_num(
+                [
+                    [v - lo for v, (lo, _) in zip(vals, cis)],
+                    [hi - v for v, (_, hi) in zip(vals, cis)],
+                ]
+            )
+            comparisons.append(
+                {"metric": metric, "winner": cmp["winner"], **cmp["test"]}
+            )
             # Plot bars above grid
-            bars = ax.bar(systems, vals, color=colors, zorder=3)
+            bars = ax.bar(systems, vals, yerr=yerr, capsize=4, color=colors, zorder=3)
             for bar, v in zip(bars, vals):
                 ax.text(
                     bar.get_x() + bar.get_width() / 2,
@@ -146,6 +316,8 @@ def generate_metric_plots(df, metric_groups, out_dir, dpi=200):
             better = (
                 "Lower is better" if metric in lower_is_better else "Higher is better"
             )
+            if _np.isfinite(cmp["test"]["p_value"]):
+                better += f" (p = {cmp['test']['p_value']:.3f})"
             ax.annotate(
                 better,
                 xy=(0.5, 0.97),
@@ -166,13 +338,19 @@ def generate_metric_plots(df, metric_groups, out_dir, dpi=200):
         plt.close(fig)
         print(f"📊 Saved: {path}")
 
+    if comparisons:
+        csv = os.path.join(out_dir, "metric_comparisons.csv")
+        pd.DataFrame(comparisons).to_csv(csv, index=False)
+        print(f"📄 Saved: {csv}")
+
 
-def generate_hpl_scaling_plot(df, out_dir, dpi=200):
+def generate_hpl_scaling_plot(trials, out_dir, dpi=200):
     """
     Plot HPL_Gflops vs HPL_N for each System using Nord colors,
     and save the processed CSV data used for plotting.
+    Trials that failed the residual check are left out.
     """
-    hpl_df = df.dropna(subset=["HPL_Gflops"])
+    hpl_df = passed_trials(trials)
     if hpl_df.empty:
         print("⚠️ No HPL test data")
         return
@@ -216,40 +394,44 @@ def generate_hpl_scaling_plot(df, out_dir, dpi=200):
     print(f"📈 Saved HPL scaling plot: {path}")
 
 
-def generate_value_matrix_plot(df, metrics, out_dir, dpi=200):
+def generate_value_matrix_plot(df, trials, metrics, out_dir, dpi=200):
     # Filter to only include metrics from largest problem size runs
+    df = get_matrix_dataframe(df, trials)
     mets = [m for m in metrics if m in df]
     if not mets:
         print("⚠️ No important metrics")
         return
 
-    mat = df.set_index("System")[mets].T
+    lower_better = LOWER_IS_BETTER
+    systems = list(df["System"].unique())
+    cmps = {m: compare_systems(df, m, m in lower_better) for m in mets}
+    mat = pd.DataFrame(
+        {s: [cmps[m]["means"].get(s, _np.nan) for m in mets] for s in systems},
+        index=mets,
+    )
+    p_values = [cmps[m]["test"]["p_value"] for m in mets]
 
-    lower_better = {"AvgPingPongLatency_usec"}
     colors = []
     for m in mat.index:
-        row = mat.loc[m]
-        w, l = (
-            (row.idxmin(), row.idxmax())
-            if m in lower_better
-            else (row.idxmax(), row.idxmin())
-        )
+        # Only a significant winner is coloured
+        w = cmps[m]["winner"]
         # Direct color assignment based on system name
         colors.append(
             [
                 (NORD_GREEN if c == "containers" else NORD_RED) if c == w else NORD_GRAY
                 for c in mat.columns
             ]
+            + ["white"]
         )
 
     fig, ax = plt.subplots(
-        figsize=(1.5 * len(mat.columns) + 2, 0.5 * len(mat.index) + 2)
+        figsize=(1.5 * len(mat.columns) + 3.5, 0.5 * len(mat.index) + 2)
     )
     ax.axis("off")
 
     # Create table with styled text
     cell_text = []
-    for idx, row in mat.iterrows():
+    for (idx, row), p in zip(mat.iterrows(), p_values):
         formatted_row = []
         for val in row:
             if "Tflops" in idx:
@@ -258,12 +440,13 @@ def generate_value_matrix_plot(df, metrics, out_dir, dpi=200):
                 formatted_row.append(f"{val:.1f}")
             else:
                 formatted_row.append(f"{val:.2f}")
+        formatted_row.append(f"{p:.3f}" if _np.isfinite(p) else "n/a")
         cell_text.append(formatted_row)
 
     table = ax.table(
         cellText=cell_text,
         rowLabels=mat.index.str.replace("_", " "),
-        colLabels=mat.columns,
+        colLabels=list(mat.columns) + ["p-value"],
         cellColours=colors,
         loc="center",
         cellLoc="center",
@@ -287,31 +470,16 @@ def generate_value_matrix_plot(df, metrics, out_dir, dpi=200):
     print(f"📊 Saved: {path}")
 
 
-def get_matrix_dataframe(df):
+def get_matrix_dataframe(df, trials):
     """Filter dataframe to include only runs with largest HPL_N per system"""
-    hpl_test_entries = df[df["HPL_N"].notna()]
-    if hpl_test_entries.empty:
+    hpl = passed_trials(trials)
+    if hpl.empty:
         return df
 
-    # Find max HPL_N per run
-    hpl_max_per_run = (
-        hpl_test_entries.groupby(["System", "Timestamp"])["HPL_N"].max().reset_index()
-    )
-
-    # Find max HPL_N per system
-    max_hpl_per_system = hpl_max_per_run.groupby("System")["HPL_N"].max().reset_index()
-
-    # Get corresponding timestamps
-    max_hpl_runs = max_hpl_per_system.merge(
-        hpl_max_per_run, on=["System", "HPL_N"], how="left"
-    )
-
-    # Get summary entries for these runs
-    matrix_df = df[df["HPL_N"].isna()].merge(
-        max_hpl_runs[["System", "Timestamp"]], on=["System", "Timestamp"], how="inner"
-    )
-
-    return matrix_df
+    # Largest HPL_N of every run, then the runs reaching each system's max
+    run_n = hpl.groupby("RunID")["HPL_N"].max()
+    n = df["RunID"].map(run_n)
+    return df[n == n.groupby(df["System"]).transform("max")]
 
 
 def save_configuration_info(df, configs, out_dir):
@@ -324,19 +492,167 @@ def save_configuration_info(df, configs, out_dir):
     print(f"📄 Saved: {csv}")
 
 
-def main():
-    rows = []
+def metric_unit(metric):
+    """Unit of an HPCC summary or trial metric, from its name"""
+    if metric.endswith("Gflops"):
+        return "Gflop/s"
+    if metric.endswith("Tflops"):
+        return "Tflop/s"
+    if metric.endswith("GUPs"):
+        return "GUP/s"
+    if metric.endswith(("_GBs", "_GBytes")) or "STREAM_" in metric:
+        return "GB/s"
+    if metric.endswith("_usec"):
+        return "us"
+    if metric.endswith(("_time", "_Time")):
+        return "s"
+    return ""
+
+
+def store_rows(df, trials):
+    """Run summaries and passed HPL trials in the shared metric store schema"""
+    metrics = [
+        c
+        for c in df.columns
+        if c not in ("RunID", "System", "Timestamp") and is_numeric_dtype(df[c])
+    ]
+    summary = store.from_wide(
+        df,
+        "hpcc",
+        metrics,
+        run_id="RunID",
+        env="System",
+        role="cluster",
+        section="summary",
+        timestamp="Timestamp",
+        units={m: metric_unit(m) for m in metrics},
+        lower_is_better=LOWER_IS_BETTER,
+    )
+    hpl = passed_trials(trials)
+    if hpl.empty:
+        return summary
+    # A run read twice (e.g. a re-appended hpccoutf.txt) repeats its RunID
+    stamps = df.drop_duplicates("RunID").set_index("RunID")["Timestamp"]
+    hpl = hpl.assign(
+        Timestamp=hpl["RunID"].map(stamps),
+        Layout=(
+            "hpl N="
+            + hpl["HPL_N"].astype(str)
+            + " NB="
+            + hpl["HPL_NB"].astype(str)
+            + " PxQ="
+            + hpl["HPL_P"].astype(str)
+            + "x"
+            + hpl["HPL_Q"].astype(str)
+        ),
+    )
+    per_trial = store.from_wide(
+        hpl,
+        "hpcc",
+        ["HPL_Gflops", "HPL_Time"],
+        run_id="RunID",
+        env="System",
+        role="cluster",
+        section="Layout",
+        timestamp="Timestamp",
+        units={"HPL_Gflops": "Gflop/s", "HPL_Time": "s"},
+        lower_is_better=LOWER_IS_BETTER,
+    )
+    return store.concat([summary, per_trial])
+
+
+def load_full_results(args):
+    """(summary DataFrame, trials DataFrame) of every hpccoutf.txt"""
+    tasks = []
     for sys, path in HPCC_FILES.items():
         if not os.path.isfile(path):
             print(f"❌ Missing: {path}")
             continue
         print(f"Processing {path}")
-        rows.extend(parse_hpcc_output(path, sys))
-    if not rows:
+        tasks.append(
+            (
+                sys,
+                path,
+                functools.partial(parse_hpcc_output, system_name=sys),
+                f"hpcc-{sys}",
+                PARSER_VERSION,
+            )
+        )
+    tables = ingest.ingest(tasks, jobs=args.jobs, processes=args.processes)
+    if not tasks or tables["summary"].empty:
         raise SystemExit("❌ No logs")
-    df = pd.DataFrame(rows)
-    df.to_csv(os.path.join(OUT_DIR, "hpcc_full_results.csv"), index=False)
-    print("📄 Full results saved")
+    df = tables["summary"].drop(columns="label")
+    trials = tables["trials"]
+    trials = (
+        trials.drop(columns="label")
+        if not trials.empty
+        else pd.DataFrame(columns=TRIAL_COLUMNS)
+    )
+    return df, trials
+
+
+def update_full_results(csv_path, trials_path):
+    """
+    Append to csv_path (and trials_path) only the runs written to each
+    hpccoutf.txt since the last call. A run is complete once its summary
+    section has ended, so the offset is kept at the last
+    "End of Summary section." line.
+    """
+    state = incremental.begin(csv_path)
+    if not state and os.path.exists(trials_path):
+        os.remove(trials_path)
+    for sys, path in HPCC_FILES.items():
+        if not os.path.isfile(path):
+            print(f"❌ Missing: {path}")
+            continue
+        key = os.path.abspath(path)
+        chunk, state[key], reset = incremental.read_tail(
+            path, state.get(key), SUMMARY_END.encode()
+        )
+        if reset:
+            print(f"⚠️ {path} was truncated or rotated, reading it from the start")
+        tables = records_to_frames(
+            iter_hpcc_lines(incremental.tail_lines(chunk), sys), sys
+        )
+        incremental.append_rows(csv_path, tables["summary"])
+        incremental.append_rows(trials_path, tables["trials"])
+        print(
+            f"➕ {path}: {len(tables['summary'])} new runs, "
+            f"{len(tables['trials'])} HPL trials"
+        )
+    incremental.save_state(csv_path, state)
+    if not os.path.exists(csv_path):
+        raise SystemExit("❌ No logs")
+    trials = (
+        pd.read_csv(trials_path)
+        if os.path.exists(trials_path)
+        else pd.DataFrame(columns=TRIAL_COLUMNS)
+    )
+    return pd.read_csv(csv_path), trials
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HPCC benchmark plots")
+    ap = warehouse.add_warehouse_arg(
+        incremental.add_incremental_arg(ingest.add_ingest_args(ap))
+    )
+    args = ap.parse_args()
+    os.makedirs(OUT_DIR, exist_ok=True)
+
+    csv_path = os.path.join(OUT_DIR, "hpcc_full_results.csv")
+    trials_path = os.path.join(OUT_DIR, "hpl_trials.csv")
+    if args.incremental:
+        df, trials = update_full_results(csv_path, trials_path)
+        print("📄 Full results updated")
+    else:
+        df, trials = load_full_results(args)
+        df.to_csv(csv_path, index=False)
+        trials.to_csv(trials_path, index=False)
+        incremental.clear_state(csv_path)
+        print("📄 Full results saved")
+    failed = (trials["HPL_Status"] == "FAILED").sum()
+    if failed:
+        print(f"⚠️ {failed} HPL trial(s) failed the residual check and are ignored")
 
     metric_groups = {
         "HPL Performance": ["HPL_Tflops", "HPL_Best_Tflops"],
@@ -347,9 +663,16 @@ def main():
         "PTRANS": ["PTRANS_GBs"],
     }
 
+    store.save_family(
+        store_rows(df, trials),
+        "hpcc",
+        warehouse_path=args.warehouse,
+        sources=HPCC_FILES.values(),
+    )
+
     generate_metric_plots(df, metric_groups, OUT_DIR)
-    generate_hpl_scaling_plot(df, OUT_DIR)
-    generate_value_matrix_plot(df, IMPORTANT_METRICS, OUT_DIR)
+    generate_hpl_scaling_plot(trials, OUT_DIR)
+    generate_value_matrix_plot(df, trials, IMPORTANT_METRICS, OUT_DIR)
     save_configuration_info(df, CONFIG_METRICS, OUT_DIR)
 
     print(f"✅ Done — all outputs in {OUT_DIR}")
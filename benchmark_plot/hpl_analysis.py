@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+HPL efficiency and roofline analysis of plots/hpcc/hpcc_full_results.csv
+and hpl_trials.csv (written by hpcc.py).
+
+Efficiency is achieved Gflops over the theoretical peak, cores x GHz x
+double-precision FLOPs/cycle. Cores default to each run's CommWorldProcs
+(one MPI rank per core); frequency and FLOPs/cycle have to be given for
+the benchmarked machines, or --peak-gflops declares a system's peak
+outright. --local-peak falls back to this machine's /proc/cpuinfo, which is
+only right when the analysis runs on the cluster itself: such a peak is
+labelled "local guess" in the CSVs and plots.
+
+The roofline uses the measured per-process ceilings: StarDGEMM for compute
+and StarSTREAM_Triad for memory bandwidth. A kernel whose arithmetic
+intensity is left of a system's ridge point is bandwidth bound there.
+
+    python hpl_analysis.py --freq-ghz 2.6 --flops-per-cycle 16
+    python hpl_analysis.py --peak-gflops vms=998.4 --peak-gflops containers=998.4
+    python hpl_analysis.py --local-peak
+"""
+import argparse
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from hpcc import NORD_FG, NORD_GRAY, NORD_GREEN, NORD_RED, OUT_DIR, passed_trials
+
+NORD_BLUE = "#5E81AC"
+
+# STREAM Triad a[i] = b[i] + s*c[i]: 2 FLOPs per 24 bytes moved
+TRIAD_INTENSITY = 2 / 24
+LOCAL_GUESS = "local guess"  # Peak_Source of a peak detected on this machine
+
+
+def system_color(system):
+    return {"vms": NORD_RED, "containers": NORD_GREEN}.get(system, NORD_BLUE)
+
+
+def _cpuinfo():
+    try:
+        with open("/proc/cpuinfo") as fh:
+            return fh.read()
+    except OSError:
+        return ""
+
+
+def detect_freq_ghz():
+    """Maximum core frequency of this machine in GHz, or None"""
+    try:
+        with open("/sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq") as fh:
+            return int(fh.read()) / 1e6
+    except (OSError, ValueError):
+        pass
+    mhz = [
+        float(line.split(":", 1)[1])
+        for line in _cpuinfo().splitlines()
+        if line.startswith("cpu MHz")
+    ]
+    return max(mhz) / 1000 if mhz else None
+
+
+def detect_flops_per_cycle():
+    """
+    Double-precision FLOPs per cycle per core from the x86 vector flags,
+    assuming two FMA units: AVX-512 32, AVX2+FMA 16, AVX 8, SSE2 4.
+    """
+    flags = set()
+    for line in _cpuinfo().splitlines():
+        if line.startswith("flags"):
+            flags = set(line.split(":", 1)[1].split())
+            break
+    if "avx512f" in flags:
+        return 32
+    if "avx2" in flags and "fma" in flags:
+        return 16
+    if "avx" in flags:
+        return 8
+    if "sse2" in flags:
+        return 4
+    return None
+
+
+def hpl_efficiency(
+    trials,
+    summary,
+    freq_ghz,
+    flops_per_cycle,
+    cores=None,
+    peaks=None,
+    estimate_source="given",
+):
+    """
+    Best Gflops and efficiency per (System, HPL_N, HPL_NB, P, Q) over the
+    trials that passed their residual check.
+
+    Cores come from the run summary (CommWorldProcs, linked by RunID) or
+    P x Q. peaks maps System -> declared peak Gflops and wins over the
+    cores x GHz x FLOPs/cycle estimate; Peak_Source tells which was used,
+    estimate_source naming where freq_ghz and flops_per_cycle came from.
+    """
+    peaks = peaks or {}
+    hpl = passed_trials(trials).rename(columns={"HPL_P": "P", "HPL_Q": "Q"})
+    if hpl.empty:
+        return pd.DataFrame()
+    if cores is not None:
+        hpl = hpl.assign(Cores=float(cores))
+    else:
+        procs = (
+            summary.drop_duplicates("RunID").set_index("RunID")["CommWorldProcs"]
+            if "CommWorldProcs" in summary
+            else pd.Series(dtype=float)
+        )
+        hpl = hpl.assign(Cores=hpl["RunID"].map(procs).fillna(hpl["P"] * hpl["Q"]))
+
+    keys = ["System", "HPL_N", "HPL_NB", "P", "Q"]
+    table = (
+        hpl.groupby(keys, dropna=False, observed=True)
+        .agg(
+            Gflops=("HPL_Gflops", "max"),
+            Runs=("HPL_Gflops", "size"),
+            Cores=("Cores", "max"),
+        )
+        .reset_index()
+    )
+    estimate = table["Cores"] * (freq_ghz or np.nan) * (flops_per_cycle or np.nan)
+    declared = table["System"].map(peaks).astype(float)
+    table["Peak_Gflops"] = declared.fillna(estimate)
+    table["Peak_Source"] = np.where(
+        declared.notna(),
+        "declared",
+        np.where(estimate.notna(), estimate_source, ""),
+    )
+    table["Efficiency"] = table["Gflops"] / table["Peak_Gflops"]
+    return table.sort_values(keys).reset_index(drop=True)
+
+
+def plot_efficiency(table, out_dir, dpi=200):
+    """Efficiency (best NB) against N, one line per System and P x Q grid"""
+    data = table.dropna(subset=["Efficiency"])
+    if data.empty:
+        print(
+            "⚠️ No peak known: use --freq-ghz/--flops-per-cycle, --peak-gflops "
+            "or --local-peak"
+        )
+        return None
+    best = (
+        data.groupby(["System", "P", "Q", "HPL_N"], dropna=False)["Efficiency"]
+        .max()
+        .reset_index()
+    )
+    plt.figure(figsize=(8, 5))
+    markers = "osD^v<>"
+    for i, ((system, p, q), grp) in enumerate(
+        best.groupby(["System", "P", "Q"], dropna=False)
+    ):
+        grid = f"{p:.0f}x{q:.0f}" if np.isfinite(p) and np.isfinite(q) else "?"
+        plt.plot(
+            grp["HPL_N"],
+            grp["Efficiency"] * 100,
+            marker=markers[i % len(markers)],
+            color=system_color(system),
+            label=f"{system} {grid}",
+            linewidth=2,
+            markersize=7,
+        )
+    plt.grid(True, linestyle="--", alpha=0.7, color=NORD_GRAY)
+    title = "HPL Efficiency vs Problem Size"
+    if (data["Peak_Source"] == LOCAL_GUESS).any():
+        title += f"\n(peak: {LOCAL_GUESS} from the machine running this script)"
+    plt.title(title, color=NORD_FG, pad=20)
+    plt.xlabel("Problem Size (HPL_N)", color=NORD_FG)
+    plt.ylabel("Efficiency (% of theoretical peak)", color=NORD_FG)
+    plt.ylim(bottom=0)
+    plt.legend(title="System P×Q", title_fontsize=10)
+    plt.tick_params(axis="both", colors=NORD_GRAY)
+    for spine in plt.gca().spines.values():
+        spine.set_color(NORD_GRAY)
+    plt.tight_layout()
+    path = os.path.join(out_dir, "hpl_efficiency.png")
+    plt.savefig(path, dpi=dpi, bbox_inches="tight")
+    plt.close()
+    print(f"📈 Saved HPL efficiency plot: {path}")
+    return path
+
+
+def roofline_ceilings(df, core_peak=None, peak_source=""):
+    """
+    Per-process compute (DGEMM Gflops) and bandwidth (STREAM Triad GB/s)
+    ceilings of every System, averaged over the run summaries.
+    """
+    rows = []
+    for system, grp in df.groupby("System", sort=False):
+        gflops = bw = np.nan
+        for col in ("StarDGEMM_Gflops", "SingleDGEMM_Gflops"):
+            if col in grp and grp[col].notna().any():
+                gflops = grp[col].mean()
+                break
+        for col in ("StarSTREAM_Triad", "SingleSTREAM_Triad"):
+            if col in grp and grp[col].notna().any():
+                bw = grp[col].mean()
+                break
+        ridge = gflops / bw if bw else np.nan
+        rows.append(
+            {
+                "System": system,
+                "DGEMM_Gflops": gflops,
+                "Triad_GBs": bw,
+                "Ridge_flops_per_byte": ridge,
+                "Triad_bound_Gflops": bw * TRIAD_INTENSITY,
+                "DGEMM_fraction_of_peak": gflops / core_peak if core_peak else np.nan,
+                "Peak_Source": peak_source if core_peak else "",
+                "Triad_bound": "bandwidth" if TRIAD_INTENSITY < ridge else "compute",
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def plot_roofline(ceilings, out_dir, core_peak=None, peak_source="", dpi=200):
+    data = ceilings.dropna(subset=["DGEMM_Gflops", "Triad_GBs"])
+    if data.empty:
+        print("⚠️ No DGEMM/STREAM Triad data for the roofline")
+        return None
+    lo = min(TRIAD_INTENSITY / 4, data["Ridge_flops_per_byte"].min() / 10)
+    hi = max(16.0, data["Ridge_flops_per_byte"].max() * 10)
+    ai = np.logspace(np.log10(lo), np.log10(hi), 200)
+
+    plt.figure(figsize=(8, 5))
+    for _, row in data.iterrows():
+        color = system_color(row["System"])
+        roof = np.minimum(row["DGEMM_Gflops"], ai * row["Triad_GBs"])
+        plt.plot(ai, roof, color=color, linewidth=2, label=row["System"])
+        ridge = row["Ridge_flops_per_byte"]
+        plt.plot(ridge, row["DGEMM_Gflops"], marker="o", color=color, markersize=8)
+        plt.annotate(
+            f"ridge {ridge:.2f}",
+            xy=(ridge, row["DGEMM_Gflops"]),
+            xytext=(6, -14),
+            textcoords="offset points",
+            fontsize=8,
+            color=NORD_FG,
+        )
+        plt.plot(
+            TRIAD_INTENSITY,
+            row["Triad_bound_Gflops"],
+            marker="s",
+            color=color,
+            markersize=7,
+        )
+    if core_peak:
+        plt.axhline(
+            core_peak,
+            color=NORD_FG,
+            linestyle="--",
+            alpha=0.6,
+            label=f"theoretical peak {core_peak:.1f}"
+            + (f" ({peak_source})" if peak_source == LOCAL_GUESS else ""),
+        )
+    plt.axvline(TRIAD_INTENSITY, color=NORD_GRAY, linestyle=":", alpha=0.8)
+    plt.annotate(
+        "STREAM Triad",
+        xy=(TRIAD_INTENSITY, 0.02),
+        xycoords=("data", "axes fraction"),
+        rotation=90,
+        fontsize=8,
+        color=NORD_FG,
+        ha="right",
+    )
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.grid(True, which="both", linestyle="--", alpha=0.4, color=NORD_GRAY)
+    plt.title("Roofline: DGEMM vs STREAM Triad (per process)", color=NORD_FG, pad=20)
+    plt.xlabel("Arithmetic intensity (FLOP/byte)", color=NORD_FG)
+    plt.ylabel("Gflops", color=NORD_FG)
+    plt.legend(title="System", title_fontsize=10)
+    plt.tick_params(axis="both", colors=NORD_GRAY)
+    for spine in plt.gca().spines.values():
+        spine.set_color(NORD_GRAY)
+    plt.tight_layout()
+    path = os.path.join(out_dir, "roofline.png")
+    plt.savefig(path, dpi=dpi, bbox_inches="tight")
+    plt.close()
+    print(f"📈 Saved roofline plot: {path}")
+    return path
+
+
+def parse_peaks(items):
+    peaks = {}
+    for item in items or []:
+        system, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--peak-gflops expects SYSTEM=GFLOPS, got {item!r}")
+        peaks[system] = float(value)
+    return peaks
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HPL efficiency and roofline analysis")
+    ap.add_argument(
+        "--results",
+        default=os.path.join(OUT_DIR, "hpcc_full_results.csv"),
+        help="run summaries written by hpcc.py",
+    )
+    ap.add_argument(
+        "--trials",
+        default=os.path.join(OUT_DIR, "hpl_trials.csv"),
+        help="HPL trials written by hpcc.py",
+    )
+    ap.add_argument("--freq-ghz", type=float, default=None, help="core frequency")
+    ap.add_argument(
+        "--flops-per-cycle",
+        type=float,
+        default=None,
+        help="double-precision FLOPs per cycle per core",
+    )
+    ap.add_argument(
+        "--cores",
+        type=int,
+        default=None,
+        help="cores per run (default: CommWorldProcs)",
+    )
+    ap.add_argument(
+        "--peak-gflops",
+        action="append",
+        metavar="SYSTEM=GFLOPS",
+        help="declared total peak of a system (repeatable)",
+    )
+    ap.add_argument(
+        "--local-peak",
+        action="store_true",
+        help="detect the frequency and FLOPs/cycle not given on this machine",
+    )
+    ap.add_argument("--out", default=OUT_DIR, help="output directory")
+    args = ap.parse_args()
+
+    for path in (args.results, args.trials):
+        if not os.path.exists(path):
+            raise SystemExit(f"❌ {path} not found, run hpcc.py first")
+    df = pd.read_csv(args.results)
+    trials = pd.read_csv(args.trials)
+    os.makedirs(args.out, exist_ok=True)
+
+    freq, fpc = args.freq_ghz, args.flops_per_cycle
+    source = "given"
+    if args.local_peak and not (freq and fpc):
+        freq = freq or detect_freq_ghz()
+        fpc = fpc or detect_flops_per_cycle()
+        source = LOCAL_GUESS
+    core_peak = freq * fpc if freq and fpc else None
+    if core_peak:
+        print(
+            f"🧮 Peak per core ({source}): {freq:.2f} GHz × {fpc:g} FLOPs/cycle "
+            f"= {core_peak:.1f} Gflops"
+        )
+    if core_peak and source == LOCAL_GUESS:
+        print(
+            "⚠️⚠️ The peak is a LOCAL GUESS from this machine's /proc/cpuinfo, "
+            "not from the benchmarked cluster: efficiencies are only right if "
+            "this script runs on the cluster's own CPUs. Pass --freq-ghz and "
+            "--flops-per-cycle or --peak-gflops otherwise."
+        )
+
+    table = hpl_efficiency(
+        trials, df, freq, fpc, args.cores, parse_peaks(args.peak_gflops), source
+    )
+    if table.empty:
+        print("⚠️ No HPL test data")
+    else:
+        csv = os.path.join(args.out, "hpl_efficiency.csv")
+        table.to_csv(csv, index=False)
+        print(f"💾 Saved: {csv}")
+        plot_efficiency(table, args.out)
+        best = table.dropna(subset=["Efficiency"])
+        if not best.empty:
+            best = best.loc[best.groupby("System")["Efficiency"].idxmax()]
+            for _, r in best.iterrows():
+                print(
+                    f"🏁 {r['System']}: best {r['Efficiency']:.1%} of peak at "
+                    f"N={r['HPL_N']:.0f} NB={r['HPL_NB']:.0f} "
+                    f"P×Q={r['P']:.0f}×{r['Q']:.0f} ({r['Gflops']:.1f} Gflops)"
+                )
+
+    ceilings = roofline_ceilings(df, core_peak, source)
+    if not ceilings.empty:
+        csv = os.path.join(args.out, "roofline.csv")
+        ceilings.to_csv(csv, index=False)
+        print(f"💾 Saved: {csv}")
+        plot_roofline(ceilings, args.out, core_peak, source)
+        for _, r in ceilings.dropna(subset=["Ridge_flops_per_byte"]).iterrows():
+            print(
+                f"🏠 {r['System']}: ridge at {r['Ridge_flops_per_byte']:.2f} "
+                f"FLOP/byte, STREAM Triad is {r['Triad_bound']} bound"
+            )
+
+
+if __name__ == "__main__":
+    main()
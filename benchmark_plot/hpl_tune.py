@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Propose the next HPL.dat configurations to try from past HPCC sweeps.
+
+Every System gets a small performance model fitted to the passed HPL
+trials in plots/hpcc/hpl_trials.csv, normalised per MPI rank so that runs
+on any P x Q carry over to the next process count: for each NB, the
+Gflops of one rank saturate with its share of the matrix, n = N / sqrt(P x
+Q) (the side of the N^2 / (P x Q) block each rank holds), as a * n / (n +
+b) (least squares on Gflops, so the large runs that matter are not
+outweighed by the small ones), and a, b are interpolated over log2(NB) for
+block sizes that were never run. How much a grid shape gains or loses
+against that is the median measured / modelled ratio of its runs,
+interpolated over log2(P / Q). A model that does not reproduce the best
+measured run within FIT_TOL is not trusted: that run is proposed again
+instead, scaled to the next process count. Otherwise candidate (N, NB, P x
+Q) are enumerated within the memory budget, with N a multiple of NB and P
+<= Q, already-run configurations are skipped, and the best predicted ones
+are printed together with one HPL.dat block each.
+
+    python hpl_tune.py --mem-gb 64 --procs 6
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from hpcc import OUT_DIR
+from hpl_analysis import hpl_efficiency
+
+NB_CANDIDATES = [32, 64, 96, 128, 160, 192, 224, 256, 320, 384, 512]
+FIT_TOL = 0.10  # the model must predict the best measured run within 10%
+B_STEPS = 400  # half-saturation sizes tried per fit
+
+
+class RankModel:
+    """
+    Gflops(N, NB, P, Q) = P * Q * shape(P / Q) * a(NB) * n / (n + b(NB)),
+    n = N / sqrt(P * Q), for one System
+    """
+
+    def __init__(self, rows):
+        ranks = rows["P"] * rows["Q"]
+        rows = rows.assign(
+            Local_N=rows["HPL_N"] / np.sqrt(ranks), Rank_Gflops=rows["Gflops"] / ranks
+        )
+        self.n_range = (rows["Local_N"].min(), rows["Local_N"].max())
+        self.nb_range = (rows["HPL_NB"].min(), rows["HPL_NB"].max())
+        self.best = rows["Gflops"].max()
+        self.best_row = rows.loc[rows["Gflops"].idxmax()]
+        fits = {}
+        for nb, grp in rows.groupby("HPL_NB"):
+            fits[nb] = self._fit(
+                grp["Local_N"].to_numpy(), grp["Rank_Gflops"].to_numpy()
+            )
+        # NB seen at a single N: borrow the median half-saturation size
+        known = [b for _, b in fits.values() if b is not None]
+        b_default = float(np.median(known)) if known else 0.0
+        for nb, (a, b) in fits.items():
+            if b is None:
+                n, g = rows.loc[
+                    rows["HPL_NB"] == nb, ["Local_N", "Rank_Gflops"]
+                ].iloc[0]
+                fits[nb] = (g * (n + b_default) / n, b_default)
+        self.nbs = np.log2(sorted(fits))
+        self.a = np.array([fits[nb][0] for nb in sorted(fits)])
+        self.b = np.array([fits[nb][1] for nb in sorted(fits)])
+        # Grid shapes: what their runs make of the per-rank curve
+        ratio = rows["Rank_Gflops"] / self._per_rank(rows["Local_N"], rows["HPL_NB"])
+        shape = ratio.groupby(np.log2(rows["P"] / rows["Q"])).median().sort_index()
+        self.aspects = shape.index.to_numpy(dtype=np.float64)
+        self.shape = shape.to_numpy(dtype=np.float64)
+        best = self.best_row
+        self.fit_error = (
+            float(self.predict(best["HPL_N"], best["HPL_NB"], best["P"], best["Q"]))
+            / self.best
+            - 1
+        )
+
+    @property
+    def trusted(self):
+        """Whether the model reproduces the best measured run within FIT_TOL"""
+        return abs(self.fit_error) <= FIT_TOL
+
+    def _fit(self, n, g):
+        """
+        (a, b) minimising the squared Gflops error of a * n / (n + b). For a
+        fixed b the best a is linear least squares, so only b is searched,
+        over a log grid refined once around its best point.
+        """
+        if len(np.unique(n)) < 2:
+            return g.max(), None
+        n = n.astype(np.float64)
+        g = g.astype(np.float64)
+
+        def best_for(bs):
+            x = n[None, :] / (n[None, :] + bs[:, None])
+            a = (x * g).sum(axis=1) / (x * x).sum(axis=1)
+            # No saturation in sight yet: cap the asymptote at twice the best
+            a = np.minimum(a, 2 * g.max())
+            sse = ((a[:, None] * x - g) ** 2).sum(axis=1)
+            i = int(np.argmin(sse))
+            return a[i], bs[i], i
+
+        bs = np.concatenate([[0.0], np.geomspace(1.0, 100 * n.max(), B_STEPS)])
+        a, b, i = best_for(bs)
+        lo, hi = bs[max(i - 1, 0)], bs[min(i + 1, len(bs) - 1)]
+        a, b, _ = best_for(np.linspace(lo, hi, B_STEPS))
+        return a, b
+
+    def _per_rank(self, n, nb):
+        x = np.log2(nb)
+        a = np.interp(x, self.nbs, self.a)
+        b = np.interp(x, self.nbs, self.b)
+        return a * n / (n + b)
+
+    def predict(self, n, nb, p, q):
+        ranks = p * q
+        shape = np.interp(np.log2(p / q), self.aspects, self.shape)
+        return ranks * shape * self._per_rank(n / np.sqrt(ranks), nb)
+
+    def extrapolated(self, n, nb, p, q):
+        n = n / math.sqrt(p * q)
+        return not (
+            self.n_range[0] <= n <= self.n_range[1]
+            and self.nb_range[0] <= nb <= self.nb_range[1]
+            and self.aspects[0] <= math.log2(p / q) <= self.aspects[-1]
+        )
+
+
+def max_problem_size(mem_gb, fraction):
+    """Largest N whose N x N double matrix fits in fraction of mem_gb"""
+    return int(math.sqrt(fraction * mem_gb * 2**30 / 8))
+
+
+def grid_shapes(procs):
+    """P x Q factorisations of procs with P <= Q (HPL prefers flat grids)"""
+    return [
+        (p, procs // p) for p in range(1, math.isqrt(procs) + 1) if procs % p == 0
+    ]
+
+
+def candidate_sizes(n_lo, n_max, nb, steps=6):
+    """N values from the largest tried size up to n_max, multiples of nb"""
+    sizes = np.linspace(min(n_lo, n_max), n_max, steps)
+    return sorted({int(s // nb) * nb for s in sizes if s >= nb})
+
+
+def recommend(table, mem_gb, procs=None, fraction=0.8, top=5):
+    """
+    Best predicted untried configurations per System.
+
+    table is hpl_analysis.hpl_efficiency's per-(System, N, NB, P, Q) best
+    Gflops, from runs on any number of ranks; P x Q shapes never run are
+    marked "untried grid" and rank below tried ones with the same
+    prediction.
+    """
+    n_max = max_problem_size(mem_gb, fraction)
+    out = []
+    for system, sys_rows in table.groupby("System"):
+        tried = set(
+            zip(sys_rows["HPL_N"], sys_rows["HPL_NB"], sys_rows["P"], sys_rows["Q"])
+        )
+        shapes = set(zip(sys_rows["P"], sys_rows["Q"]))
+        total = procs or int((sys_rows["P"] * sys_rows["Q"]).max())
+        model = RankModel(sys_rows)
+        if not model.trusted:
+            out.append(pd.DataFrame([scaled_best(system, model, total, n_max)]))
+            continue
+        n_lo = sys_rows["HPL_N"].max()
+        rows = []
+        for p, q in grid_shapes(total):
+            for nb in NB_CANDIDATES:
+                for n in candidate_sizes(n_lo, n_max, nb):
+                    if (n, nb, p, q) in tried:
+                        continue
+                    if (p, q) not in shapes:
+                        note = "untried grid"
+                    elif model.extrapolated(n, nb, p, q):
+                        note = "extrapolated"
+                    else:
+                        note = ""
+                    rows.append(
+                        {
+                            "System": system,
+                            "HPL_N": n,
+                            "HPL_NB": nb,
+                            "P": p,
+                            "Q": q,
+                            "Predicted_Gflops": float(model.predict(n, nb, p, q)),
+                            "Note": note,
+                        }
+                    )
+        if not rows:
+            continue
+        # On ties (NB past the tried range is clamped, shapes past the tried
+        # aspects too) prefer what the model has actually seen, then the
+        # squarer grid
+        out.append(
+            pd.DataFrame(rows)
+            .sort_values(
+                ["Predicted_Gflops", "Note", "P"],
+                ascending=[False, True, False],
+                kind="stable",
+            )
+            .head(top)
+        )
+    if not out:
+        return pd.DataFrame()
+    return pd.concat(out, ignore_index=True)
+
+
+def scaled_best(system, model, ranks, n_max):
+    """
+    The best measured run, for a model that cannot be trusted: as it was
+    when it used ranks processes, otherwise with the same share of the
+    matrix per rank on the squarest grid of ranks.
+    """
+    best = model.best_row
+    p, q, nb = int(best["P"]), int(best["Q"]), int(best["HPL_NB"])
+    off = f"model off by {model.fit_error:+.0%}"
+    if p * q == ranks:
+        n, gflops, note = int(best["HPL_N"]), model.best, f"measured best ({off})"
+    else:
+        p, q = grid_shapes(ranks)[-1]
+        n = min(best["Local_N"] * math.sqrt(ranks), n_max) // nb * nb
+        gflops = best["Rank_Gflops"] * ranks
+        note = f"measured best scaled to {ranks} ranks ({off})"
+    return {
+        "System": system,
+        "HPL_N": int(n),
+        "HPL_NB": nb,
+        "P": p,
+        "Q": q,
+        "Predicted_Gflops": float(gflops),
+        "Note": note,
+    }
+
+
+def hpl_dat_lines(rec):
+    """Ns/NBs/Ps/Qs lines of an HPL.dat running one recommendation"""
+
+    def row(value, label):
+        return f"{value:<20} {label}"
+
+    return [
+        row(1, "# of problems sizes (N)"),
+        row(int(rec["HPL_N"]), "Ns"),
+        row(1, "# of NBs"),
+        row(int(rec["HPL_NB"]), "NBs"),
+        row(1, "# of process grids (P x Q)"),
+        row(int(rec["P"]), "Ps"),
+        row(int(rec["Q"]), "Qs"),
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recommend HPL N/NB/PxQ to try next")
+    ap.add_argument(
+        "--results",
+        default=os.path.join(OUT_DIR, "hpcc_full_results.csv"),
+        help="run summaries written by hpcc.py",
+    )
+    ap.add_argument(
+        "--trials",
+        default=os.path.join(OUT_DIR, "hpl_trials.csv"),
+        help="HPL trials written by hpcc.py",
+    )
+    ap.add_argument(
+        "--mem-gb",
+        type=float,
+        required=True,
+        help="memory available to HPL across all nodes",
+    )
+    ap.add_argument(
+        "--mem-fraction",
+        type=float,
+        default=0.8,
+        help="share of memory the matrix may use",
+    )
+    ap.add_argument(
+        "--procs",
+        type=int,
+        default=None,
+        help="MPI ranks of the next run (default: largest P x Q tried)",
+    )
+    ap.add_argument("--top", type=int, default=5, help="configurations per system")
+    ap.add_argument("--out", default=OUT_DIR, help="output directory")
+    args = ap.parse_args()
+
+    for path in (args.results, args.trials):
+        if not os.path.exists(path):
+            raise SystemExit(f"❌ {path} not found, run hpcc.py first")
+    table = hpl_efficiency(
+        pd.read_csv(args.trials), pd.read_csv(args.results), None, None
+    )
+    table = table.dropna(subset=["HPL_N", "HPL_NB", "P", "Q"]) if len(table) else table
+    if table.empty:
+        raise SystemExit("⚠️ No HPL rows with a known P x Q grid")
+
+    rec = recommend(table, args.mem_gb, args.procs, args.mem_fraction, args.top)
+    if rec.empty:
+        print("⚠️ Nothing left to try within the memory budget")
+        return
+    os.makedirs(args.out, exist_ok=True)
+    csv = os.path.join(args.out, "hpl_recommendations.csv")
+    rec.to_csv(csv, index=False)
+    print(f"💾 Saved: {csv}")
+    print(
+        f"🧠 Memory budget {args.mem_gb:g} GB × {args.mem_fraction:.0%}: "
+        f"N ≤ {max_problem_size(args.mem_gb, args.mem_fraction)}"
+    )
+    for system, grp in rec.groupby("System", sort=False):
+        print(f"\n🎯 {system}:")
+        print(grp.drop(columns="System").to_string(index=False))
+        for i, (_, rec_row) in enumerate(grp.iterrows(), 1):
+            print(f"HPL.dat #{i}:")
+            for line in hpl_dat_lines(rec_row):
+                print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
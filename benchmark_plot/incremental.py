@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Incremental ingestion for the summary CSVs.
+
+Each summary CSV gets a <csv>.state.json sidecar recording, per source log,
+the byte offset up to which it has been ingested, a fingerprint of the
+first bytes already ingested (up to HEAD_BYTES, to notice rotation or
+truncation, even of a log still shorter than that) and a history of
+(timestamp, offset) batches. read_tail then only hands back the bytes
+appended since the last run, so a nightly job costs time in proportion to
+the new data rather than the whole history.
+"""
+import datetime
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+HEAD_BYTES = 4096
+
+
+def state_path(csv_path):
+    return csv_path + ".state.json"
+
+
+def load_state(csv_path):
+    """Saved state of csv_path, or an empty one if the CSV itself is gone"""
+    if not os.path.exists(csv_path):
+        return {}
+    try:
+        with open(state_path(csv_path)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def begin(csv_path):
+    """
+    State to continue from. Without one (first incremental run, or after a
+    full rebuild) the CSV is removed so it is rebuilt from offset 0 instead
+    of having the whole history appended to it a second time.
+    """
+    state = load_state(csv_path)
+    if not state and os.path.exists(csv_path):
+        os.remove(csv_path)
+    return state
+
+
+def clear_state(csv_path):
+    """Forget the offsets of csv_path, e.g. after a full rebuild"""
+    if os.path.exists(state_path(csv_path)):
+        os.remove(state_path(csv_path))
+
+
+def save_state(csv_path, state):
+    tmp = state_path(csv_path) + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(state, fh, indent=1, sort_keys=True)
+    os.replace(tmp, state_path(csv_path))
+
+
+def _head_digest(fh, offset):
+    """sha256 of the first min(offset, HEAD_BYTES) bytes"""
+    fh.seek(0)
+    return hashlib.sha256(fh.read(min(offset, HEAD_BYTES))).hexdigest()
+
+
+def read_tail(path, entry, boundary=b"\n"):
+    """
+    Bytes of path appended since entry["offset"], cut right after the last
+    occurrence of boundary (a complete line by default, a complete run for
+    hpcc) so partially written records are left for the next pass.
+
+    Returns (chunk, new_entry, reset); reset is True when the file was
+    rotated or truncated and is being read again from the start.
+    """
+    entry = dict(entry or {})
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        offset = entry.get("offset", 0)
+        reset = offset > 0 and (
+            size < offset or _head_digest(fh, offset) != entry.get("head")
+        )
+        if reset:
+            offset = 0
+            entry = {}
+        fh.seek(offset)
+        chunk = fh.read(size - offset)
+
+        cut = chunk.rfind(boundary)
+        if cut == -1:
+            chunk = b""
+        else:
+            end = chunk.find(b"\n", cut + len(boundary) - 1)
+            chunk = chunk[: end + 1] if end != -1 else chunk
+        new_offset = offset + len(chunk)
+        entry["offset"] = new_offset
+        entry["head"] = _head_digest(fh, new_offset)
+    if chunk:
+        stamp = datetime.datetime.now().isoformat(timespec="seconds")
+        entry.setdefault("runs", []).append([stamp, new_offset])
+    return chunk, entry, reset
+
+
+def add_incremental_arg(ap):
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only ingest what was appended to the logs since the last run "
+        "and append it to the summary CSVs",
+    )
+    return ap
+
+
+def tail_lines(chunk):
+    return chunk.decode(errors="replace").splitlines(keepends=True)
+
+
+def append_rows(csv_path, df):
+    """
+    Append df to csv_path, aligned to the existing header. If df brings new
+    columns the file is rewritten once with the union of columns.
+    """
+    if df.empty:
+        return
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        df.to_csv(csv_path, index=False)
+        return
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    if set(df.columns) - set(header):
+        old = pd.read_csv(csv_path)
+        pd.concat([old, df], ignore_index=True).to_csv(csv_path, index=False)
+        return
+    df.reindex(columns=header).to_csv(csv_path, mode="a", header=False, index=False)
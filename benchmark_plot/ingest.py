@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Concurrent discovery and parsing of benchmark logs under ../results.
+
+find_logs walks results/<system>/<kind> with os.scandir; ingest runs one
+parse task per log in a thread (default) or process pool, goes through the
+parsed-log cache and returns a single DataFrame with a "label" column.
+The time spent pulling raw logs off disk (NFS on the clusters) is reported
+separately from the time spent parsing them.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+import cache
+
+
+def find_logs(root, systems, kind, suffix=".log", warn=True):
+    """
+    (system, file name, path) of every log under root/<system>/<kind>,
+    sorted so that labels and row order are deterministic.
+    """
+    found = []
+    for system in systems:
+        d = os.path.join(root, system, kind)
+        try:
+            with os.scandir(d) as it:
+                entries = [e for e in it if e.is_file() and e.name.endswith(suffix)]
+        except FileNotFoundError:
+            if warn:
+                print(f"[WARN] Directory not found: {d}")
+            continue
+        found.extend(
+            (system, e.name, e.path) for e in sorted(entries, key=lambda e: e.name)
+        )
+    return found
+
+
+def add_ingest_args(ap):
+    ap.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="parallel log parsers (default: all CPUs, 1 = sequential)",
+    )
+    ap.add_argument(
+        "--processes",
+        action="store_true",
+        help="parse in a process pool instead of threads",
+    )
+    return ap
+
+
+def _run_task(task):
+    label, path, parser, namespace, version = task
+    timing = {}
+    t0 = time.perf_counter()
+    df = cache.cached_parse(path, parser, namespace, version, timing=timing)
+    timing["total"] = time.perf_counter() - t0
+    timing["hit"] = "parse" not in timing
+    timing.setdefault("io", 0.0)
+    timing.setdefault("parse", 0.0)
+    return label, df, timing
+
+
+def ingest(tasks, jobs=None, processes=False):
+    """
+    Parse every (label, path, parser, namespace, version) task and return
+    one DataFrame with a leading "label" column, in task order.
+
+    parser(path) must return a DataFrame, or a dict of DataFrames with the
+    same names for every task (a dict of combined frames is returned then);
+    with processes=True it must also be picklable (a module-level function
+    or functools.partial of one).
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return pd.DataFrame()
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    t0 = time.perf_counter()
+    if jobs == 1:
+        results = [_run_task(t) for t in tasks]
+    else:
+        pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool_cls(max_workers=jobs) as pool:
+            results = list(pool.map(_run_task, tasks))
+    wall = time.perf_counter() - t0
+
+    io_time = sum(t["io"] for _, _, t in results)
+    parse_time = sum(t["parse"] for _, _, t in results)
+    cached_time = sum(t["total"] for _, _, t in results if t["hit"])
+    hits = sum(t["hit"] for _, _, t in results)
+    kind = "process(es)" if processes and jobs > 1 else "thread(s)"
+    print(
+        f"⏱️ Ingested {len(results)} logs with {jobs} {kind} in {wall:.2f}s wall: "
+        f"I/O {io_time:.2f}s, parse {parse_time:.2f}s, "
+        f"{hits} cache hit(s) {cached_time:.2f}s"
+    )
+
+    if results and isinstance(results[0][1], dict):
+        # Parsers returning several named tables: one labelled frame per name
+        return {
+            name: _labelled([(label, dfs[name]) for label, dfs, _ in results])
+            for name in results[0][1]
+        }
+    return _labelled([(label, df) for label, df, _ in results])
+
+
+def _labelled(results):
+    frames = [df.assign(label=label) for label, df in results if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    return df[["label"] + [c for c in df.columns if c != "label"]]
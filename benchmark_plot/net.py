@@ -1,10 +1,27 @@
 #!/usr/bin/env python3
+import argparse
+import json
+import math
 import os
 import re
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+import cache
+import incremental
+import ingest
+import net_analysis
+import net_matrix
+import records
+import stats
+import store
+import warehouse
+
+# Bump when the parser output changes to invalidate cached results
+PARSER_VERSION = 4
+
 # Nord palette colors for elements only (no background change)
 NORD_RED = "#BF616A"
 NORD_GREEN = "#A3BE8C"
@@ -12,46 +29,495 @@ NORD_YELLOW = "#EBCB8B"
 NORD_BLUE = "#81A1C1"
 NORD_FG = "#2E3440"  # Use for text (dark)
 
-# threshold (Gbits/sec) to distinguish high-speed vs low-speed
-BW_THRESHOLD = 70.0
+# iperf3 interval or total line (stream id or SUM, start, end, bitrate and,
+# on the sender side, Retr and Cwnd; [SUM] lines have no Cwnd) and ping
+# reply time
+IPERF_RE = re.compile(
+    r"(?:\[\s*(?P<stream>\d+|SUM)\]\s+)?"
+    r"(?P<start>\d+\.\d+)-\s*(?P<end>\d+\.\d+)\s+sec\s+\S+\s+[KMGT]?Bytes\s+"
+    r"(?P<rate>[\d.]+)\s+(?P<rate_unit>[KMGT]?)bits/sec"
+    r"(?:\s+(?P<retr>\d+))?(?:\s+(?P<cwnd>[\d.]+)\s+(?P<cwnd_unit>[KMGT]?)Bytes)?"
+    r"(?:\s+(?P<side>sender|receiver))?"
+)
+PING_RE = re.compile(r"time=(\d+\.\d+)")
+
+# Intervals of the whole test ([SUM] with parallel streams), every stream's
+# own intervals (rtt only from JSON) and the sender/receiver totals
+INTERVAL_COLUMNS = ["time", "end", "value", "retr", "cwnd"]
+STREAM_COLUMNS = ["stream"] + INTERVAL_COLUMNS + ["rtt"]
+TOTAL_COLUMNS = ["stream", "side", "time", "end", "value", "retr"]
+
+# Ping latencies go into a stats.LogHistogram over this range (ms)
+PING_LOWEST_MS = 1e-3
+PING_HIGHEST_MS = 6e4
+PING_BATCH = 4096  # samples parsed before they are folded into the histogram
+LATENCY_QUANTILES = {"p50": 0.50, "p90": 0.90, "p99": 0.99, "p99.9": 0.999}
+LATENCY_COLUMNS = (
+    ["Avg Latency (ms)"]
+    + [f"{p} Latency (ms)" for p in LATENCY_QUANTILES]
+    + ["Max Latency (ms)"]
+)
+TO_GBITS = {"": 1e-9, "K": 1e-6, "M": 1e-3, "G": 1.0, "T": 1e3}
+TO_KBYTES = {"": 1 / 1024, "K": 1.0, "M": 1024.0, "G": 1024.0**2, "T": 1024.0**3}
+
+
+def iperf_line(line):
+    """
+    (stream, side, (start, end, Gbits/sec, Retr, Cwnd KBytes)) of an iperf3
+    interval or total line, or None for other lines. stream is "SUM" on
+    [SUM] lines, side is "sender"/"receiver" on the totals and "" on the
+    intervals; Retr and Cwnd are NaN when iperf3 does not print them.
+    """
+    m = IPERF_RE.search(line)
+    if not m:
+        return None
+    nan = float("nan")
+    return (
+        m["stream"] or "",
+        m["side"] or "",
+        (
+            float(m["start"]),
+            float(m["end"]),
+            float(m["rate"]) * TO_GBITS[m["rate_unit"]],
+            float(m["retr"]) if m["retr"] else nan,
+            float(m["cwnd"]) * TO_KBYTES[m["cwnd_unit"]] if m["cwnd"] else nan,
+        ),
+    )
+
+
+class IperfParser:
+    """
+    iperf3 text output, line by line, into the intervals of the whole test
+    (the [SUM] line when there are parallel streams, with the streams'
+    Cwnd added up), every stream's own intervals and the totals. A log
+    read in pieces carries state() over to the parser of the next piece,
+    pending stream intervals included, since its first line may be their
+    [SUM].
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.intervals = [tuple(r) for r in state.get("intervals", [])]
+        self.streams = [tuple(r) for r in state.get("streams", [])]
+        self.totals = [tuple(r) for r in state.get("totals", [])]
+        # stream intervals not yet known to have a [SUM]
+        self.pending = [tuple(r) for r in state.get("pending", [])]
+
+    def feed(self, line):
+        parsed = iperf_line(line)
+        if parsed is None:
+            return
+        stream, side, iv = parsed
+        if side:
+            # The totals close the test: whatever is left has no [SUM]
+            self.intervals.extend(self.pending)
+            self.pending = []
+            self.totals.append((stream, side) + iv[:4])
+        elif stream == "SUM":
+            cwnd = [p[4] for p in self.pending if not math.isnan(p[4])]
+            self.intervals.append(iv[:4] + (sum(cwnd) if cwnd else iv[4],))
+            self.pending = []
+        else:
+            self.streams.append((stream,) + iv + (float("nan"),))
+            if self.pending and self.pending[-1][0] != iv[0]:
+                self.intervals.extend(self.pending)
+                self.pending = []
+            self.pending.append(iv)
+
+    def tables(self):
+        """
+        {"iperf": intervals, "streams": ..., "totals": ...} frames, the
+        pending stream intervals counted as whole-test ones
+        """
+        intervals = self.intervals + self.pending
+        return iperf_tables(intervals, self.streams, self.totals)
+
+    def state(self):
+        """Everything parsed so far, as JSON-friendly lists"""
+        return {
+            name: [list(r) for r in rows]
+            for name, rows in (
+                ("intervals", self.intervals),
+                ("streams", self.streams),
+                ("totals", self.totals),
+                ("pending", self.pending),
+            )
+        }
+
+
+def iperf_tables(intervals, streams, totals):
+    return {
+        "iperf": pd.DataFrame(intervals, columns=INTERVAL_COLUMNS, dtype=float),
+        "streams": pd.DataFrame(streams, columns=STREAM_COLUMNS).astype(
+            {c: float for c in STREAM_COLUMNS[1:]}
+        ),
+        "totals": pd.DataFrame(totals, columns=TOTAL_COLUMNS).astype(
+            {c: float for c in TOTAL_COLUMNS[2:]}
+        ),
+    }
 
 
 def parse_iperf(lines):
-    times, rates = [], []
-    pattern = re.compile(r"(\d+\.\d+)-\d+\.\d+\s+sec.*?([\d.]+)\s+Gbits/sec")
-    for ln in lines:
-        m = pattern.search(ln)
-        if m:
-            times.append(float(m.group(1)))
-            rates.append(float(m.group(2)))
-    return times, rates
+    """Intervals of the whole test in iperf3 text lines"""
+    parser = IperfParser()
+    for line in lines:
+        parser.feed(line)
+    return parser.tables()["iperf"]
+
+
+def _json_interval(d):
+    """One interval of iperf3 JSON in net's units (Gbits/sec, KBytes)"""
+    nan = float("nan")
+    return (
+        float(d["start"]),
+        float(d["end"]),
+        d["bits_per_second"] * 1e-9,
+        float(d.get("retransmits", nan)),
+        d["snd_cwnd"] / 1024 if "snd_cwnd" in d else nan,
+    )
 
 
-def parse_ping(lines):
-    return [
-        float(m.group(1))
-        for m in (re.search(r"time=(\d+\.\d+)", l) for l in lines)
-        if m
-    ]
+def iperf_json(doc):
+    """
+    (intervals, streams, totals) rows of an `iperf3 --json` document, as
+    IperfParser collects them from text; stream RTT is converted from
+    microseconds to ms
+    """
+    intervals, streams, totals = [], [], []
+    for iv in doc.get("intervals", []):
+        rows = [_json_interval(st) for st in iv.get("streams", [])]
+        for st, row in zip(iv.get("streams", []), rows):
+            rtt = st["rtt"] / 1000 if "rtt" in st else float("nan")
+            streams.append((str(st["socket"]),) + row + (rtt,))
+        cwnd = [r[4] for r in rows if not math.isnan(r[4])]
+        total = _json_interval(iv["sum"])
+        intervals.append(total[:4] + (sum(cwnd) if cwnd else total[4],))
+    end = doc.get("end", {})
+    for st in end.get("streams", []):
+        for side in ("sender", "receiver"):
+            if side in st:
+                d = st[side]
+                totals.append((str(d["socket"]), side) + _json_interval(d)[:4])
+    for side, key in (("sender", "sum_sent"), ("receiver", "sum_received")):
+        if key in end:
+            totals.append(("SUM", side) + _json_interval(end[key])[:4])
+    return intervals, streams, totals
+
+
+def read_iperf_json(path):
+    """iperf tables of a file of one or more concatenated iperf3 JSON documents"""
+    with cache.open_source(path) as fh:
+        text = fh.read()
+    decoder = json.JSONDecoder()
+    rows = ([], [], [])
+    pos = 0
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos >= len(text):
+            break
+        doc, pos = decoder.raw_decode(text, pos)
+        for acc, new in zip(rows, iperf_json(doc)):
+            acc.extend(new)
+    return iperf_tables(*rows)
+
+
+def ping_histogram(state=None):
+    return stats.LogHistogram.from_state(state, PING_LOWEST_MS, PING_HIGHEST_MS)
+
+
+def record_pings(hist, lines):
+    """Fold the ping replies of lines into hist, PING_BATCH at a time"""
+    batch = []
+    for line in lines:
+        if "icmp_seq" in line:
+            m = PING_RE.search(line)
+            if m:
+                batch.append(float(m.group(1)))
+                if len(batch) >= PING_BATCH:
+                    hist.record(batch)
+                    batch = []
+    hist.record(batch)
+    return hist
+
+
+def latency_summary(hist):
+    """Avg/percentile/max latency columns of a ping histogram"""
+    row = {"Avg Latency (ms)": hist.mean}
+    qs = hist.quantiles(list(LATENCY_QUANTILES.values()))
+    for p, q in zip(LATENCY_QUANTILES, qs):
+        row[f"{p} Latency (ms)"] = float(q)
+    row["Max Latency (ms)"] = hist.max if hist.count else float("nan")
+    return row
+
+
+def scan_lines(lines):
+    """
+    iperf tables (see IperfParser) and ping latency histogram of an
+    iterable of lines (a log or a live pipe), consumed once
+    """
+    parser = IperfParser()
+
+    def other_lines():
+        for line in lines:
+            if "bits/sec" in line:
+                parser.feed(line)
+            else:
+                yield line
+
+    hist = record_pings(ping_histogram(), other_lines())
+    return parser.tables(), hist
+
+
+def receiver_bandwidth(totals):
+    """
+    Mean receiver-side total of the tests in totals: the [SUM] of parallel
+    streams, or the single stream's when there is no [SUM]
+    """
+    recv = totals[totals["side"] == "receiver"]
+    if (recv["stream"] == "SUM").any():
+        recv = recv[recv["stream"] == "SUM"]
+    return float(recv["value"].mean()) if not recv.empty else float("nan")
+
+
+def link_summary(label, tables, hist):
+    """Summary row of one link and its net_analysis.analyse_intervals result"""
+    ip = tables["iperf"]
+    rates = ip["value"].tolist()
+    analysed = net_analysis.analyse_intervals(ip)
+    row = {
+        "Environment": label,
+        "Avg Bandwidth (Gbits/sec)": sum(rates) / len(rates) if rates else 0.0,
+        "Sustained Bandwidth (Gbits/sec)": analysed[0][
+            "Sustained Bandwidth (Gbits/sec)"
+        ],
+        "Receiver Bandwidth (Gbits/sec)": receiver_bandwidth(tables["totals"]),
+        "Streams": tables["streams"]["stream"].nunique(),
+        **latency_summary(hist),
+    }
+    return row, analysed
+
+
+def read_records(path):
+    """iperf tables and ping histogram of a records file"""
+    rows = ([], [], [])
+    hist = ping_histogram()
+    for rec in records.read(path):
+        if rec["tool"] == "iperf3":
+            for acc, key in zip(rows, ("intervals", "streams", "totals")):
+                acc.extend(tuple(r) for r in rec.get(key, []))
+        elif rec["tool"] == "ping":
+            hist.merge(ping_histogram(rec["histogram"]))
+    return iperf_tables(*rows), hist
+
+
+def load_net_log(path):
+    """
+    iperf tables (intervals, per-stream intervals, sender/receiver totals)
+    and the ping latency histogram (non-empty buckets, plus
+    count/sum/min/max) of one log, iperf3 JSON output or records file, the
+    tables stored in the cache. A log is streamed, so memory does not grow
+    with the length of a ping soak.
+    """
+    if records.is_records(path):
+        tables, hist = read_records(path)
+    elif path.endswith(".json"):
+        tables, hist = read_iperf_json(path), ping_histogram()
+    else:
+        with cache.open_source(path) as fh:
+            tables, hist = scan_lines(fh)
+    nz = np.flatnonzero(hist.counts)
+    return {
+        **tables,
+        "ping": pd.DataFrame({"bucket": nz, "count": hist.counts[nz]}),
+        "ping_summary": pd.DataFrame(
+            [[hist.count, hist.sum, hist.min, hist.max]],
+            columns=["count", "sum", "min", "max"],
+        ),
+    }
+
+
+def histogram_from_tables(buckets, summary):
+    """Rebuild a ping histogram from load_net_log's ping tables"""
+    hist = ping_histogram()
+    if summary.empty or not summary["count"].sum():
+        return hist
+    hist.counts[buckets["bucket"].to_numpy()] = buckets["count"].to_numpy()
+    hist.count = int(summary["count"].iloc[0])
+    hist.sum = float(summary["sum"].iloc[0])
+    hist.min = float(summary["min"].iloc[0])
+    hist.max = float(summary["max"].iloc[0])
+    return hist
+
+
+def update_network_summary(csv_path, log_paths):
+    """
+    Fold only the new tail of every log into the iperf rows (a few per
+    second of test) and the ping latency histogram kept in the incremental
+    state, and rewrite csv_path with the same link_summary rows as a full
+    read. Returns the summary and the histograms by label.
+    """
+    state = incremental.begin(csv_path)
+    rows = []
+    hists = {}
+    for label, path in log_paths.items():
+        key = os.path.abspath(path)
+        entry = state.get(key)
+        if entry and not {"ping", "iperf"} <= set(entry):
+            entry = None  # state from an older net.py: start over
+        chunk, entry, reset = incremental.read_tail(path, entry)
+        if reset:
+            print(f"⚠️ {path} was truncated or rotated, reading it from the start")
+        lines = incremental.tail_lines(chunk)
+        hist = record_pings(ping_histogram(entry.get("ping")), lines)
+        if path.endswith(".json"):
+            # A JSON document cannot be read from its tail; it is small
+            tables = read_iperf_json(path)
+            entry["iperf"] = {}
+        else:
+            # Stream lines whose [SUM] may still be in the next tail stay
+            # pending, so -P streams are never counted twice
+            parser = IperfParser(entry.get("iperf"))
+            for line in lines:
+                if "bits/sec" in line:
+                    parser.feed(line)
+            tables = parser.tables()
+            entry["iperf"] = parser.state()
+        entry["ping"] = hist.to_state()
+        state[key] = entry
+        hists[label] = hist
+        rows.append(link_summary(label, tables, hist)[0])
+    incremental.save_state(csv_path, state)
+    df = pd.DataFrame(rows).set_index("Environment")
+    df.to_csv(csv_path)
+    return df, hists
+
+
+def box_stats(hist, label):
+    """matplotlib bxp statistics of a histogram: box p25-p75, whiskers p1-p99"""
+    p1, q1, med, q3, p99 = hist.quantiles([0.01, 0.25, 0.50, 0.75, 0.99])
+    return {
+        "label": label,
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "whislo": p1,
+        "whishi": p99,
+        "mean": hist.mean,
+        "fliers": [hist.max],
+    }
+
+
+def plot_latency_box(histograms, labels, out_path):
+    labels = [l for l in labels if histograms[l].count]
+    if not labels:
+        return
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.bxp(
+        [box_stats(histograms[l], l) for l in labels],
+        patch_artist=True,
+        showmeans=True,
+        boxprops=dict(facecolor=NORD_BLUE),
+        medianprops=dict(color=NORD_RED, linewidth=2),
+        meanprops=dict(
+            marker="^", markerfacecolor=NORD_YELLOW, markeredgecolor=NORD_FG
+        ),
+        flierprops=dict(marker="x", markeredgecolor=NORD_RED),
+    )
+    ax.set_title(
+        "Ping Latency Distribution (whiskers p1-p99, x = max)",
+        fontsize=14,
+        weight="bold",
+        color=NORD_FG,
+    )
+    ax.set_ylabel("Latency (ms)", color=NORD_FG)
+    ax.set_xticks(range(1, len(labels) + 1))
+    ax.set_xticklabels(labels, rotation=30, ha="right", color=NORD_FG)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=300)
+    plt.close(fig)
+
+
+def plot_latency_percentiles(histograms, labels, out_path):
+    """HDR-style latency by percentile, on a 1 / (1 - q) axis"""
+    labels = [l for l in labels if histograms[l].count]
+    if not labels:
+        return
+    qs = 1 - np.logspace(0, -4, 200)[1:]
+    colors = [NORD_GREEN, NORD_BLUE, NORD_YELLOW, NORD_RED]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for i, label in enumerate(labels):
+        ax.plot(
+            1 / (1 - qs),
+            histograms[label].quantiles(qs),
+            label=label,
+            color=colors[i % len(colors)],
+            linewidth=2,
+        )
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ticks = [1, 2, 10, 100, 1000, 10000]
+    ax.set_xticks(ticks)
+    ax.set_xticklabels(["0%", "50%", "90%", "99%", "99.9%", "99.99%"])
+    ax.set_title(
+        "Ping Latency by Percentile", fontsize=14, weight="bold", color=NORD_FG
+    )
+    ax.set_xlabel("Percentile", color=NORD_FG)
+    ax.set_ylabel("Latency (ms)", color=NORD_FG)
+    ax.grid(True, linestyle="--", alpha=0.5)
+    ax.legend(facecolor="white", labelcolor=NORD_FG)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=300)
+    plt.close(fig)
+
+
+def store_rows(df):
+    """Network summary (indexed by "name (vm)") as metric store rows"""
+    wide = df.reset_index()
+    parts = wide["Environment"].str.rsplit(" ", n=1)
+    wide["role"] = parts.str[0]
+    wide["env"] = parts.str[-1].str.strip("()")
+    return store.from_wide(
+        wide,
+        "net",
+        [
+            "Avg Bandwidth (Gbits/sec)",
+            "Sustained Bandwidth (Gbits/sec)",
+            "Receiver Bandwidth (Gbits/sec)",
+            "Streams",
+        ]
+        + LATENCY_COLUMNS,
+        run_id="Environment",
+        env="env",
+        role="role",
+        units={
+            "Avg Bandwidth (Gbits/sec)": "Gbit/s",
+            "Sustained Bandwidth (Gbits/sec)": "Gbit/s",
+            "Receiver Bandwidth (Gbits/sec)": "Gbit/s",
+            "Streams": "count",
+            **dict.fromkeys(LATENCY_COLUMNS, "ms"),
+        },
+        lower_is_better=set(LATENCY_COLUMNS),
+    )
 
 
 def discover_logs(root):
+    """
+    Net logs by label, plus `iperf3 --json` output saved as <name>.json for
+    links that have no <name>.log
+    """
     logs = {}
-    for system in ("containers", "vms"):
-        d = os.path.join(root, system, "net")
-        if not os.path.isdir(d):
-            print(f"[WARN] directory not found: {d}")
-            continue
-        for fname in os.listdir(d):
-            if not fname.endswith(".log"):
-                continue
+    systems = ("containers", "vms")
+    for suffix in (".log", ".json"):
+        for system, fname, path in ingest.find_logs(
+            root, systems, "net", suffix=suffix, warn=suffix == ".log"
+        ):
             name = os.path.splitext(fname)[0]
-            label = f"{name} ({system[:-1]})"
-            logs[label] = os.path.join(d, fname)
+            logs.setdefault(f"{name} ({system[:-1]})", path)
     return logs
 
 
-# Save time series data for high and low speed environments
+# Save the time series of one link class
 def save_timeseries_csv(envs, filename):
     rows = []
     for env in envs:
@@ -75,6 +541,22 @@ def save_timeseries_csv(envs, filename):
 
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="iperf3/ping network benchmark plots")
+    ap.add_argument(
+        "--classes",
+        type=int,
+        default=None,
+        help="number of link speed classes (default: found from the bandwidths)",
+    )
+    ap.add_argument(
+        "--hostfile",
+        default=None,
+        help="MPI hostfile: draw the link matrices of these hosts only, in its order",
+    )
+    args = warehouse.add_warehouse_arg(
+        incremental.add_incremental_arg(ingest.add_ingest_args(ap))
+    ).parse_args()
+
     results_root = "../results"
     out_dir = "plots/network"
     os.makedirs(out_dir, exist_ok=True)
@@ -87,52 +569,120 @@ if __name__ == "__main__":
 
     rows = []
     time_series = {}
-    latency_series = {}
 
-    for label, path in log_paths.items():
-        with open(path) as fh:
-            lines = fh.readlines()
-
-        ip_lines = [l for l in lines if "Gbits/sec" in l and "sec" in l]
-        ping_lines = [l for l in lines if "icmp_seq" in l]
-
-        times, rates = parse_iperf(ip_lines)
-        lats = parse_ping(ping_lines)
+    csv_path = os.path.join(out_dir, "network_summary.csv")
+    if args.incremental:
+        df, histograms = update_network_summary(csv_path, log_paths)
+    else:
+        tables = ingest.ingest(
+            (
+                (label, records.prefer(path), load_net_log, "net", PARSER_VERSION)
+                for label, path in log_paths.items()
+            ),
+            jobs=args.jobs,
+            processes=args.processes,
+        )
 
-        avg_bw = sum(rates) / len(rates) if rates else 0.0
-        avg_lat = sum(lats) / len(lats) if lats else 0.0
+        def by_label(name):
+            table = tables[name]
+            if table.empty:
+                return {}
+            return {k: g.drop(columns="label") for k, g in table.groupby("label")}
 
-        rows.append(
-            {
-                "Environment": label,
-                "Avg Bandwidth (Gbits/sec)": avg_bw,
-                "Avg Latency (ms)": avg_lat,
+        intervals, streams, totals, buckets, summaries = (
+            by_label(n) for n in ("iperf", "streams", "totals", "ping", "ping_summary")
+        )
+        empty = iperf_tables([], [], [])
+        no_pings = pd.DataFrame(columns=["bucket", "count"])
+        analysed = {}
+        histograms = {}
+        link_streams = {}
+
+        for label in log_paths:
+            hist = histogram_from_tables(
+                buckets.get(label, no_pings),
+                summaries.get(label, pd.DataFrame()),
+            )
+            histograms[label] = hist
+
+            # Warm-up, steady state and dips of the full intervals; the
+            # sender/receiver totals are never parsed as intervals, and
+            # with -P only the [SUM] of the streams is
+            link = {
+                "iperf": intervals.get(label, empty["iperf"]),
+                "streams": streams.get(label, empty["streams"]),
+                "totals": totals.get(label, empty["totals"]),
             }
+            row, analysed[label] = link_summary(label, link, hist)
+            link_streams[label] = link["streams"]
+            rows.append(row)
+            full = analysed[label][1]
+            time_series[label] = (full["time"].tolist(), full["value"].tolist())
+
+        df = pd.DataFrame(rows).set_index("Environment")
+        df.to_csv(csv_path)
+        incremental.clear_state(csv_path)
+
+        iv_path = os.path.join(out_dir, "iperf_intervals.csv")
+        iv_df = pd.DataFrame(
+            [row for row, _, _ in analysed.values()],
+            index=pd.Index(list(analysed), name="Environment"),
+            columns=net_analysis.ANALYSIS_COLUMNS,
         )
+        iv_df.to_csv(iv_path)
+        net_analysis.plot_intervals(
+            analysed, os.path.join(out_dir, "iperf_intervals.png")
+        )
+        print("\n=== iperf3 Intervals ===")
+        print(iv_df.to_string(float_format="{:.3g}".format))
+        print(f"📄 Interval analysis saved to: {iv_path}")
+
+        # Per-stream share and fairness of the -P runs
+        st_df = net_analysis.stream_breakdown(link_streams)
+        if not st_df.empty:
+            st_path = os.path.join(out_dir, "iperf_streams.csv")
+            st_df.to_csv(st_path, index=False)
+            print("\n=== iperf3 Streams ===")
+            print(st_df.to_string(index=False, float_format="{:.3g}".format))
+            print(f"📄 Stream breakdown saved to: {st_path}")
+
+    store.save_family(
+        store_rows(df), "net", warehouse_path=args.warehouse, sources=log_paths.values()
+    )
 
-        if times:
-            sorted_pairs = sorted(zip(times, rates))
-            sorted_pairs = sorted_pairs[:-1]
-            ts, rs = zip(*sorted_pairs)
-            time_series[label] = (list(ts), list(rs))
-        else:
-            time_series[label] = ([], [])
-        latency_series[label] = lats
-
-    df = pd.DataFrame(rows).set_index("Environment")
     print("\n=== Network Summary ===")
     print(df)
 
-    # Save summary to CSV
-    csv_path = os.path.join(out_dir, "network_summary.csv")
-    df.to_csv(csv_path)
     print(f"\n📄 CSV saved to: {csv_path}")
 
-    high = df[df["Avg Bandwidth (Gbits/sec)"] > BW_THRESHOLD].index.tolist()
-    low = df[df["Avg Bandwidth (Gbits/sec)"] <= BW_THRESHOLD].index.tolist()
-
-    save_timeseries_csv(high, "bw_ts_high.csv")
-    save_timeseries_csv(low, "bw_ts_low.csv")
+    # Speed classes found in the data (1G, 10G, 100G, loopback...) rather
+    # than a fixed high/low threshold
+    classes = net_analysis.link_classes(df["Avg Bandwidth (Gbits/sec)"], args.classes)
+    class_df = pd.DataFrame(
+        [(lbl, name) for name, lbls in classes.items() for lbl in lbls],
+        columns=["Environment", "Class"],
+    )
+    class_df.to_csv(os.path.join(out_dir, "link_classes.csv"), index=False)
+    print("\n🔗 Link classes:")
+    for name, lbls in classes.items():
+        print(f"  {name}: {', '.join(lbls)}")
+
+    # Links without a bandwidth are listed, but have nothing to plot
+    measured = {
+        name: lbls
+        for name, lbls in classes.items()
+        if name != net_analysis.NO_BANDWIDTH
+    }
+    if not args.incremental:
+        for name, lbls in measured.items():
+            save_timeseries_csv(lbls, f"bw_ts_{name}.csv")
+
+    # src x dst matrices of the links between hosts (runner.py matrix)
+    hosts = None
+    if args.hostfile:
+        hosts = [h for h, _ in net_matrix.read_hostfile(args.hostfile)]
+    for path in net_matrix.save_matrices(df, out_dir, hosts)[1::2]:
+        print(f"🗺️ Link matrix saved to: {path}")
 
     def plot_bar(envs, fname, title):
         if not envs:
@@ -198,32 +748,21 @@ if __name__ == "__main__":
         plt.savefig(os.path.join(out_dir, fname), dpi=300)
         plt.close()
 
-    plot_bar(high, "avg_bw_high.png", "Average Bandwidth (High-Speed Links)")
-    plot_bar(low, "avg_bw_low.png", "Average Bandwidth (Low-Speed Links)")
-    plot_timeseries(high, "bw_ts_high.png", "Bandwidth Over Time (High-Speed)")
-    plot_timeseries(low, "bw_ts_low.png", "Bandwidth Over Time (Low-Speed)")
-
-    # Combined latency boxplot
-    fig, ax = plt.subplots(figsize=(8, 5))
+    for name, lbls in measured.items():
+        plot_bar(lbls, f"avg_bw_{name}.png", f"Average Bandwidth ({name} Links)")
+    if args.incremental:
+        # Only running sums are kept for the bandwidth between incremental runs
+        print("ℹ️ Incremental mode: time-series plots skipped")
+    else:
+        for name, lbls in measured.items():
+            plot_timeseries(
+                lbls, f"bw_ts_{name}.png", f"Bandwidth Over Time ({name} Links)"
+            )
 
-    pos = list(range(len(df)))
-    data = [latency_series[lbl] for lbl in df.index]
-    boxprops = dict(facecolor=NORD_BLUE)
-    medianprops = dict(color=NORD_RED, linewidth=2)
-    ax.boxplot(
-        data,
-        positions=pos,
-        patch_artist=True,
-        boxprops=boxprops,
-        medianprops=medianprops,
+    # Latency plots are drawn from the histograms, in both modes
+    plot_latency_box(histograms, df.index, os.path.join(out_dir, "latency_boxplot.png"))
+    plot_latency_percentiles(
+        histograms, df.index, os.path.join(out_dir, "latency_percentiles.png")
     )
 
-    ax.set_title("Ping Latency Distribution", fontsize=14, weight="bold", color=NORD_FG)
-    ax.set_ylabel("Latency (ms)", color=NORD_FG)
-    ax.set_xticks(pos)
-    ax.set_xticklabels(df.index, rotation=30, ha="right", color=NORD_FG)
-    plt.tight_layout()
-    plt.savefig(os.path.join(out_dir, "latency_boxplot.png"), dpi=300)
-    plt.close()
-
     print(f"\n✅ Done! Plots and CSV saved to '{out_dir}/'.")
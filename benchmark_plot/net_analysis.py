@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Per-interval analysis of iperf3 bandwidth time series.
+
+A plain mean mixes TCP slow start and the ramp-down of the last interval
+into what a link sustains. Here the steady level is the median of the
+second half of the run; warm-up lasts until WINDOW consecutive intervals
+reach within WARMUP_TOL of it, and the steady-state window runs from there
+to the last interval that still does. Inside that window the sustained
+bandwidth is the median rate, the coefficient of variation measures
+jitter, and intervals more than DIP_FRAC below the sustained rate are
+flagged as dips. Retr and Cwnd come from the sender-side columns.
+
+With parallel streams (iperf3 -P) the link is analysed on the [SUM] of the
+streams, and stream_breakdown gives each stream's share of it and Jain's
+fairness index across them.
+
+net.py runs this on every link and writes plots/network/iperf_intervals.csv,
+iperf_intervals.png and, for -P runs, iperf_streams.csv.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# Nord palette, as in net.py
+NORD_RED = "#BF616A"
+NORD_GREEN = "#A3BE8C"
+NORD_YELLOW = "#EBCB8B"
+NORD_BLUE = "#81A1C1"
+NORD_FG = "#2E3440"
+
+WARMUP_TOL = 0.10  # within 10% of the steady level counts as warmed up
+WINDOW = 3  # consecutive intervals that must be at the steady level
+DIP_FRAC = 0.20  # 20% under the sustained rate is a dip
+
+ANALYSIS_COLUMNS = [
+    "Intervals",
+    "Warm-up (s)",
+    "Steady Start (s)",
+    "Steady End (s)",
+    "Sustained Bandwidth (Gbits/sec)",
+    "Steady Mean (Gbits/sec)",
+    "CV",
+    "Dips",
+    "Dip Time (s)",
+    "Retr",
+    "Retr/s",
+    "Cwnd Median (KBytes)",
+]
+
+
+def full_intervals(ip):
+    """
+    Intervals sorted by start time, without a final partial one (iperf3's
+    last report can cover a fraction of the interval and under-reports)
+    """
+    ip = ip.sort_values("time", kind="stable").reset_index(drop=True)
+    if len(ip) < 2:
+        return ip
+    dur = ip["end"] - ip["time"]
+    return ip[dur >= 0.5 * dur.median()].reset_index(drop=True)
+
+
+def steady_window(rates, tol=WARMUP_TOL, window=WINDOW):
+    """(first, last + 1) index of the steady-state window of rates"""
+    n = len(rates)
+    if n == 0:
+        return 0, 0
+    level = np.median(rates[n // 2 :])
+    ok = rates >= (1 - tol) * level
+    if n < window:
+        hits = np.flatnonzero(ok)
+    else:
+        runs = np.convolve(ok, np.ones(window, dtype=int), "valid")
+        hits = np.flatnonzero(runs == window)
+    if not hits.size:
+        return n, n
+    last = np.flatnonzero(ok)[-1]
+    return int(hits[0]), int(last) + 1
+
+
+def analyse_intervals(ip, dip_frac=DIP_FRAC):
+    """
+    One row of ANALYSIS_COLUMNS for a link's iperf intervals (columns time,
+    end, value, retr, cwnd as loaded by net.load_net_log), plus the boolean
+    dip mask over full_intervals(ip)
+    """
+    ip = full_intervals(ip)
+    rates = ip["value"].to_numpy(dtype=np.float64)
+    first, stop = steady_window(rates)
+    dips = np.zeros(len(rates), dtype=bool)
+    row = dict.fromkeys(ANALYSIS_COLUMNS, np.nan)
+    row["Intervals"] = len(rates)
+    if stop > first:
+        steady = rates[first:stop]
+        sustained = float(np.median(steady))
+        mean = float(steady.mean())
+        dips[first:stop] = steady < (1 - dip_frac) * sustained
+        dur = (ip["end"] - ip["time"]).to_numpy()
+        row.update(
+            {
+                "Warm-up (s)": float(ip["time"].iloc[first] - ip["time"].iloc[0]),
+                "Steady Start (s)": float(ip["time"].iloc[first]),
+                "Steady End (s)": float(ip["end"].iloc[stop - 1]),
+                "Sustained Bandwidth (Gbits/sec)": sustained,
+                "Steady Mean (Gbits/sec)": mean,
+                "CV": float(steady.std()) / mean if mean else np.nan,
+                "Dips": int(dips.sum()),
+                "Dip Time (s)": float(dur[dips].sum()),
+                "Cwnd Median (KBytes)": float(ip["cwnd"].iloc[first:stop].median()),
+            }
+        )
+    if ip["retr"].notna().any():
+        span = float(ip["end"].iloc[-1] - ip["time"].iloc[0])
+        row["Retr"] = float(ip["retr"].sum())
+        row["Retr/s"] = row["Retr"] / span if span > 0 else np.nan
+    return row, ip, dips
+
+
+def plot_intervals(analysed, out_path):
+    """One panel per link: rate, warm-up, steady window, dips and Retr"""
+    if not analysed:
+        return
+    fig, axes = plt.subplots(
+        len(analysed), 1, figsize=(10, 2.6 * len(analysed)), squeeze=False
+    )
+    for ax, (label, (row, ip, dips)) in zip(axes[:, 0], analysed.items()):
+        t = ip["time"].to_numpy()
+        ax.plot(t, ip["value"], color=NORD_GREEN, linewidth=1.5, marker=".")
+        if row["Intervals"] and np.isfinite(row["Steady Start (s)"]):
+            ax.axvspan(t[0], row["Steady Start (s)"], color=NORD_YELLOW, alpha=0.3)
+            ax.axhline(
+                row["Sustained Bandwidth (Gbits/sec)"],
+                color=NORD_BLUE,
+                linestyle="--",
+                linewidth=1,
+            )
+        ax.plot(t[dips], ip["value"][dips], "v", color=NORD_RED, markersize=7)
+        if ip["retr"].notna().any() and ip["retr"].sum() > 0:
+            ax2 = ax.twinx()
+            ax2.bar(t, ip["retr"], width=0.6, color=NORD_RED, alpha=0.25)
+            ax2.set_ylabel("Retr", color=NORD_RED)
+        ax.set_title(
+            f"{label}: sustained {row['Sustained Bandwidth (Gbits/sec)']:.2f} "
+            f"Gbits/sec, CV {row['CV']:.3f}, {row['Dips']:.0f} dips, "
+            f"warm-up {row['Warm-up (s)']:.0f} s",
+            fontsize=10,
+            color=NORD_FG,
+        )
+        ax.set_ylabel("Gbits/sec", color=NORD_FG)
+        ax.grid(True, linestyle="--", alpha=0.5)
+    axes[-1, 0].set_xlabel("Time (s)", color=NORD_FG)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=150)
+    plt.close(fig)
+
+
+STREAM_COLUMNS = [
+    "Environment",
+    "Stream",
+    "Mean (Gbits/sec)",
+    "Share",
+    "Retr",
+    "RTT Median (ms)",
+    "Jain Index",
+]
+
+
+def jain_index(x):
+    """Jain's fairness of x: 1 when every stream gets the same, 1/n at worst"""
+    x = np.asarray(x, dtype=np.float64)
+    sq = float((x * x).sum())
+    return float(x.sum()) ** 2 / (len(x) * sq) if sq else np.nan
+
+
+def stream_breakdown(streams):
+    """
+    One row of STREAM_COLUMNS per stream of every link run with parallel
+    streams (-P). streams maps label -> per-stream intervals as loaded by
+    net.load_net_log; each stream's mean is over its full intervals, and
+    its share and the link's Jain index compare those means.
+    """
+    rows = []
+    for label, st in streams.items():
+        if st["stream"].nunique() < 2:
+            continue
+        per = [
+            (sid, full_intervals(g.drop(columns="stream")))
+            for sid, g in st.groupby("stream", sort=False)
+        ]
+        means = np.array([float(g["value"].mean()) for _, g in per])
+        fair = jain_index(means)
+        for (sid, g), mean in zip(per, means):
+            rows.append(
+                {
+                    "Environment": label,
+                    "Stream": sid,
+                    "Mean (Gbits/sec)": mean,
+                    "Share": mean / means.sum() if means.sum() else np.nan,
+                    "Retr": float(g["retr"].sum(min_count=1)),
+                    "RTT Median (ms)": float(g["rtt"].median()),
+                    "Jain Index": fair,
+                }
+            )
+    return pd.DataFrame(rows, columns=STREAM_COLUMNS)
+
+
+CLASS_RATIO = 2.0  # fastest / slowest link allowed within one speed class
+MAX_CLASSES = 8
+NO_BANDWIDTH = "no_bandwidth"  # class of the links with a zero or NaN rate
+
+
+def jenks_starts(x, k):
+    """
+    Jenks natural breaks of sorted x into up to k contiguous classes: the
+    split with the least total within-class sum of squared deviations, by
+    dynamic programming over prefix sums, each row vectorised over the
+    start of the last class. start[c, j] is where the last of c classes
+    over x[:j] starts; jenks_classes reads any c <= k back from it.
+    """
+    n = len(x)
+    s = np.concatenate([[0.0], np.cumsum(x)])
+    s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    cost = np.full((k + 1, n + 1), np.inf)
+    cost[0, 0] = 0.0
+    start = np.zeros((k + 1, n + 1), dtype=int)
+    for c in range(1, k + 1):
+        for j in range(c, n + 1):
+            i = np.arange(c - 1, j)
+            ssd = s2[j] - s2[i] - (s[j] - s[i]) ** 2 / (j - i)
+            v = cost[c - 1, c - 1 : j] + ssd
+            best = int(np.argmin(v))
+            cost[c, j] = v[best]
+            start[c, j] = c - 1 + best
+    return start
+
+
+def jenks_classes(x, k, start=None):
+    """
+    Start index of each of the k Jenks classes of sorted x; start is a
+    jenks_starts table for at least k classes, to reuse across k.
+    """
+    if start is None:
+        start = jenks_starts(x, k)
+    starts, j = [], len(x)
+    for c in range(k, 0, -1):
+        j = start[c, j]
+        starts.append(j)
+    return starts[::-1]
+
+
+def class_name(bandwidths):
+    """Class label from its median bandwidth, e.g. "128G" or "0.94G" """
+    return f"{np.median(bandwidths):.3g}G"
+
+
+def link_classes(bandwidth, k=None, ratio=CLASS_RATIO):
+    """
+    Group links into speed classes by Jenks natural breaks on log
+    bandwidth. Without k, the fewest classes are used in which the fastest
+    link is at most `ratio` times the slowest. bandwidth maps label ->
+    Gbits/sec; returns {class name: [labels]}, fastest class first, then
+    the links without a bandwidth as NO_BANDWIDTH. A class whose name is
+    already taken by a faster one gets its index appended.
+    """
+    idle = list(bandwidth.index[~(bandwidth > 0)])
+    bw = bandwidth[bandwidth > 0].sort_values(ascending=False)
+    if bw.empty:
+        return {NO_BANDWIDTH: idle} if idle else {}
+    x = np.log(bw.to_numpy()[::-1])
+    n = len(x)
+    start = jenks_starts(x, min(k or MAX_CLASSES, n))
+    if k is None:
+        for k in range(1, min(n, MAX_CLASSES) + 1):
+            bounds = jenks_classes(x, k, start) + [n]
+            spread = max(x[b - 1] - x[a] for a, b in zip(bounds, bounds[1:]))
+            if spread <= np.log(ratio):
+                break
+    bounds = jenks_classes(x, min(k, n), start) + [n]
+    labels = list(bw.index[::-1])
+    classes = {}
+    for i, (a, b) in enumerate(reversed(list(zip(bounds, bounds[1:]))), 1):
+        members = labels[a:b][::-1]
+        name = class_name(bw[members])
+        classes[f"{name}_{i}" if name in classes else name] = members
+    if idle:
+        classes[NO_BANDWIDTH] = idle
+    return classes
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Follow a growing net-benchmark log (like `tail -f`) and keep a rolling
+bandwidth/latency plot up to date while iperf3 and ping are still running.
+
+New lines are matched with the same patterns as net.py, samples go into
+fixed-size ring buffers, and the figure is redrawn at most once per
+--interval seconds. The file is read incrementally and never re-read.
+Samples are placed on the log's own clock (iperf3 interval start, ping
+icmp_seq), so content already in the file is not squeezed into its arrival
+instant, and each new iperf3 or ping run continues after the previous one.
+With parallel streams (iperf3 -P) only the [SUM] lines are plotted: stream
+lines wait for their [SUM] or the next interval to tell which case it is.
+
+    python net_follow.py ../results/vms/net/node_master.log --window 120
+"""
+import argparse
+import os
+import re
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from net import NORD_BLUE, NORD_FG, NORD_GREEN, NORD_RED, PING_RE, iperf_line
+
+ICMP_SEQ_RE = re.compile(r"icmp_seq=(\d+)")
+
+
+class RingBuffer:
+    """Last `size` (time, value) samples in preallocated arrays"""
+
+    __slots__ = ("t", "v", "size", "count", "pos")
+
+    def __init__(self, size):
+        self.t = np.empty(size)
+        self.v = np.empty(size)
+        self.size = size
+        self.count = 0  # samples seen in total
+        self.pos = 0  # next slot to write
+
+    def append(self, t, v):
+        self.t[self.pos] = t
+        self.v[self.pos] = v
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def arrays(self):
+        """Window contents in arrival order"""
+        if self.count <= self.size:
+            return self.t[: self.count], self.v[: self.count]
+        order = np.r_[self.pos : self.size, 0 : self.pos]
+        return self.t[order], self.v[order]
+
+    def stats(self):
+        """(last, mean, std, min, max) over the window, or None when empty"""
+        if not len(self):
+            return None
+        _, v = self.arrays()
+        return v[-1], v.mean(), v.std(), v.min(), v.max()
+
+
+class RunClock:
+    """
+    Log time of samples whose tool counts from 0 on every run: a run that
+    starts over continues where the previous one ended.
+    """
+
+    __slots__ = ("base", "last", "end")
+
+    def __init__(self):
+        self.base = 0.0
+        self.last = None  # start of the previous sample, in its run
+        self.end = 0.0  # end of the previous sample, in log time
+
+    def at(self, start, end):
+        """Log time of a sample covering [start, end] of its run"""
+        if self.last is not None and start < self.last:
+            self.base = self.end
+        self.last = start
+        self.end = self.base + end
+        return self.base + start
+
+
+class IntervalJoiner:
+    """
+    Whole-test iperf3 intervals: the [SUM] line when there are parallel
+    streams, the stream's own line otherwise. Stream lines are held until
+    their [SUM] or the next interval shows which of the two it is.
+    """
+
+    __slots__ = ("pending",)
+
+    def __init__(self):
+        self.pending = []
+
+    def feed(self, stream, iv):
+        """Intervals complete after this line"""
+        if stream == "SUM":
+            self.pending = []
+            return [iv]
+        done = self.flush() if self.pending and self.pending[0][0] != iv[0] else []
+        self.pending.append(iv)
+        return done
+
+    def flush(self):
+        """The held interval if it was a single stream's"""
+        done = self.pending if len(self.pending) == 1 else []
+        self.pending = []
+        return done
+
+
+def follow_lines(path, from_end=False, poll=0.2, idle_exit=0.0):
+    """
+    Yield complete lines appended to path as they arrive, and None whenever
+    there is nothing new (so the caller can redraw). A truncated file is
+    followed again from the start.
+    """
+    with open(path) as fh:
+        if from_end:
+            fh.seek(0, os.SEEK_END)
+        partial = ""
+        idle = 0.0
+        while True:
+            line = fh.readline()
+            if line:
+                partial += line
+                if partial.endswith("\n"):
+                    yield partial
+                    partial = ""
+                idle = 0.0
+                continue
+            if os.stat(path).st_size < fh.tell():
+                fh.seek(0)
+                partial = ""
+            yield None
+            if idle_exit and idle >= idle_exit:
+                return
+            time.sleep(poll)
+            idle += poll
+
+
+class LivePlot:
+    """Two-panel figure (bandwidth, latency) updated in place"""
+
+    def __init__(self, title, out_path):
+        self.out_path = out_path
+        self.fig, (self.ax_bw, self.ax_lat) = plt.subplots(
+            2, 1, figsize=(10, 7), sharex=True
+        )
+        self.fig.suptitle(title, fontsize=14, weight="bold", color=NORD_FG)
+        (self.bw_line,) = self.ax_bw.plot([], [], color=NORD_GREEN, linewidth=2)
+        (self.lat_line,) = self.ax_lat.plot(
+            [], [], color=NORD_BLUE, marker="o", linestyle="", markersize=3
+        )
+        self.bw_mean = self.ax_bw.axhline(0, color=NORD_RED, linestyle="--", alpha=0.7)
+        self.ax_bw.set_ylabel("Gbits/sec", color=NORD_FG)
+        self.ax_lat.set_ylabel("Latency (ms)", color=NORD_FG)
+        self.ax_lat.set_xlabel("Time in the log (s)", color=NORD_FG)
+        for ax in (self.ax_bw, self.ax_lat):
+            ax.grid(True, linestyle="--", alpha=0.5)
+
+    def draw(self, bw, lat):
+        for line, buf, ax in (
+            (self.bw_line, bw, self.ax_bw),
+            (self.lat_line, lat, self.ax_lat),
+        ):
+            t, v = buf.arrays()
+            line.set_data(t, v)
+            ax.relim()
+            ax.autoscale_view()
+        stats = bw.stats()
+        if stats:
+            last, mean, std, _, _ = stats
+            self.bw_mean.set_ydata([mean, mean])
+            self.ax_bw.set_title(
+                f"last {last:.2f}  mean {mean:.2f} ± {std:.2f} Gbits/sec "
+                f"({len(bw)} samples)",
+                fontsize=10,
+                color=NORD_FG,
+            )
+        stats = lat.stats()
+        if stats:
+            last, mean, std, _, hi = stats
+            self.ax_lat.set_title(
+                f"last {last:.3f}  mean {mean:.3f} ± {std:.3f}  max {hi:.3f} ms",
+                fontsize=10,
+                color=NORD_FG,
+            )
+        if plt.isinteractive():
+            plt.pause(0.001)
+        self.fig.savefig(self.out_path, dpi=100)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Follow an iperf3/ping log live")
+    ap.add_argument("log", help="net benchmark log being written")
+    ap.add_argument("--window", type=int, default=300, help="samples kept per series")
+    ap.add_argument(
+        "--interval", type=float, default=2.0, help="minimum seconds between redraws"
+    )
+    ap.add_argument("--out", default=None, help="PNG refreshed on every redraw")
+    ap.add_argument("--from-end", action="store_true", help="skip existing content")
+    ap.add_argument(
+        "--ping-interval",
+        type=float,
+        default=1.0,
+        help="seconds between pings (ping -i) for the latency time axis",
+    )
+    ap.add_argument(
+        "--idle-exit",
+        type=float,
+        default=0.0,
+        help="stop after this many seconds without new lines (0 = never)",
+    )
+    ap.add_argument("--show", action="store_true", help="also open a live window")
+    args = ap.parse_args()
+
+    name = os.path.splitext(os.path.basename(args.log))[0]
+    out_path = args.out or os.path.join("plots/network", f"live_{name}.png")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    if args.show:
+        plt.ion()
+
+    bw = RingBuffer(args.window)
+    lat = RingBuffer(args.window)
+    plot = LivePlot(f"Live: {name}", out_path)
+    bw_clock = RunClock()
+    lat_clock = RunClock()
+    joiner = IntervalJoiner()
+    last_draw = 0.0
+    dirty = False
+
+    def add_intervals(ivs):
+        for iv in ivs:
+            bw.append(bw_clock.at(iv[0], iv[1]), iv[2])
+        return bool(ivs)
+
+    print(f"👀 Following {args.log} (Ctrl-C to stop), plot: {out_path}")
+
+    try:
+        for line in follow_lines(args.log, args.from_end, idle_exit=args.idle_exit):
+            now = time.monotonic()
+            if line is not None:
+                if "bits/sec" in line:
+                    parsed = iperf_line(line)
+                    if parsed:
+                        stream, side, iv = parsed
+                        # The totals end the run's intervals
+                        done = joiner.flush() if side else joiner.feed(stream, iv)
+                        dirty = add_intervals(done) or dirty
+                        continue
+                if "icmp_seq" in line:
+                    m = PING_RE.search(line)
+                    seq = ICMP_SEQ_RE.search(line)
+                    if m and seq:
+                        k = int(seq.group(1))
+                        t = lat_clock.at(
+                            (k - 1) * args.ping_interval, k * args.ping_interval
+                        )
+                        lat.append(t, float(m.group(1)))
+                        dirty = True
+            if dirty and now - last_draw >= args.interval:
+                plot.draw(bw, lat)
+                last_draw = now
+                dirty = False
+    except KeyboardInterrupt:
+        pass
+    dirty = add_intervals(joiner.flush()) or dirty
+    if dirty:
+        plot.draw(bw, lat)
+    plt.close(plot.fig)
+
+    for label, buf, unit in (("bandwidth", bw, "Gbits/sec"), ("latency", lat, "ms")):
+        stats = buf.stats()
+        if stats:
+            _, mean, std, lo, hi = stats
+            print(
+                f"📈 {label}: {buf.count} samples, last {len(buf)}: "
+                f"mean {mean:.3f} ± {std:.3f} {unit} (min {lo:.3f}, max {hi:.3f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
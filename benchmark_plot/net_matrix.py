@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+All-pairs (N×N) network matrix between the hosts of an MPI hostfile.
+
+pair_rounds() orders the links with the circle method of a round-robin
+tournament: in every round each host is in at most one link, as the
+iperf3 client or as the server, so the links of a round run side by side
+without sharing a NIC or an iperf3 server. N hosts take 2(N - 1) rounds
+(2N for odd N) instead of N(N - 1) runs one after the other. runner.py's
+matrix benchmark runs them, after every host against itself, and writes
+one log per link, results/<env>/net/<src>_<dst>.log, which net.py reads
+like any other link.
+
+net.py then pivots the links of every environment into src × dst tables
+(matrices) and draws them as heatmaps, where a slow link shows up as a
+cold cell and a bad bridge or NIC as a cold row or column:
+plots/network/bw_matrix_<env>.csv/.png and latency_matrix_<env>.csv/.png.
+"""
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.colors import LinearSegmentedColormap
+
+# Nord palette, as in net.py
+NORD_RED = "#BF616A"
+NORD_GREEN = "#A3BE8C"
+NORD_YELLOW = "#EBCB8B"
+NORD_GRAY = "#D8DEE9"
+NORD_FG = "#2E3440"
+
+NORD_CMAP = LinearSegmentedColormap.from_list(
+    "nord", [NORD_RED, NORD_YELLOW, NORD_GREEN]
+)
+
+# (summary column, file prefix, higher is better)
+MATRIX_METRICS = [
+    ("Avg Bandwidth (Gbits/sec)", "bw", True),
+    ("p50 Latency (ms)", "latency", False),
+]
+SLOW_FRAC = 0.5  # a link under half the median of its matrix is slow
+SELF = "loopback"  # runner.py's "<host>_loopback" link
+
+
+def read_hostfile(path):
+    """(host, slots) of every entry of an MPI hostfile"""
+    hosts = []
+    with open(path) as fh:
+        for line in fh:
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            slots = 1
+            for f in fields[1:]:
+                if f.startswith("slots="):
+                    slots = int(f.split("=", 1)[1])
+            hosts.append((fields[0], slots))
+    return hosts
+
+
+def pair_rounds(hosts):
+    """
+    Rounds of (client, server) pairs covering every ordered pair of
+    distinct hosts once, with no host twice in a round
+    """
+    ring = list(hosts)
+    if len(ring) % 2:
+        ring.append(None)  # the host paired with None sits the round out
+    n = len(ring)
+    rounds = []
+    for _ in range(n - 1):
+        pairs = [(ring[i], ring[n - 1 - i]) for i in range(n // 2)]
+        rounds.append([p for p in pairs if None not in p])
+        # Keep the first host in place and rotate the others
+        ring = [ring[0], ring[-1]] + ring[1:-1]
+    rounds = [r for r in rounds if r]
+    return rounds + [[(b, a) for a, b in r] for r in rounds]
+
+
+def split_label(label):
+    """(src, dst, env) of a "src_dst (env)" link label, None for other labels"""
+    name, _, env = label.rpartition(" ")
+    hosts = name.split("_")
+    if len(hosts) != 2 or not all(hosts):
+        return None
+    src, dst = hosts
+    return src, src if dst == SELF else dst, env.strip("()")
+
+
+def matrices(df, column, hosts=None):
+    """
+    {env: src × dst table of column} of a net summary indexed by link
+    label, for the environments with at least two hosts. hosts (e.g. the
+    hostfile's) keeps only the links between them, in that order; by
+    default every "src_dst" link is used, hosts in order of appearance.
+    """
+    links = []
+    for label, value in df[column].items():
+        parsed = split_label(label)
+        if parsed:
+            links.append(parsed + (value,))
+    if not links:
+        return {}
+    long = pd.DataFrame(links, columns=["src", "dst", "env", "value"])
+    if hosts:
+        long = long[long["src"].isin(hosts) & long["dst"].isin(hosts)]
+    out = {}
+    for env, g in long.groupby("env", sort=False):
+        order = list(dict.fromkeys(list(hosts or []) + g["src"].tolist()))
+        order += [h for h in dict.fromkeys(g["dst"]) if h not in order]
+        if len(order) < 2:
+            continue
+        m = g.pivot_table(index="src", columns="dst", values="value", aggfunc="mean")
+        m = m.reindex(index=order, columns=order)
+        m.index.name, m.columns.name = "src", "dst"
+        out[env] = m
+    return out
+
+
+def slow_links(m, frac=SLOW_FRAC, higher_is_better=True):
+    """(src, dst, value) of the off-diagonal cells of m under frac of their median"""
+    off = m.where(~np.eye(len(m), dtype=bool)).stack().dropna()
+    if off.empty:
+        return []
+    med = off.median()
+    bad = off < frac * med if higher_is_better else off > med / frac
+    return [(src, dst, v) for (src, dst), v in off[bad].items()]
+
+
+def plot_heatmap(m, title, out_path, higher_is_better=True):
+    """
+    m as an annotated heatmap: green is good, red bad, gray not measured.
+    The scale runs from 0 to the largest value off the diagonal, so a
+    fast loopback diagonal does not wash out the links between hosts.
+    """
+    n = len(m)
+    off = m.where(~np.eye(n, dtype=bool)).stack().dropna()
+    vmax = off.max() if not off.empty else None
+    size = max(4.0, 0.6 * n + 2)
+    fig, ax = plt.subplots(figsize=(size + 1.5, size))
+    cmap = NORD_CMAP if higher_is_better else NORD_CMAP.reversed()
+    cmap = cmap.with_extremes(bad=NORD_GRAY)
+    values = np.ma.masked_invalid(m.to_numpy(dtype=float))
+    im = ax.imshow(values, cmap=cmap, vmin=0, vmax=vmax)
+    fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    if n <= 24:
+        for i, j in zip(*np.nonzero(~values.mask)):
+            ax.text(
+                j,
+                i,
+                f"{values[i, j]:.3g}",
+                ha="center",
+                va="center",
+                fontsize=8,
+                color=NORD_FG,
+            )
+    ax.set_xticks(range(n), m.columns, rotation=45, ha="right")
+    ax.set_yticks(range(n), m.index)
+    ax.set_xlabel("Server (dst)", color=NORD_FG)
+    ax.set_ylabel("Client (src)", color=NORD_FG)
+    ax.set_title(title, color=NORD_FG)
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=150)
+    plt.close(fig)
+
+
+def save_matrices(df, out_dir, hosts=None):
+    """
+    CSV and heatmap of every MATRIX_METRICS column of the net summary df,
+    per environment; prints the slow links. Returns the paths written.
+    """
+    written = []
+    for column, prefix, higher in MATRIX_METRICS:
+        if column not in df:
+            continue
+        for env, m in matrices(df, column, hosts).items():
+            base = os.path.join(out_dir, f"{prefix}_matrix_{env}")
+            m.to_csv(base + ".csv")
+            plot_heatmap(m, f"{column} ({env})", base + ".png", higher)
+            written += [base + ".csv", base + ".png"]
+            for src, dst, v in slow_links(m, higher_is_better=higher):
+                print(f"🐢 {env} {src} -> {dst}: {v:.3g} {column}")
+    return written
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Machine-readable benchmark records, kept next to the human logs.
+
+A records file has the name of its log with a .jsonl suffix
+(results/vms/net/node_master.log -> node_master.jsonl) and holds one JSON
+object per tool run:
+
+    {"tool": "iperf3", "intervals": [[start, end, Gbits/s, retr, cwnd KB]],
+     "streams": [[stream, start, ..., cwnd KB, rtt ms]],
+     "totals": [[stream, side, start, end, Gbits/s, retr]]}
+    {"tool": "ping", "histogram": <stats.LogHistogram state>}
+    {"tool": "sysbench" | "stress-ng", "env": ..., "samples": {metric: [...]}}
+    {"tool": "iozone", "section": "local", "columns": [...], "rows": [...]}
+
+plus "version" and "timestamp". runner.py --results writes them while the
+tools run: iperf3 through --json and stress-ng through --yaml (its text is
+read from the pipe under mpirun, where every rank writes the YAML file on
+its own host), while sysbench and iozone, which have no structured output,
+are read once from their own pipes. In full
+mode cpu_mem.py, net.py and disk.py load a log's records file instead of
+the log when there is one, so no text is scraped on that path; the
+--incremental mode keeps following the text logs.
+"""
+import json
+import math
+import os
+import time
+
+import cache
+
+SUFFIX = ".jsonl"
+VERSION = 1
+
+
+def path_for(log_path):
+    """Records file of a log"""
+    return os.path.splitext(log_path)[0] + SUFFIX
+
+
+def prefer(log_path):
+    """The records file of log_path when there is one, else the log itself"""
+    rec = path_for(log_path)
+    return rec if os.path.exists(rec) else log_path
+
+
+def is_records(path):
+    return path.endswith(SUFFIX)
+
+
+def _json_value(v):
+    # NaN is not valid JSON, so missing numbers are written as null
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    if isinstance(v, (list, tuple)):
+        return [_json_value(x) for x in v]
+    if isinstance(v, dict):
+        return {k: _json_value(x) for k, x in v.items()}
+    return v
+
+
+def append(path, recs):
+    """Append records (dicts with a "tool") to the records file at path"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(path, "a") as fh:
+        for rec in recs:
+            rec = {"version": VERSION, "timestamp": stamp, **rec}
+            fh.write(json.dumps(_json_value(rec)) + "\n")
+
+
+def read(path):
+    """Every record of a records file, in file order"""
+    with cache.open_source(path) as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Flag benchmark regressions of the current metric store against a baseline.
+
+    python regress.py --save-baseline   # after a known-good run
+    python regress.py                   # after the next image or kernel
+
+Rows are matched per (family, env, role, section, metric), and whether a
+change is worse comes from each row's direction (hpcc.LOWER_IS_BETTER and
+cpu_mem.LOWER_IS_BETTER). Per section the change is the relative
+difference of the medians over runs, signed so that positive is worse; a
+metric's change is the median over its sections (IOzone has one per file
+and record size). It only regresses past --threshold and, where the noise
+is known, past --sigmas robust standard errors: from the baseline MAD with
+three or more runs, from the spread of the per-section changes with three
+or more sections, or from the _std/_n that cpu_mem stores next to each
+mean. Every comparison goes to plots/regressions.json, and the exit code
+is 1 when a hot metric regressed.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import disk
+import hpcc
+import store
+
+BASELINE_BASE = os.path.join(os.path.dirname(store.STORE_BASE), "baseline_store")
+REPORT_PATH = os.path.join(os.path.dirname(store.STORE_BASE), "regressions.json")
+
+# Metrics that fail the check; the others are only reported
+HOT_METRICS = {
+    "hpcc": hpcc.IMPORTANT_METRICS + ["HPL_Gflops"],
+    "cpu_mem": ["events_per_sec", "lat_avg_ms", "mem_mb_sec", "bogo_ops_per_sec"],
+    "disk": disk.METRICS,
+    "net": [
+        "Avg Bandwidth (Gbits/sec)",
+        "Sustained Bandwidth (Gbits/sec)",
+        "Avg Latency (ms)",
+        "p99 Latency (ms)",
+    ],
+}
+
+KEYS = ["family", "env", "role", "section", "metric"]
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+MEDIAN_SE = math.sqrt(math.pi / 2)  # standard error of a median / of a mean
+
+
+def mad(values):
+    v = np.asarray(values, dtype=np.float64)
+    return float(np.median(np.abs(v - np.median(v)))) if v.size else math.nan
+
+
+def samples(rows):
+    """Store rows as plain strings, with the _std and _n stored next to them"""
+    df = rows.astype({c: str for c in store.CATEGORIES}).reset_index(drop=True)
+    ids = ["family", "run_id", "env", "role", "section"]
+    lookup = df.set_index(ids + ["metric"])["value"]
+    lookup = lookup[~lookup.index.duplicated()]
+    for suffix in ("std", "n"):
+        named = df[ids].assign(metric=df["metric"] + f"_{suffix}")
+        keys = pd.MultiIndex.from_frame(named)
+        df[suffix] = lookup.reindex(keys).to_numpy()
+    return df
+
+
+def section_changes(baseline, current):
+    """Baseline and current medians per (family, env, role, section, metric)"""
+    agg = {
+        "median": ("value", "median"),
+        "mad": ("value", mad),
+        "runs": ("value", "size"),
+        "std": ("std", "first"),
+        "n": ("n", "first"),
+    }
+    b = samples(baseline).groupby(KEYS).agg(**agg).add_prefix("base_")
+    c = samples(current).groupby(KEYS).agg(direction=("direction", "first"), **agg)
+    t = b.join(c.add_prefix("cur_"), how="inner").reset_index()
+    t = t.rename(columns={"cur_direction": "direction"})
+
+    scale = t["base_median"].abs().replace(0, np.nan)
+    sign = np.where(t["direction"] == "lower", 1.0, -1.0)
+    t["change"] = sign * (t["cur_median"] - t["base_median"]) / scale
+    # Noise of that change, relative to the baseline
+    from_mad = (
+        MEDIAN_SE
+        * MAD_SCALE
+        * t["base_mad"]
+        * np.sqrt(1 / t["base_runs"] + 1 / t["cur_runs"])
+    )
+    from_std = np.sqrt(
+        t["base_std"] ** 2 / t["base_n"] + t["cur_std"] ** 2 / t["cur_n"]
+    )
+    t["sigma"] = from_mad.where(t["base_runs"] >= 3, from_std) / scale
+    return t
+
+
+def metric_changes(sections, threshold=0.05, sigmas=3.0, hot=HOT_METRICS):
+    """One verdict per (family, env, role, metric)"""
+    rows = []
+    for (family, env, role, metric), grp in sections.groupby(
+        ["family", "env", "role", "metric"]
+    ):
+        grp = grp.dropna(subset=["change"])
+        if grp.empty:
+            continue
+        if len(grp) == 1:
+            change, sigma = grp["change"].iloc[0], grp["sigma"].iloc[0]
+        else:
+            change = grp["change"].median()
+            sigma = (
+                MEDIAN_SE * MAD_SCALE * mad(grp["change"]) / math.sqrt(len(grp))
+                if len(grp) >= 3
+                else math.nan
+            )
+        noisy = np.isfinite(sigma) and abs(change) <= sigmas * sigma
+        if abs(change) <= threshold or noisy:
+            verdict = "unchanged"
+        else:
+            verdict = "regressed" if change > 0 else "improved"
+        rows.append(
+            {
+                "family": family,
+                "env": env,
+                "role": role,
+                "metric": metric,
+                "direction": grp["direction"].iloc[0],
+                "sections": len(grp),
+                "baseline": float(grp["base_median"].median()),
+                "current": float(grp["cur_median"].median()),
+                "change": float(change),
+                "sigma": float(sigma),
+                "verdict": verdict,
+                "hot": hot is None or metric in hot.get(family, ()),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def write_report(path, result, args):
+    records = result.astype(object).where(result.notna(), None)
+    failed = (result["verdict"] == "regressed") & result["hot"]
+    report = {
+        "baseline": args.baseline,
+        "threshold": args.threshold,
+        "sigmas": args.sigmas,
+        "checked": len(result),
+        "regressions": records[failed].to_dict(orient="records"),
+        "metrics": records.to_dict(orient="records"),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"💾 Saved: {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check the metric store for regressions")
+    ap.add_argument("--baseline", default=BASELINE_BASE, help="baseline store path")
+    ap.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="make the current metric store the baseline and exit",
+    )
+    ap.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="relative change that counts as a regression (default 5%%)",
+    )
+    ap.add_argument(
+        "--sigmas",
+        type=float,
+        default=3.0,
+        help="robust standard errors a change must also exceed, where known",
+    )
+    ap.add_argument("--family", action="append", help="only check these families")
+    ap.add_argument(
+        "--all-metrics",
+        action="store_true",
+        help="fail on any metric, not only the hot ones",
+    )
+    ap.add_argument("--report", default=REPORT_PATH, help="JSON report path")
+    args = ap.parse_args()
+
+    current = store.load_store()
+    if args.save_baseline:
+        if current.empty:
+            raise SystemExit("❌ The metric store is empty, run the scripts first")
+        path = store.write_store(current, args.baseline)
+        print(f"📌 Baseline of {len(current)} rows saved to {path}")
+        return
+
+    baseline = store.load_store(args.baseline)
+    if baseline.empty:
+        print(f"❌ No baseline at {args.baseline}, create one with --save-baseline")
+        sys.exit(2)
+    if args.family:
+        baseline = store.query(baseline, family=args.family)
+        current = store.query(current, family=args.family)
+
+    result = metric_changes(
+        section_changes(baseline, current),
+        args.threshold,
+        args.sigmas,
+        hot=None if args.all_metrics else HOT_METRICS,
+    )
+    if result.empty:
+        raise SystemExit("❌ Nothing in common between the baseline and the store")
+
+    shown = ["family", "env", "role", "metric", "baseline", "current", "change"]
+    for verdict, icon in (("improved", "📈"), ("regressed", "📉")):
+        rows = result[(result["verdict"] == verdict) & result["hot"]]
+        if not rows.empty:
+            print(f"\n{icon} {verdict.capitalize()} (change > 0 is worse):")
+            print(rows[shown].to_string(index=False, float_format="{:.4g}".format))
+    write_report(args.report, result, args)
+
+    failed = result[(result["verdict"] == "regressed") & result["hot"]]
+    print(
+        f"\n🔎 {len(result)} metrics checked, {int(result['hot'].sum())} hot, "
+        f"{len(failed)} regressed past {args.threshold:.0%}"
+    )
+    if not failed.empty:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
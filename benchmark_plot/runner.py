@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Run the benchmarks from Python and parse their output while it streams.
+
+run-all.sh starts cpu, mem and net in the background on the same cores and
+tees everything into one log. Here every benchmark holds a set of
+resources while it runs (RESOURCES): cpu, mem and hpl all take "cores", so
+they run one after the other, while net and disk run next to them. A job
+starts as soon as none of its resources is held, in the order given;
+--serial runs one job at a time. Each tool gets its own stdout pipe
+(stderr merged in, like the scripts' 2>&1) that is read line by line
+straight into the parsers of cpu_mem.py, net.py, disk.py and hpcc.py, with
+no log file in between, and the results replace their runs in the metric
+store. hpcc always writes hpccoutf.txt, so for hpl the part of that file
+written during the run is parsed once it exits.
+
+With --results DIR every job also leaves a human log and a records file
+(records.py) where the plotting scripts look for them, e.g.
+DIR/vms/net/node-04_master.log and .jsonl; iperf3 runs with --json,
+stress-ng with --yaml (PyYAML), and the hpl output is appended to
+DIR/<env>/hpccoutf.txt.
+
+    python runner.py cpu,mem,net --env containers --results ../results
+    python runner.py all --hostfile configs/mpi-hostfile --dry-run
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+try:
+    import yaml
+
+    HAVE_YAML = True
+except ImportError:
+    HAVE_YAML = False
+
+import cpu_mem
+import disk
+import hpcc
+import net
+import net_matrix
+import records
+import store
+import warehouse
+from stats import RunningStats
+
+BENCHMARKS = ["cpu", "mem", "net", "hpl", "disk"]
+EXTRA_BENCHMARKS = ["matrix"]  # not part of "all"
+DEFAULT_BENCHMARKS = "cpu,mem,net,hpl"  # the run-all.sh default
+ENVS = {"host": "host", "vms": "vm", "containers": "container"}
+
+# Same tools and parameters as Containers/Performance_Testing/bin
+SYSBENCH_CPU = ["sysbench", "cpu", "--cpu-max-prime=30000", "--threads=2", "run"]
+STRESS_CPU = ["stress-ng", "--cpu", "2", "--timeout", "60s", "--metrics-brief"]
+SYSBENCH_MEM = [
+    "sysbench",
+    "memory",
+    "--memory-block-size=1M",
+    "--threads=2",
+    "--memory-total-size=500M",
+    "run",
+]
+STRESS_MEM = [
+    "stress-ng",
+    "--vm",
+    "2",
+    "--vm-bytes",
+    "500M",
+    "--timeout",
+    "60s",
+    "--metrics-brief",
+]
+IPERF = ["iperf3", "-t", "30", "--json", "-c"]
+PING = ["ping", "-c", "50", "-i", "0.2"]
+IOZONE = ["iozone", "-a", "-f"]
+LOCAL_FILE = "/tmp/iozone_local.tmp"
+SHARED_MOUNT = "/shared"
+HPCC_OUT = "hpccoutf.txt"
+
+# Held by a benchmark while it runs; jobs sharing a resource never overlap
+RESOURCES = {
+    "cpu": {"cores"},
+    "mem": {"cores", "memory"},
+    "hpl": {"cores", "memory"},
+    "net": set(),  # per link, see link_resources
+    "disk": {"disk"},
+}
+# Columns printed per benchmark at the end (disk: see disk.py's plots)
+SHOWN = {
+    "cpu": cpu_mem.SAMPLE_METRICS,
+    "mem": cpu_mem.SAMPLE_METRICS,
+    "hpl": ["RunID"] + hpcc.IMPORTANT_METRICS,
+    "disk": [],
+}
+BATCH_LINES = 4096  # cpu/mem lines handed to the scanner at once
+
+
+def link_resources(src, dst):
+    """
+    Both ends of a network link: a host's NIC is shared by every link it is
+    in, and its iperf3 server answers one client at a time, so net and
+    matrix jobs sharing a host never overlap
+    """
+    return {f"host:{src}", f"host:{dst}"}
+
+
+def build_jobs(benchmarks, args):
+    """
+    Job dicts in run order: name, kind, label, resources, steps as (argv,
+    tag) pairs, cwd, and its log and records path under --results without
+    the suffix
+    """
+    env = ENVS[args.env]
+    hosts = net_matrix.read_hostfile(args.hostfile) if args.hostfile else []
+    mpi = ["mpirun", "--hostfile", args.hostfile] if hosts else []
+    results = os.path.join(args.results, args.env) if args.results else None
+    iperf = IPERF[:-1] + ["-P", str(args.streams), "-c"] if args.streams > 1 else IPERF
+    jobs = []
+
+    def add(name, kind, label, steps, log=None, cwd=None, resources=None):
+        jobs.append(
+            {
+                "name": name,
+                "kind": kind,
+                "label": label,
+                "env": args.env,
+                "resources": set(resources or RESOURCES[kind]),
+                "steps": steps,
+                "cwd": cwd,
+                "results": results,
+                "log": os.path.join(results, log) if results and log else None,
+                "errors": [],
+            }
+        )
+
+    for bench in benchmarks:
+        if bench == "cpu":
+            steps = [(mpi + SYSBENCH_CPU, "sysbench")]
+            steps.append((mpi + STRESS_CPU, "stress-ng"))
+            add("cpu", "cpu", f"{args.env}_cpu", steps, "cpu/cpu")
+        elif bench == "mem":
+            steps = [(mpi + SYSBENCH_MEM, "sysbench")]
+            steps.append((mpi + STRESS_MEM, "stress-ng"))
+            add("mem", "mem", f"{args.env}_mem", steps, "mem/mem")
+        elif bench == "net":
+            # Every node against the master, one at a time, and the master
+            # against itself (run-all.sh started them all at once)
+            master = hosts[0][0] if hosts else args.role
+            link = f"{args.role}_loopback"
+            steps = [(iperf + ["127.0.0.1"], "iperf3")]
+            steps.append((PING + ["127.0.0.1"], "ping"))
+            add(
+                f"net {args.role}->self",
+                "net",
+                f"{link} ({env})",
+                steps,
+                f"net/{link}",
+                resources=link_resources(master, master),
+            )
+            for host, _ in hosts[1:]:
+                remote = ["mpirun", "-np", "1", "--host", host]
+                link = f"{host}_{master}"
+                steps = [(remote + iperf + [master], "iperf3")]
+                steps.append((remote + PING + [master], "ping"))
+                add(
+                    f"net {host}->{master}",
+                    "net",
+                    f"{link} ({env})",
+                    steps,
+                    f"net/{link}",
+                    resources=link_resources(host, master),
+                )
+        elif bench == "matrix":
+            # Every ordered pair of hosts in net_matrix.pair_rounds order,
+            # after each host against itself; a link holds both of its
+            # hosts, so the links of a round run together
+            names = [h for h, _ in hosts]
+            if len(names) < 2:
+                print("⚠️ matrix needs a --hostfile with two or more hosts, skip")
+                continue
+            rounds = [[(h, h) for h in names]] + net_matrix.pair_rounds(names)
+            for r, pairs in enumerate(rounds):
+                for src, dst in pairs:
+                    remote = ["mpirun", "-np", "1", "--host", src]
+                    target = "127.0.0.1" if src == dst else dst
+                    link = f"{src}_{dst}"
+                    steps = [(remote + iperf + [target], "iperf3")]
+                    steps.append((remote + PING + [target], "ping"))
+                    add(
+                        f"net r{r} {src}->{dst}",
+                        "net",
+                        f"{link} ({env})",
+                        steps,
+                        f"net/{link}",
+                        resources=link_resources(src, dst),
+                    )
+        elif bench == "disk":
+            steps = [(IOZONE + [LOCAL_FILE], ("local", LOCAL_FILE))]
+            if os.path.isdir(SHARED_MOUNT):
+                shared = os.path.join(SHARED_MOUNT, "iozone_shared.tmp")
+                steps.append((IOZONE + [shared], ("shared", shared)))
+            log = f"disk/{args.role}_disk"
+            add("disk", "disk", f"{args.role} ({env})", steps, log)
+        elif bench == "hpl":
+            np_ = args.np or sum(s for _, s in hosts) or os.cpu_count() or 1
+            argv = ["mpirun", "-np", str(np_)] + mpi[1:] + ["hpcc"]
+            add("hpl", "hpl", args.env, [(argv, "hpcc")], cwd=args.hpcc_dir)
+        else:
+            print(f"⚠️ Invalid benchmark name '{bench}', skipping")
+    if args.serial:
+        for job in jobs:
+            job["resources"].add("serial")
+    return jobs
+
+
+def tool_output(argv, job):
+    """
+    Lines of one tool's stdout (and stderr) from its own pipe, copied to
+    the job's human log when it has one
+    """
+    try:
+        proc = subprocess.Popen(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=job["cwd"],
+            text=True,
+            errors="replace",
+        )
+    except FileNotFoundError:
+        job["errors"].append(f"{argv[0]} not found")
+        return
+    log = job.get("log_fh")
+    with proc:
+        for line in proc.stdout:
+            if log:
+                log.write(line)
+            yield line
+    if proc.returncode:
+        job["errors"].append(f"{' '.join(argv)} exited with {proc.returncode}")
+
+
+def batches(lines, size):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch = []
+    yield "".join(batch)
+
+
+def stress_ng_yaml(path):
+    """
+    bogo ops/s (real time) of the vm stressor in a stress-ng --yaml file,
+    the sample cpu_mem.scan_text takes from the --metrics-brief table
+    """
+    with open(path) as fh:
+        doc = yaml.safe_load(fh) or {}
+    return [
+        float(m["bogo-ops-per-second-real-time"])
+        for m in doc.get("metrics") or []
+        if m.get("stressor") == "vm" and "bogo-ops-per-second-real-time" in m
+    ]
+
+
+def scan_tool(argv, tool, job, samples):
+    """
+    Fill samples from one cpu/mem step. stress-ng writes its metrics to a
+    --yaml file, except under mpirun, where every rank would write it on
+    its own host, or without PyYAML: its text output is scanned then.
+    """
+    if tool != "stress-ng" or not HAVE_YAML or argv[0] == "mpirun":
+        for text in batches(tool_output(argv, job), BATCH_LINES):
+            cpu_mem.scan_text(text, samples)
+        return
+    fd, path = tempfile.mkstemp(prefix="stress-ng-", suffix=".yaml")
+    os.close(fd)
+    try:
+        for _ in tool_output(argv + ["--yaml", path], job):
+            pass  # copied to the human log
+        try:
+            samples["bogo_ops_per_sec"].extend(stress_ng_yaml(path))
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            job["errors"].append(f"stress-ng --yaml: {e}")
+    finally:
+        os.remove(path)
+
+
+def parse_cpu_mem(job):
+    acc = {m: RunningStats() for m in cpu_mem.SAMPLE_METRICS}
+    recs = []
+    for argv, tool in job["steps"]:
+        samples = {m: [] for m in cpu_mem.SAMPLE_METRICS}
+        scan_tool(argv, tool, job, samples)
+        for m in cpu_mem.SAMPLE_METRICS:
+            acc[m].extend(samples[m])
+        keep = {m: samples[m] for m in cpu_mem.SAMPLE_METRICS if samples[m]}
+        recs.append({"tool": tool, "env": job["env"], "samples": keep})
+    df = pd.DataFrame(
+        [cpu_mem.summary_row(acc, job["env"])],
+        index=pd.Index([job["label"]], name="label"),
+        columns=cpu_mem.SUMMARY_COLUMNS,
+    )
+    return df, cpu_mem.store_rows(df), recs
+
+
+def iperf3_json(argv, job):
+    """
+    (intervals, streams, totals) rows of an `iperf3 --json` run (see
+    net.iperf_json), all empty when it failed
+    """
+    text = "".join(tool_output(argv, job))
+    try:
+        doc = json.loads(text)
+    except ValueError:
+        job["errors"].append("iperf3 did not print a JSON document")
+        return [], [], []
+    if "error" in doc:
+        job["errors"].append(f"iperf3: {doc['error']}")
+    return net.iperf_json(doc)
+
+
+def parse_net(job):
+    rows = ([], [], [])
+    hist = net.ping_histogram()
+    for argv, tool in job["steps"]:
+        if tool == "iperf3":
+            for acc, new in zip(rows, iperf3_json(argv, job)):
+                acc.extend(new)
+        else:
+            net.record_pings(hist, tool_output(argv, job))
+    row, _ = net.link_summary(job["label"], net.iperf_tables(*rows), hist)
+    df = pd.DataFrame([row]).set_index("Environment")
+    intervals, streams, totals = rows
+    recs = [
+        {
+            "tool": "iperf3",
+            "intervals": intervals,
+            "streams": streams,
+            "totals": totals,
+        },
+        {"tool": "ping", "histogram": hist.to_state()},
+    ]
+    return df, net.store_rows(df), recs
+
+
+def parse_disk(job):
+    frames = []
+    recs = []
+    for argv, (section, path) in job["steps"]:
+        text = "".join(tool_output(argv, job))
+        if os.path.exists(path):
+            os.remove(path)
+        for df in disk.parse_iozone(text, disk.METRICS, section=section):
+            if df.empty:
+                continue
+            columns = ["kB", "reclen"] + disk.METRICS
+            recs.append(
+                {
+                    "tool": "iozone",
+                    "section": df["section"].iloc[0],
+                    "columns": columns,
+                    "rows": df[columns].to_numpy().tolist(),
+                }
+            )
+            frames.append(disk.label_columns(df, job["label"]))
+    if not frames:
+        return pd.DataFrame(), store.empty(), recs
+    long_df = disk.long_form(pd.concat(frames, ignore_index=True))
+    return long_df, disk.store_rows(long_df), recs
+
+
+def parse_hpl(job):
+    """
+    hpccoutf.txt is hpcc's own key=value record, so its new part is parsed
+    and, with --results, appended to <results>/<env>/hpccoutf.txt
+    """
+    out = os.path.join(job["cwd"] or ".", HPCC_OUT)
+    start = os.path.getsize(out) if os.path.exists(out) else 0
+    for argv, _ in job["steps"]:
+        for _ in tool_output(argv, job):
+            pass
+    if not os.path.exists(out):
+        job["errors"].append(f"no {out} written")
+        return pd.DataFrame(), store.empty(), []
+    with open(out) as fh:
+        if os.path.getsize(out) >= start:
+            fh.seek(start)
+        text = fh.read()
+    if job["results"]:
+        os.makedirs(job["results"], exist_ok=True)
+        with open(os.path.join(job["results"], HPCC_OUT), "a") as fh:
+            fh.write(text)
+    lines = text.splitlines(keepends=True)
+    tables = hpcc.records_to_frames(
+        hpcc.iter_hpcc_lines(lines, job["label"]), job["label"]
+    )
+    if tables["summary"].empty:
+        return tables["summary"], store.empty(), []
+    rows = hpcc.store_rows(tables["summary"], tables["trials"])
+    return tables["summary"], rows, []
+
+
+PARSERS = {
+    "cpu": parse_cpu_mem,
+    "mem": parse_cpu_mem,
+    "net": parse_net,
+    "disk": parse_disk,
+    "hpl": parse_hpl,
+}
+
+
+def run_job(job):
+    print(f"▶️ {job['name']} started")
+    t0 = time.perf_counter()
+    if job["log"]:
+        os.makedirs(os.path.dirname(job["log"]), exist_ok=True)
+        job["log_fh"] = open(job["log"] + ".log", "a")
+    try:
+        table, rows, recs = PARSERS[job["kind"]](job)
+    finally:
+        if job.get("log_fh"):
+            job.pop("log_fh").close()
+    if job["log"] and recs:
+        records.append(job["log"] + records.SUFFIX, recs)
+    job["seconds"] = time.perf_counter() - t0
+    for err in job["errors"]:
+        print(f"❌ {job['name']}: {err}")
+    icon = "⚠️" if job["errors"] else "✅"
+    print(f"{icon} {job['name']} done in {job['seconds']:.1f}s, {len(rows)} rows")
+    return table, rows
+
+
+def schedule(jobs, run=run_job):
+    """
+    Run every job as soon as no running job holds one of its resources,
+    earlier jobs first. Returns the results of run(job) in job order.
+    """
+    pending = list(range(len(jobs)))
+    results = [None] * len(jobs)
+    busy = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as pool:
+        while pending or running:
+            for i in list(pending):
+                if not jobs[i]["resources"] & busy:
+                    busy |= jobs[i]["resources"]
+                    pending.remove(i)
+                    running[pool.submit(run, jobs[i])] = i
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i = running.pop(fut)
+                busy -= jobs[i]["resources"]
+                results[i] = fut.result()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Resource-aware benchmark runner")
+    ap.add_argument(
+        "benchmarks",
+        nargs="?",
+        default=DEFAULT_BENCHMARKS,
+        help=f"comma-separated list of {', '.join(BENCHMARKS + EXTRA_BENCHMARKS)} "
+        f"or all (default: {DEFAULT_BENCHMARKS})",
+    )
+    ap.add_argument("--hostfile", default=None, help="MPI hostfile of the cluster")
+    ap.add_argument("--env", choices=list(ENVS), default="host", help="environment")
+    ap.add_argument("--role", default="master", help="name of this node")
+    ap.add_argument("--np", type=int, default=None, help="hpcc MPI ranks")
+    ap.add_argument(
+        "--streams",
+        type=int,
+        default=1,
+        help="parallel iperf3 streams per link (iperf3 -P)",
+    )
+    ap.add_argument(
+        "--hpcc-dir",
+        default=None,
+        help="directory with hpccinf.txt, where hpcc writes hpccoutf.txt",
+    )
+    ap.add_argument(
+        "--results",
+        default=None,
+        help="also write human logs and records files under this results "
+        "directory (e.g. ../results)",
+    )
+    ap.add_argument("--serial", action="store_true", help="one job at a time")
+    ap.add_argument(
+        "--dry-run", action="store_true", help="print the jobs and exit"
+    )
+    args = warehouse.add_warehouse_arg(ap).parse_args()
+
+    names = BENCHMARKS if args.benchmarks == "all" else args.benchmarks.split(",")
+    jobs = build_jobs(names, args)
+    if not jobs:
+        raise SystemExit("❌ Nothing to run")
+    print("🗓️ Jobs (a job waits while another one holds its resources):")
+    for job in jobs:
+        print(f"  {job['name']:<24} [{', '.join(sorted(job['resources']))}]")
+        if args.dry_run:
+            for argv, _ in job["steps"]:
+                print(f"      $ {' '.join(argv)}")
+    if args.dry_run:
+        return
+
+    t0 = time.perf_counter()
+    results = schedule(jobs)
+    print(f"\n⏱️ {len(jobs)} jobs in {time.perf_counter() - t0:.1f}s wall")
+
+    for job, (table, _) in zip(jobs, results):
+        shown = [c for c in SHOWN.get(job["kind"], table.columns) if c in table]
+        if not table.empty and shown:
+            print(f"\n=== {job['name']} ===")
+            print(table[shown].T.to_string())
+    rows = [r for _, r in results if not r.empty]
+    if rows:
+        # Without --results there are no logs to fingerprint: every run is new
+        logs = [job["log"] + ".log" for job in jobs if job["log"]]
+        store.save_runs(
+            store.concat(rows), warehouse_path=args.warehouse, sources=logs or None
+        )
+    failed = [job["name"] for job in jobs if job["errors"]]
+    if failed:
+        raise SystemExit(f"❌ Failed: {', '.join(failed)}")
+    print("\n✅ Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Constant-memory running statistics for benchmark samples.
+
+RunningStats keeps count, mean and M2 (Welford / Chan et al. for batches),
+min, max and a log-bucketed quantile sketch: every positive sample falls in
+the bucket ceil(log(x) / log(gamma)), so any quantile is reported within
+ALPHA relative error and memory only grows with the log of the value range,
+never with the number of samples. Accumulators merge exactly and
+round-trip through JSON, which is how the incremental summaries keep them
+between runs. LogHistogram is the array-backed variant for latency streams
+that are summarised and plotted from their buckets alone.
+
+The bootstrap helpers below decide whether one system really beats another:
+every resample is drawn in a single NumPy batch, and a comparison only
+counts as a win when its confidence interval excludes zero.
+"""
+import math
+
+import numpy as np
+
+ALPHA = 0.01  # relative accuracy of the quantile sketch
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+LOG_GAMMA = math.log(GAMMA)
+
+QUANTILES = (0.50, 0.95, 0.99)
+SUMMARY_FIELDS = ["n", "std", "min", "max"] + [f"p{round(q * 100)}" for q in QUANTILES]
+
+
+class RunningStats:
+    """Streaming count/mean/stddev/min/max/quantiles of one metric"""
+
+    __slots__ = ("count", "mean", "m2", "min", "max", "buckets", "zeros")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = {}  # bucket index -> samples
+        self.zeros = 0  # samples <= 0, kept out of the log buckets
+
+    def add(self, x):
+        x = float(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if x > 0:
+            i = math.ceil(math.log(x) / LOG_GAMMA)
+            self.buckets[i] = self.buckets.get(i, 0) + 1
+        else:
+            self.zeros += 1
+
+    def extend(self, values):
+        """Fold a batch of samples in with one vectorised pass"""
+        x = np.asarray(values, dtype=np.float64)
+        if not x.size:
+            return
+        batch = RunningStats()
+        batch.count = int(x.size)
+        batch.mean = float(x.mean())
+        batch.m2 = float(((x - batch.mean) ** 2).sum())
+        batch.min = float(x.min())
+        batch.max = float(x.max())
+        pos = x[x > 0]
+        batch.zeros = int(x.size - pos.size)
+        idx, counts = np.unique(
+            np.ceil(np.log(pos) / LOG_GAMMA).astype(np.int64), return_counts=True
+        )
+        batch.buckets = dict(zip(idx.tolist(), counts.tolist()))
+        self.merge(batch)
+
+    def merge(self, other):
+        """Combine with another accumulator (Chan's parallel update)"""
+        if not other.count:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zeros += other.zeros
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+
+    @property
+    def std(self):
+        """Sample standard deviation (nan below two samples)"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    def quantile(self, q):
+        """
+        Nearest-rank q-quantile, within ALPHA relative error and clamped to
+        [min, max]
+        """
+        if not self.count:
+            return math.nan
+        rank = max(1, math.ceil(q * self.count))
+        seen = self.zeros
+        if rank <= seen:
+            return self.min if self.min <= 0 else 0.0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if rank <= seen:
+                value = 2 * GAMMA**i / (GAMMA + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, name):
+        """{name: mean, name_std: ..., name_p99: ...}; NaN when empty"""
+        if not self.count:
+            row = {name: math.nan, **{f"{name}_{f}": math.nan for f in SUMMARY_FIELDS}}
+            row[f"{name}_n"] = 0
+            return row
+        row = {
+            name: self.mean,
+            f"{name}_n": self.count,
+            f"{name}_std": self.std,
+            f"{name}_min": self.min,
+            f"{name}_max": self.max,
+        }
+        for q in QUANTILES:
+            row[f"{name}_p{round(q * 100)}"] = self.quantile(q)
+        return row
+
+    def to_state(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zeros": self.zeros,
+            "buckets": {str(i): c for i, c in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        s = cls()
+        if not state:
+            return s
+        s.count = state["count"]
+        s.mean = state["mean"]
+        s.m2 = state["m2"]
+        if s.count:
+            s.min = state["min"]
+            s.max = state["max"]
+        s.zeros = state["zeros"]
+        s.buckets = {int(i): c for i, c in state["buckets"].items()}
+        return s
+
+
+def summary_columns(names):
+    """Column order of a summary table built from RunningStats.summary"""
+    return [c for n in names for c in [n] + [f"{n}_{f}" for f in SUMMARY_FIELDS]]
+
+
+class LogHistogram:
+    """
+    HDR-style histogram for long latency streams: the same log buckets as
+    RunningStats' sketch, but in one preallocated NumPy array covering
+    [lowest, highest], so recording a batch is a single bincount and the
+    memory never depends on the number of samples. Count, sum, min and max
+    are kept exactly; values outside the range fall in the edge buckets.
+    """
+
+    __slots__ = (
+        "lowest",
+        "highest",
+        "offset",
+        "counts",
+        "count",
+        "sum",
+        "min",
+        "max",
+    )
+
+    def __init__(self, lowest=1e-3, highest=1e5):
+        self.lowest = lowest
+        self.highest = highest
+        self.offset = math.ceil(math.log(lowest) / LOG_GAMMA)
+        size = math.ceil(math.log(highest) / LOG_GAMMA) - self.offset + 1
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def index(self, values):
+        """Bucket of every value, clamped to the histogram's range"""
+        x = np.maximum(np.asarray(values, dtype=np.float64), self.lowest)
+        i = np.ceil(np.log(x) / LOG_GAMMA).astype(np.int64) - self.offset
+        return np.clip(i, 0, self.counts.size - 1)
+
+    def values(self, buckets=None):
+        """Representative value of buckets (all of them by default)"""
+        i = np.arange(self.counts.size) if buckets is None else np.asarray(buckets)
+        return 2 * GAMMA ** (i + self.offset) / (GAMMA + 1)
+
+    def record(self, values):
+        x = np.asarray(values, dtype=np.float64).ravel()
+        if not x.size:
+            return
+        self.counts += np.bincount(self.index(x), minlength=self.counts.size)
+        self.count += int(x.size)
+        self.sum += float(x.sum())
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+
+    def merge(self, other):
+        """
+        Add other's samples; both must have the same range and ALPHA, or
+        their buckets would not line up
+        """
+        for name, mine, theirs in (
+            ("lowest", self.lowest, other.lowest),
+            ("highest", self.highest, other.highest),
+            ("buckets", self.counts.size, other.counts.size),
+        ):
+            if mine != theirs:
+                raise ValueError(
+                    f"cannot merge LogHistograms with different {name}: "
+                    f"{mine} != {theirs}"
+                )
+        self.counts += other.counts
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def quantiles(self, qs):
+        """Nearest-rank quantiles, within ALPHA relative error and clamped"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if not self.count:
+            return np.full(qs.shape, math.nan)
+        ranks = np.maximum(1, np.ceil(qs * self.count))
+        buckets = np.searchsorted(np.cumsum(self.counts), ranks)
+        return np.clip(self.values(buckets), self.min, self.max)
+
+    def to_state(self):
+        nz = np.flatnonzero(self.counts)
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "alpha": ALPHA,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": dict(zip(map(str, nz.tolist()), self.counts[nz].tolist())),
+        }
+
+    @classmethod
+    def from_state(cls, state, lowest=1e-3, highest=1e5):
+        if not state:
+            return cls(lowest, highest)
+        if state.get("alpha", ALPHA) != ALPHA:
+            raise ValueError(
+                f"LogHistogram state has alpha {state['alpha']}, not {ALPHA}"
+            )
+        h = cls(state["lowest"], state["highest"])
+        h.count = state["count"]
+        h.sum = state["sum"]
+        if h.count:
+            h.min = state["min"]
+            h.max = state["max"]
+        for i, c in state["buckets"].items():
+            h.counts[int(i)] = c
+        return h
+
+
+N_BOOT = 10000
+SIG_LEVEL = 0.05
+
+
+def bootstrap_means(values, n_boot=N_BOOT, rng=None):
+    """
+    Bootstrap distribution of the mean of values, resampled in one
+    (n_boot, n) batch. None with fewer than two finite values.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    if x.size < 2:
+        return None
+    rng = rng or np.random.default_rng(0)
+    return x[rng.integers(0, x.size, size=(n_boot, x.size))].mean(axis=1)
+
+
+def summary_means(mean, std, n, n_boot=N_BOOT, rng=None):
+    """
+    Parametric bootstrap of a mean known only from its summary (mean,
+    std, n), for tables that no longer carry the raw samples.
+    """
+    if not (n >= 2 and np.isfinite(mean) and np.isfinite(std)):
+        return None
+    rng = rng or np.random.default_rng(0)
+    return rng.normal(mean, std / math.sqrt(n), n_boot)
+
+
+def confidence_interval(draws, alpha=SIG_LEVEL):
+    """Percentile (1 - alpha) interval of bootstrap draws, or (nan, nan)"""
+    if draws is None:
+        return math.nan, math.nan
+    lo, hi = np.quantile(draws, [alpha / 2, 1 - alpha / 2])
+    return float(lo), float(hi)
+
+
+def compare(draws_a, draws_b, alpha=SIG_LEVEL):
+    """
+    Difference of means a - b with its bootstrap interval and two-sided
+    p-value; significant when the interval excludes zero.
+    """
+    if draws_a is None or draws_b is None:
+        nan = math.nan
+        return {
+            "diff": nan,
+            "ci_low": nan,
+            "ci_high": nan,
+            "p_value": nan,
+            "significant": False,
+        }
+    d = draws_a - draws_b
+    lo, hi = confidence_interval(d, alpha)
+    p = min(1.0, 2 * min((d <= 0).mean(), (d >= 0).mean()))
+    return {
+        "diff": float(d.mean()),
+        "ci_low": lo,
+        "ci_high": hi,
+        "p_value": float(p),
+        "significant": bool(p < alpha),
+    }
+
+
+def rank(draws, means, lower_is_better=False, alpha=SIG_LEVEL):
+    """
+    Winner and loser among labels: the best mean is only a winner when it
+    is significantly better than the runner-up, and the worst only a loser
+    when it is significantly worse than the next-to-last.
+
+    draws and means map label -> bootstrap draws (or None) and point value.
+    Returns (winner or None, loser or None, winner comparison, loser
+    comparison).
+    """
+    labels = [k for k in means if np.isfinite(means[k])]
+    labels.sort(key=lambda k: means[k], reverse=not lower_is_better)
+    if len(labels) < 2:
+        return None, None, compare(None, None), compare(None, None)
+    best, runner_up = labels[0], labels[1]
+    worst, above = labels[-1], labels[-2]
+    win = compare(draws[best], draws[runner_up], alpha)
+    lose = compare(draws[above], draws[worst], alpha)
+    return (
+        best if win["significant"] else None,
+        worst if lose["significant"] else None,
+        win,
+        lose,
+    )
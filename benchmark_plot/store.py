@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Normalized long-format metric store shared by every benchmark family.
+
+Each script melts its own results into rows of
+
+    run_id, family, env, role, section, metric, value, unit, direction,
+    timestamp
+
+with categoricals for the labels, float64 values and datetime64 stamps, and
+replaces its family's rows in one store file (plots/metric_store.parquet,
+or .pkl without pyarrow). Cross-benchmark queries then read one typed
+frame instead of four ad-hoc CSV schemas:
+
+    import store
+    df = store.query(store.load_store(), family="hpcc", metric="HPL_Tflops")
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import warehouse
+from cache import HAVE_PARQUET
+
+STORE_BASE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "plots", "metric_store"
+)
+
+COLUMNS = [
+    "run_id",
+    "family",
+    "env",
+    "role",
+    "section",
+    "metric",
+    "value",
+    "unit",
+    "direction",
+    "timestamp",
+]
+CATEGORIES = [c for c in COLUMNS if c not in ("value", "timestamp")]
+
+
+def typed(df):
+    """df with the store's column order and dtypes"""
+    df = df.reindex(columns=COLUMNS)
+    for col in CATEGORIES:
+        labels = df[col].astype(object)
+        df[col] = labels.where(labels.notna(), "").astype(str).astype("category")
+    df["value"] = pd.to_numeric(df["value"], errors="coerce").astype("float64")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="mixed")
+    return df.reset_index(drop=True)
+
+
+def empty():
+    return typed(pd.DataFrame(columns=COLUMNS))
+
+
+def from_wide(
+    df,
+    family,
+    metrics,
+    run_id="",
+    env="",
+    role="",
+    section="",
+    timestamp=None,
+    units=None,
+    lower_is_better=(),
+):
+    """
+    Melt a wide frame (one column per metric) into store rows.
+
+    run_id, env, role, section and timestamp name a column of df, or are a
+    constant for every row when they are not one. units maps metric ->
+    unit; metrics in lower_is_better get direction "lower", the rest
+    "higher". Missing values are dropped.
+    """
+    metrics = [m for m in metrics if m in df.columns]
+    if df.empty or not metrics:
+        return empty()
+    ids = {}
+    for key, spec in (
+        ("run_id", run_id),
+        ("env", env),
+        ("role", role),
+        ("section", section),
+        ("timestamp", timestamp),
+    ):
+        if isinstance(spec, str) and spec in df.columns:
+            ids[key] = df[spec].to_numpy()
+        else:
+            ids[key] = np.full(len(df), spec, dtype=object)
+    wide = pd.DataFrame(ids, index=df.index).join(df[metrics])
+    long = wide.melt(id_vars=list(ids), var_name="metric", value_name="value")
+    long["value"] = pd.to_numeric(long["value"], errors="coerce")
+    long = long.dropna(subset=["value"])
+    long["family"] = family
+    long["unit"] = long["metric"].map(units or {})
+    long["direction"] = np.where(
+        long["metric"].isin(list(lower_is_better)), "lower", "higher"
+    )
+    return typed(long)
+
+
+def concat(frames):
+    """Concatenate store frames, rebuilding the categories as a union"""
+    return typed(pd.concat([f.astype(object) for f in frames], ignore_index=True))
+
+
+def _path(base):
+    for ext in (".parquet", ".pkl"):
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def load_store(base=STORE_BASE):
+    """The whole store, or an empty typed frame before any script wrote it"""
+    path = _path(base)
+    if path is None:
+        return empty()
+    if path.endswith(".parquet"):
+        return typed(pd.read_parquet(path))
+    return typed(pd.read_pickle(path))
+
+
+def write_store(df, base=STORE_BASE):
+    """Write df as the store at base (Parquet, or pickle without pyarrow)"""
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    if HAVE_PARQUET:
+        target = base + ".parquet"
+        tmp = f"{target}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False)
+    else:
+        target = base + ".pkl"
+        tmp = f"{target}.{os.getpid()}.tmp"
+        df.to_pickle(tmp)
+    os.replace(tmp, target)
+    # Drop a copy in the other format so only one is ever read
+    for ext in (".parquet", ".pkl"):
+        if base + ext != target and os.path.exists(base + ext):
+            os.remove(base + ext)
+    return target
+
+
+def save_family(rows, family, base=STORE_BASE, warehouse_path=None, sources=None):
+    """
+    Replace every row of family in the store by rows, and append them to
+    the warehouse at warehouse_path when one is given (sources: the files
+    the rows were read from, see warehouse.insert)
+    """
+    store = load_store(base)
+    keep = store[store["family"] != family]
+    path = write_store(concat([keep, rows]), base)
+    print(f"🗄️ Stored {len(rows)} {family} metric rows in {path}")
+    if warehouse_path:
+        warehouse.insert(warehouse_path, rows, sources)
+    return path
+
+
+def save_runs(rows, base=STORE_BASE, warehouse_path=None, sources=None):
+    """
+    Replace the rows of every (family, run_id) in rows and keep the rest of
+    the store, for results that cover only some runs of their families
+    """
+    store = load_store(base)
+    ids = ["family", "run_id"]
+    new = pd.MultiIndex.from_frame(rows[ids].astype(str))
+    stale = pd.MultiIndex.from_frame(store[ids].astype(str)).isin(new)
+    path = write_store(concat([store[~stale], rows]), base)
+    print(f"🗄️ Stored {len(rows)} metric rows in {path}")
+    if warehouse_path:
+        warehouse.insert(warehouse_path, rows, sources)
+    return path
+
+
+def query(store, **filters):
+    """
+    Rows of store matching every filter, e.g. query(df, family="disk",
+    env=["vm", "container"]); a list matches any of its values.
+    """
+    mask = pd.Series(True, index=store.index)
+    for col, want in filters.items():
+        if isinstance(want, (list, tuple, set)):
+            mask &= store[col].isin(list(want))
+        else:
+            mask &= store[col] == want
+    return store[mask]
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Embedded results warehouse: every metric store row ever written, across
+clusters and dates, in one local database file with no server.
+
+SQLite (standard library) is the default; a path ending in .duckdb uses
+DuckDB when it is installed. Rows are bulk-inserted by the scripts run with
+--warehouse. Every insert is fingerprinted by its source files (path, size,
+mtime): rows without a timestamp of their own are stamped with the
+ingestion time and get the fingerprint appended to their run_id, so every
+ingest of changed logs is a run of its own, even when its values repeat,
+while re-plotting unchanged logs adds no history. Rows with their own
+timestamp are skipped when the same labels and timestamp are present. The
+table is indexed on (env, metric, timestamp) and (family, metric), so trend
+queries only touch the rows they return:
+
+    python warehouse.py query --metric StarSTREAM_Triad --env containers --last 30
+    python warehouse.py load            # import plots/metric_store.* once
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+try:
+    import duckdb
+
+    HAVE_DUCKDB = True
+except ImportError:
+    HAVE_DUCKDB = False
+
+WAREHOUSE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "plots", "warehouse.sqlite"
+)
+
+LABELS = ["run_id", "family", "env", "role", "section", "metric"]
+COLUMNS = LABELS + ["value", "unit", "direction", "timestamp", "ingested_at"]
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS metrics (
+        run_id TEXT,
+        family TEXT,
+        env TEXT,
+        role TEXT,
+        section TEXT,
+        metric TEXT,
+        value DOUBLE,
+        unit TEXT,
+        direction TEXT,
+        timestamp TEXT,
+        ingested_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS metrics_env_metric_ts "
+    "ON metrics (env, metric, timestamp)",
+    "CREATE INDEX IF NOT EXISTS metrics_family_metric ON metrics (family, metric)",
+]
+
+
+def add_warehouse_arg(ap):
+    ap.add_argument(
+        "--warehouse",
+        nargs="?",
+        const=WAREHOUSE_PATH,
+        default=None,
+        metavar="PATH",
+        help="also append the results to an embedded SQLite (or .duckdb) "
+        f"warehouse (default path: {os.path.relpath(WAREHOUSE_PATH)})",
+    )
+    return ap
+
+
+def connect(path):
+    """Open (and create) the warehouse at path"""
+    if path.endswith(".duckdb"):
+        if not HAVE_DUCKDB:
+            raise SystemExit(f"❌ {path} needs duckdb: pip install duckdb")
+        con = duckdb.connect(path)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        con = sqlite3.connect(path)
+    for stmt in SCHEMA:
+        con.execute(stmt)
+    return con
+
+
+def _is_duckdb(con):
+    return not isinstance(con, sqlite3.Connection)
+
+
+def fingerprint(sources=None, store_rows=None, ingested_at=""):
+    """
+    Short digest of what an insert was read from: path, size and mtime of
+    every source file. Without sources it covers the rows and the ingestion
+    time instead, so such an insert is always a new run.
+    """
+    h = hashlib.sha256()
+    if sources:
+        for path in sorted({os.path.abspath(p) for p in sources}):
+            try:
+                st = os.stat(path)
+                h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+            except OSError:
+                h.update(f"{path}\n".encode())
+    else:
+        h.update(ingested_at.encode())
+        if store_rows is not None:
+            h.update(pd.util.hash_pandas_object(store_rows, index=False).to_numpy())
+    return h.hexdigest()[:12]
+
+
+def to_rows(store_rows, ingested_at=None, source=""):
+    """
+    Metric store rows as plain warehouse columns (ISO text timestamps).
+    Rows without a timestamp get ingested_at and "<run_id>@<source>".
+    """
+    now = pd.Timestamp(ingested_at or pd.Timestamp.now()).strftime(TS_FORMAT)
+    df = pd.DataFrame({c: store_rows[c].astype(str) for c in LABELS})
+    df["value"] = store_rows["value"].astype("float64").to_numpy()
+    df["unit"] = store_rows["unit"].astype(str).to_numpy()
+    df["direction"] = store_rows["direction"].astype(str).to_numpy()
+    stamps = pd.to_datetime(store_rows["timestamp"], errors="coerce")
+    stamped = stamps.isna().to_numpy()
+    df["timestamp"] = stamps.dt.strftime(TS_FORMAT).fillna(now).to_numpy()
+    if source:
+        df.loc[stamped, "run_id"] = df.loc[stamped, "run_id"] + "@" + source
+    df["ingested_at"] = now
+    return df[COLUMNS]
+
+
+# A staged row is new unless the same labels are already there, at the same
+# timestamp for rows with their own. The run_id of rows stamped at ingestion
+# time carries the source fingerprint, so those are compared without it.
+INSERT_NEW = f"""
+    INSERT INTO metrics ({", ".join(COLUMNS)})
+    SELECT {", ".join(f"s.{c}" for c in COLUMNS)} FROM staged s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM metrics m
+        WHERE {" AND ".join(f"m.{c} = s.{c}" for c in LABELS)}
+        AND (m.timestamp = s.timestamp OR s.timestamp = s.ingested_at)
+    )
+"""
+
+
+def insert(path, store_rows, sources=None):
+    """
+    Bulk-insert metric store rows read from the files in sources; returns
+    how many were new
+    """
+    if store_rows.empty:
+        return 0
+    now = pd.Timestamp.now().strftime(TS_FORMAT)
+    df = to_rows(store_rows, now, fingerprint(sources, store_rows, now))
+    con = connect(path)
+    try:
+        if _is_duckdb(con):
+            con.register("staged", df)
+            before = con.execute("SELECT count(*) FROM metrics").fetchone()[0]
+            con.execute(INSERT_NEW)
+            added = con.execute("SELECT count(*) FROM metrics").fetchone()[0] - before
+            con.unregister("staged")
+        else:
+            with con:
+                con.execute(
+                    "CREATE TEMP TABLE staged AS SELECT * FROM metrics WHERE 0"
+                )
+                con.executemany(
+                    f"INSERT INTO staged VALUES ({', '.join('?' * len(COLUMNS))})",
+                    df.itertuples(index=False, name=None),
+                )
+                added = con.execute(INSERT_NEW).rowcount
+                con.execute("DROP TABLE staged")
+    finally:
+        con.close()
+    print(f"🏛️ Warehouse {path}: {added} new of {len(df)} rows")
+    return added
+
+
+def query(
+    path=WAREHOUSE_PATH,
+    metric=None,
+    env=None,
+    family=None,
+    role=None,
+    section=None,
+    since=None,
+    last=None,
+):
+    """
+    Warehouse rows matching the filters, oldest first. A list filter
+    matches any of its values; since is a date; last keeps the most recent
+    `last` runs, a run being one (run_id, timestamp).
+    """
+    where, params = [], []
+    for col, want in (
+        ("metric", metric),
+        ("env", env),
+        ("family", family),
+        ("role", role),
+        ("section", section),
+    ):
+        if want is None:
+            continue
+        values = list(want) if isinstance(want, (list, tuple, set)) else [want]
+        where.append(f"{col} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if since is not None:
+        where.append("timestamp >= ?")
+        params.append(pd.Timestamp(since).strftime(TS_FORMAT))
+    cond = " AND ".join(where) or "1 = 1"
+
+    if last:
+        sql = f"""
+            WITH runs AS (
+                SELECT DISTINCT run_id, timestamp FROM metrics WHERE {cond}
+                ORDER BY timestamp DESC LIMIT ?
+            )
+            SELECT m.* FROM metrics m
+            JOIN runs r ON m.run_id = r.run_id AND m.timestamp = r.timestamp
+            WHERE {" AND ".join(f"m.{w}" for w in where) or "1 = 1"}
+            ORDER BY m.timestamp, m.run_id
+        """
+        params = params + [int(last)] + params
+    else:
+        sql = f"SELECT * FROM metrics WHERE {cond} ORDER BY timestamp, run_id"
+
+    con = connect(path)
+    try:
+        cur = con.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        df = pd.DataFrame(cur.fetchall(), columns=names)
+    finally:
+        con.close()
+    for col in ("timestamp", "ingested_at"):
+        df[col] = pd.to_datetime(df[col], format=TS_FORMAT)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Embedded benchmark results warehouse")
+    ap.add_argument("--db", default=WAREHOUSE_PATH, help="SQLite or .duckdb file")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("load", help="import the current metric store")
+
+    q = sub.add_parser("query", help="rows matching the filters, oldest first")
+    for name in ("metric", "env", "family", "role", "section"):
+        q.add_argument(f"--{name}", action="append", help="repeat to match any")
+    q.add_argument("--since", default=None, help="only rows from this date on")
+    q.add_argument("--last", type=int, default=None, help="most recent runs only")
+    q.add_argument("--csv", default=None, help="also save the rows here")
+    args = ap.parse_args()
+
+    if args.command == "load":
+        import store
+
+        insert(args.db, store.load_store(), [store._path(store.STORE_BASE)])
+        return
+
+    t0 = time.perf_counter()
+    df = query(
+        args.db,
+        metric=args.metric,
+        env=args.env,
+        family=args.family,
+        role=args.role,
+        section=args.section,
+        since=args.since,
+        last=args.last,
+    )
+    elapsed = (time.perf_counter() - t0) * 1000
+    if df.empty:
+        print(f"⚠️ No rows match ({elapsed:.1f} ms)")
+        return
+    shown = ["timestamp", "run_id", "env", "role", "section", "metric", "value"]
+    print(df[shown + ["unit"]].to_string(index=False))
+    print(f"\n⏱️ {len(df)} rows in {elapsed:.1f} ms")
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"💾 Saved: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()